@@ -0,0 +1,48 @@
+# benchmarks/bench_actions.py
+"""
+Where compile time goes per action type (atomic_behaviors handlers, ACTION_TIMING on).
+
+    python -m benchmarks.bench_actions
+    python -m benchmarks.bench_actions --runs 200
+
+Compiles every canned mock blueprint `runs` times and prints the handler totals,
+plus the share of the whole compile spent building action events.
+"""
+import os
+import time
+import argparse
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from src.core.config import settings
+from src.generators.scenario_compiler import ScenarioCompiler
+from src.generators.mock_llm_service import CANNED_BLUEPRINTS
+from src.generators.atomic_behaviors import action_handler_stats, reset_action_handler_stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Per action type compile time")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    settings.ACTION_TIMING = True
+    compiler = ScenarioCompiler()
+    blueprints = list(CANNED_BLUEPRINTS.values())
+    for blueprint in blueprints:
+        compiler.build_scenario(blueprint) # Warm skeletons / imports
+    reset_action_handler_stats()
+
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        for blueprint in blueprints:
+            compiler.build_scenario(blueprint)
+    total = time.perf_counter() - started
+
+    stats = action_handler_stats()
+    print(f"{'action type':<14} {'calls':>7} {'total ms':>10} {'us / call':>10}")
+    for action_type, s in sorted(stats.items(), key=lambda kv: -kv[1]["seconds"]):
+        print(f"{action_type:<14} {s['calls']:>7} {s['seconds'] * 1000:>10.2f} {s['seconds'] / s['calls'] * 1e6:>10.1f}")
+    in_handlers = sum(s["seconds"] for s in stats.values())
+    print(f"\nbuild_scenario total {total * 1000:.1f} ms, {in_handlers / total:.0%} in action handlers")
+
+if __name__ == "__main__":
+    main()
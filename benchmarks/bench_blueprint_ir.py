@@ -0,0 +1,68 @@
+# benchmarks/bench_blueprint_ir.py
+"""
+Blueprint parsing: the old dict path (json.loads + validate_blueprint + defaults applied
+by the compiler with .get()) vs. the typed IR (one pydantic-core validate_json pass).
+
+    python -m benchmarks.bench_blueprint_ir
+    python -m benchmarks.bench_blueprint_ir --count 20000
+
+Reports the time to parse `count` LLM-style JSON blueprints and the memory retained
+per parsed blueprint (tracemalloc).
+"""
+import copy
+import json
+import timeit
+import argparse
+import tracemalloc
+
+from benchmarks.bench_compile import TWO_ACTORS
+from src.core.blueprint import parse_blueprint_json
+
+def legacy_parse(text: str) -> dict:
+    """ What the pipeline did before the IR (validate_blueprint + the compiler's default lookups). """
+    blueprint = json.loads(text)
+    blueprint.setdefault("actors", [])
+    blueprint.setdefault("actions", [])
+    blueprint["actions"] = [a for a in blueprint["actions"] if "type" in a]
+    for actor in blueprint["actors"]:
+        actor.get("lane"), actor.get("s", 0), actor.get("speed", 30), actor.get("offset", 0)
+    for action in blueprint["actions"]:
+        action.get("actor"), action.get("trigger_time"), action.get("trigger_dist"), action.get("duration")
+        action.get("target_speed"), action.get("target_lane")
+    return blueprint
+
+def sample_texts(count: int) -> list:
+    texts = []
+    for i in range(count):
+        blueprint = copy.deepcopy(TWO_ACTORS)
+        blueprint["actors"][0]["speed"] = 80 + i % 40
+        blueprint["actions"][1]["trigger_time"] = 2.0 + (i % 10) / 2
+        texts.append(json.dumps(blueprint))
+    return texts
+
+def retained_bytes(parse, texts: list) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    parsed = [parse(t) for t in texts]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del parsed
+    return after - before
+
+def main():
+    parser = argparse.ArgumentParser(description="Blueprint IR parsing benchmark")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = sample_texts(args.count)
+    cases = [("dict (legacy)", legacy_parse), ("IR validate_json", parse_blueprint_json)]
+
+    print(f"{'path':<18} {'total ms':>10} {'us / blueprint':>15} {'bytes / blueprint':>18}")
+    for label, parse in cases:
+        best = min(timeit.repeat(lambda: [parse(t) for t in texts], number=1, repeat=args.repeat))
+        memory = retained_bytes(parse, texts)
+        print(f"{label:<18} {best * 1000:>10.1f} {best / args.count * 1e6:>15.2f} {memory / args.count:>18.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_compile.py
+"""
+Compile latency of ScenarioCompiler, with and without the per-map skeleton cache.
+
+    python -m benchmarks.bench_compile
+    python -m benchmarks.bench_compile --runs 50 --vehicles 200
+
+Two cases: the 2-actor cut-in scenario and a dense-traffic scenario with N background
+vehicles. Traffic positions come from a seeded synthetic generator instead of
+get_vehicle_positions so the benchmark measures the compiler only (and runs without esmini).
+"""
+import os
+import re
+import time
+import random
+import argparse
+import statistics
+import numpy as np
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from src.generators import scenario_compiler
+from src.generators.generate_traffic import TRAFFIC_DTYPE, TrafficLayout
+from src.generators.scenario_compiler import ScenarioCompiler
+
+TWO_ACTORS = {
+    "map_key": "highway",
+    "actors": [
+        {"name": "Ego", "type": "car", "lane": -2, "s": 50, "speed": 100},
+        {"name": "Target", "type": "car", "lane": -3, "s": 35, "speed": 130}
+    ],
+    "actions": [
+        {"type": "lane_change", "actor": "Target", "target_lane": -2, "trigger_time": 4.0, "duration": 2.0},
+        {"type": "brake", "actor": "Ego", "target_speed": 60, "trigger_time": 6.0, "duration": 3.0}
+    ]
+}
+
+def dense_blueprint() -> dict:
+    return dict(TWO_ACTORS, traffic_density="high")
+
+def synthetic_positions(count: int, seed: int = 0):
+    """ Stand-in for get_vehicle_positions: `count` cars spread over 4 lanes. """
+    def generate(roadfile, ego_pos, density, catalog_path, rng=None, columnar=False):
+        rng = random.Random(seed)
+        models = ["car_white", "car_blue", "car_red", "car_yellow"]
+        positions = np.zeros(count, dtype=TRAFFIC_DTYPE)
+        for i in range(count):
+            positions[i] = (100 + (i // 4) * 20 + rng.uniform(0, 5), 0, -1 - (i % 4), 0, i % len(models))
+        layout = TrafficLayout(positions, [{"name": m, "length": 4.5} for m in models])
+        return layout if columnar else layout.to_dict()
+    return generate
+
+def measure(compiler: ScenarioCompiler, blueprint: dict, runs: int):
+    build, total = [], []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        compiler.build_scenario(blueprint)
+        t1 = time.perf_counter()
+        random.seed(0) # Background speeds use the global RNG
+        scn_bytes = compiler.compile_to_bytes(blueprint)
+        t2 = time.perf_counter()
+        build.append((t1 - t0) * 1000)
+        total.append((t2 - t1) * 1000)
+    return statistics.median(build), statistics.median(total), scn_bytes
+
+def strip_date(data: bytes) -> bytes:
+    return re.sub(rb'date="[^"]*"', b'', data)
+
+def main():
+    parser = argparse.ArgumentParser(description="ScenarioCompiler latency benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--vehicles", type=int, default=200)
+    args = parser.parse_args()
+
+    scenario_compiler.get_vehicle_positions = synthetic_positions(args.vehicles)
+
+    cases = [("2 actors", TWO_ACTORS), (f"{args.vehicles} vehicles", dense_blueprint())]
+    print(f"{'case':<14} {'skeleton cache':<15} {'build ms':>10} {'to_bytes ms':>12}")
+    for label, blueprint in cases:
+        outputs = []
+        for cached in (False, True):
+            compiler = ScenarioCompiler(skeleton_cache=cached)
+            compiler.compile_to_bytes(blueprint) # Warm the cache / imports
+            build_ms, total_ms, data = measure(compiler, blueprint, args.runs)
+            outputs.append(strip_date(data))
+            print(f"{label:<14} {'on' if cached else 'off':<15} {build_ms:>10.2f} {total_ms:>12.2f}")
+        if outputs[0] != outputs[1]:
+            print(f"  WARNING: output differs with the skeleton cache for '{label}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_compile_many.py
+"""
+Throughput of ScenarioCompiler.compile_many vs. a plain serial loop.
+
+    python -m benchmarks.bench_compile_many
+    python -m benchmarks.bench_compile_many --items 5000 --workers 1 2 4 8
+
+Pool start-up (spawn + KG/map warm-up) is paid once and excluded: each pool is
+warmed with a small call before timing, as a long-running fuzz campaign would.
+"""
+import os
+import time
+import argparse
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from src.generators.scenario_compiler import ScenarioCompiler
+from src.generators.mock_llm_service import CANNED_BLUEPRINTS
+from src.generators.compile_pool import shutdown_pools
+
+def campaign(items: int) -> list:
+    families = list(CANNED_BLUEPRINTS.values())
+    return [families[i % len(families)] for i in range(items)]
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="compile_many scaling benchmark")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cpus}))
+    args = parser.parse_args()
+
+    blueprints = campaign(args.items)
+    compiler = ScenarioCompiler()
+
+    t0 = time.perf_counter()
+    for i, blueprint in enumerate(blueprints):
+        compiler.compile_to_bytes(blueprint, seed=f"0:{i}")
+    serial = time.perf_counter() - t0
+    print(f"{cpus} CPU cores, {args.items} blueprints")
+    print(f"{'serial':<10} {serial:8.2f} s {args.items / serial:10.0f} items/s")
+
+    for workers in args.workers:
+        compiler.compile_many(blueprints[:workers * 4], workers=workers) # Spawn + warm the pool
+        t0 = time.perf_counter()
+        results = compiler.compile_many(blueprints, workers=workers)
+        elapsed = time.perf_counter() - t0
+        errors = sum(r["status"] != "ok" for r in results)
+        print(f"{workers:>2} workers {elapsed:8.2f} s {args.items / elapsed:10.0f} items/s   x{serial / elapsed:4.2f}   errors: {errors}")
+
+    shutdown_pools()
+
+if __name__ == "__main__":
+    main()
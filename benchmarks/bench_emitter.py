@@ -0,0 +1,62 @@
+# benchmarks/bench_emitter.py
+"""
+Compile time and peak memory of the two ScenarioCompiler backends vs. actor count.
+
+    python -m benchmarks.bench_emitter
+    python -m benchmarks.bench_emitter --counts 100 1000 5000
+
+Every (backend, count) pair runs in a fresh interpreter so peak RSS is not polluted
+by earlier runs. The scenario is written to a temp file, as the API does when persisting.
+Uses the synthetic traffic generator from bench_compile. Peak RSS needs `resource` (Linux/macOS).
+"""
+import sys
+import json
+import argparse
+import subprocess
+
+# Executed in a child interpreter; prints one JSON line
+PROBE = r"""
+import os, sys, time, json, resource, tempfile
+os.environ.setdefault("GROQ_API_KEY", "bench")
+from src.generators import scenario_compiler
+from benchmarks.bench_compile import synthetic_positions, TWO_ACTORS, dense_blueprint
+
+scenario_compiler.get_vehicle_positions = synthetic_positions({count})
+compiler = scenario_compiler.ScenarioCompiler()
+compiler.compile_to_bytes(TWO_ACTORS, backend="{backend}") # Imports + skeleton cache
+
+def peak_kb():
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / 1024 if sys.platform == "darwin" else kb # macOS reports bytes
+
+with tempfile.TemporaryDirectory() as tmp:
+    scenario_compiler.settings.OUTPUT_DIR = tmp
+    baseline = peak_kb()
+    t0 = time.perf_counter()
+    path = compiler.compile(dense_blueprint(), output_name="bench.xosc", backend="{backend}")
+    elapsed = time.perf_counter() - t0
+    size = os.path.getsize(path)
+
+print(json.dumps({{"seconds": elapsed, "peak_rss_delta_kb": peak_kb() - baseline, "bytes": size}}))
+"""
+
+def run_probe(backend: str, count: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(backend=backend, count=count)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="xosc vs stream backend benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 200, 1000, 5000])
+    args = parser.parse_args()
+
+    print(f"{'vehicles':>8} {'backend':<8} {'time ms':>10} {'peak RSS +MB':>13} {'file KB':>9}")
+    for count in args.counts:
+        for backend in ("xosc", "stream"):
+            r = run_probe(backend, count)
+            print(f"{count:>8} {backend:<8} {r['seconds'] * 1000:>10.1f} {r['peak_rss_delta_kb'] / 1024:>13.1f} {r['bytes'] / 1024:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_road_geometry.py
+"""
+Vectorized OpenDRIVE geometry (road_geometry): batch (road, s, lane) -> world placement
+vs. one call per point, and accurate road bounds vs. the first/last geometry points
+that get_roads_within_bounds uses.
+
+    python -m benchmarks.bench_road_geometry
+    python -m benchmarks.bench_road_geometry --roads 500 --points 100000
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from src.core.config import settings
+from src.generators import road_geometry
+from src.generators.road_model import load_road_model
+from tests.conftest import synthetic_xodr
+
+def main():
+    parser = argparse.ArgumentParser(description="Road geometry engine benchmark")
+    parser.add_argument("--roads", type=int, default=200)
+    parser.add_argument("--points", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.ROAD_CACHE_DIR = ""
+        path = os.path.join(tmp, "synthetic.xodr")
+        synthetic_xodr(path, args.roads)
+        model = load_road_model(path)
+
+    rng = np.random.default_rng(0)
+    road = 0
+    s = rng.uniform(0, model.lengths[road], args.points)
+
+    t0 = time.perf_counter()
+    x, y, _ = road_geometry.lane_to_world(model, road, s, -2)
+    batch_ms = (time.perf_counter() - t0) * 1000
+
+    loop_points = min(args.points, 2000)
+    t0 = time.perf_counter()
+    for value in s[:loop_points]:
+        road_geometry.lane_to_world(model, road, value, -2)
+    loop_ms = (time.perf_counter() - t0) * 1000 * args.points / loop_points
+
+    print(f"lane_to_world, {args.points} points on one road (mixed line/arc/spiral/poly3/paramPoly3):")
+    print(f"  one call {batch_ms:.2f} ms, per-point calls {loop_ms:.0f} ms (extrapolated), {loop_ms / batch_ms:.0f}x")
+
+    t0 = time.perf_counter()
+    bounds = road_geometry.road_bounds(model)
+    bounds_ms = (time.perf_counter() - t0) * 1000
+
+    # How much of each road the old "first and last geometry start point" box misses
+    legacy = np.column_stack([
+        np.minimum(model.first_geom, model.last_geom),
+        np.maximum(model.first_geom, model.last_geom),
+    ])
+    true_area = (bounds[:, 2] - bounds[:, 0]) * (bounds[:, 3] - bounds[:, 1])
+    overlap_w = np.clip(np.minimum(bounds[:, 2], legacy[:, 2]) - np.maximum(bounds[:, 0], legacy[:, 0]), 0, None)
+    overlap_h = np.clip(np.minimum(bounds[:, 3], legacy[:, 3]) - np.maximum(bounds[:, 1], legacy[:, 1]), 0, None)
+    missed = 1 - overlap_w * overlap_h / true_area
+    print(f"road_bounds for {len(model)} roads: {bounds_ms:.1f} ms")
+    print(f"  first/last point boxes miss {np.median(missed):.0%} of the true road box (median), {missed.max():.0%} worst")
+
+if __name__ == "__main__":
+    main()
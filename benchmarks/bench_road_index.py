@@ -0,0 +1,69 @@
+# benchmarks/bench_road_index.py
+"""
+Road-in-bounds queries: road_helpers.get_roads_within_bounds scanning parse_road's dict
+vs. the same call on a cached RoadIndex (uniform grid), plus the segment-intersects-box query.
+
+    python -m benchmarks.bench_road_index
+    python -m benchmarks.bench_road_index --roads 500 5000 --queries 2000
+
+Query boxes are centred on random points of the map, 50-400 m half size (a typical
+ego neighbourhood). Results are checked against the linear scan.
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from src.core.config import settings
+from src.generators import road_index
+from src.generators.road_helpers import parse_road, get_roads_within_bounds
+from tests.conftest import synthetic_xodr
+
+CONDITIONS = ("start_and_stop", "start_or_stop", "start", "stop")
+
+def main():
+    parser = argparse.ArgumentParser(description="Road spatial index benchmark")
+    parser.add_argument("--roads", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.ROAD_CACHE_DIR = os.path.join(tmp, "cache")
+        print(f"{'roads':>6} {'build s':>8} {'reload ms':>10} {'scan us':>9} {'index us':>9} {'speedup':>8} {'intersect us':>13}")
+        for roads in args.roads:
+            path = os.path.join(tmp, f"synthetic_{roads}.xodr")
+            synthetic_xodr(path, roads)
+            _, road_dict = parse_road(path)
+
+            t0 = time.perf_counter()
+            index = road_index.load_road_index(path)
+            build_s = time.perf_counter() - t0
+            road_index.clear_road_indexes()
+            t0 = time.perf_counter()
+            index = road_index.load_road_index(path) # Pickle, what another worker sees
+            reload_ms = (time.perf_counter() - t0) * 1000
+
+            rng = np.random.default_rng(0)
+            points = index.polyline[rng.integers(0, len(index.polyline), args.queries)]
+            sizes = rng.uniform(50, 400, (args.queries, 2))
+            queries = [(tuple(p), tuple(s), CONDITIONS[i % 4]) for i, (p, s) in enumerate(zip(points, sizes))]
+
+            t0 = time.perf_counter()
+            expected = [get_roads_within_bounds(road_dict, *q) for q in queries]
+            scan_us = (time.perf_counter() - t0) / len(queries) * 1e6
+            t0 = time.perf_counter()
+            got = [get_roads_within_bounds(index, *q) for q in queries]
+            index_us = (time.perf_counter() - t0) / len(queries) * 1e6
+            if got != expected:
+                print(f"  WARNING: RoadIndex disagrees with the linear scan for {roads} roads")
+
+            t0 = time.perf_counter()
+            for location, size, _ in queries:
+                index.intersecting(location, size)
+            intersect_us = (time.perf_counter() - t0) / len(queries) * 1e6
+
+            print(f"{roads:>6} {build_s:>8.2f} {reload_ms:>10.2f} {scan_us:>9.0f} {index_us:>9.0f} {scan_us / index_us:>7.1f}x {intersect_us:>13.0f}")
+
+if __name__ == "__main__":
+    main()
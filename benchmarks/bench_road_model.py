@@ -0,0 +1,64 @@
+# benchmarks/bench_road_model.py
+"""
+Road data for dense traffic: road_helpers.parse_road (full ET.parse every call) vs. the
+cached RoadModel (first parse, pickle reload in a fresh process, in-memory hit).
+
+    python -m benchmarks.bench_road_model
+    python -m benchmarks.bench_road_model --roads 200 2000
+
+Runs on a synthetic OpenDRIVE file (esmini's maps are not needed), and checks that
+RoadModel.to_road_dict() matches parse_road's dict.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from src.core.config import settings
+from src.generators import road_model
+from src.generators.road_helpers import parse_road
+from tests.conftest import synthetic_xodr
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Road model cache benchmark")
+    parser.add_argument("--roads", type=int, nargs="+", default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.ROAD_CACHE_DIR = os.path.join(tmp, "cache")
+        print(f"{'roads':>6} {'xodr KB':>8} {'parse_road ms':>14} {'first load ms':>14} {'pickle ms':>10} {'memory us':>10}")
+        for roads in args.roads:
+            path = os.path.join(tmp, f"synthetic_{roads}.xodr")
+            synthetic_xodr(path, roads)
+
+            legacy_ms = timed(lambda: parse_road(path))
+
+            road_model.clear_road_models()
+            for f in os.listdir(settings.ROAD_CACHE_DIR) if os.path.isdir(settings.ROAD_CACHE_DIR) else []:
+                os.remove(os.path.join(settings.ROAD_CACHE_DIR, f))
+            t0 = time.perf_counter()
+            model = road_model.load_road_model(path)
+            first_ms = (time.perf_counter() - t0) * 1000
+
+            def reload():
+                road_model.clear_road_models() # What a fresh worker process sees
+                road_model.load_road_model(path)
+            pickle_ms = timed(reload)
+
+            road_model.load_road_model(path)
+            memory_us = timed(lambda: road_model.load_road_model(path), repeat=50) * 1000
+
+            if model.to_road_dict() != parse_road(path)[1]:
+                print(f"  WARNING: RoadModel disagrees with parse_road for {roads} roads")
+            print(f"{roads:>6} {os.path.getsize(path) / 1024:>8.0f} {legacy_ms:>14.2f} {first_ms:>14.2f} {pickle_ms:>10.3f} {memory_us:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_roi_slicer.py
+"""
+Region of interest maps: road_helpers.slice_road (whole ElementTree, root.remove per road,
+new file every call) vs. roi_slicer (streamed with iterparse, cached per (map, ROI)).
+
+    python -m benchmarks.bench_roi_slicer
+    python -m benchmarks.bench_roi_slicer --roads 1000 10000 --radius 500
+
+Both keep the same roads: those within --radius of a point on road 0. "first" includes
+building the road index for a map the process has not seen; "slice" is the streamed
+write alone; "cached" is what every later compile with an Ego start nearby pays.
+"""
+import os
+import time
+import argparse
+import tempfile
+import xml.etree.ElementTree as ET
+
+from src.core.config import settings
+from src.generators import road_geometry, road_index, roi_slicer
+from src.generators.road_model import load_road_model
+from src.generators.road_helpers import slice_road
+from tests.conftest import synthetic_xodr
+
+def main():
+    parser = argparse.ArgumentParser(description="ROI map slicing benchmark")
+    parser.add_argument("--roads", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--radius", type=float, default=300.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.ROAD_CACHE_DIR = os.path.join(tmp, "roads")
+        settings.ROI_CACHE_DIR = os.path.join(tmp, "roi")
+        print(f"{'roads':>6} {'map KB':>7} {'kept':>5} {'ROI KB':>7} {'slice_road ms':>14} {'first ms':>9} {'slice ms':>9} {'cached us':>10}")
+        for roads in args.roads:
+            path = os.path.join(tmp, f"synthetic_{roads}.xodr")
+            synthetic_xodr(path, roads)
+            model = load_road_model(path)
+            x, y, _ = road_geometry.lane_to_world(model, 0, 30.0, -1)
+            center = (float(x[0]), float(y[0]))
+
+            t0 = time.perf_counter()
+            out = roi_slicer.load_roi_map(path, center, args.radius, required=(0,))
+            first_ms = (time.perf_counter() - t0) * 1000
+            _, _, radius = roi_slicer.roi(center, args.radius)
+            keep = [int(r) for r in road_index.load_road_index(path).within_radius(roi_slicer.roi(center)[:2], radius, junctions=True)]
+
+            t0 = time.perf_counter()
+            slice_road(ET.parse(path), keep, os.path.join(tmp, "legacy.xodr"))
+            legacy_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            roi_slicer.slice_xodr(path, keep, os.path.join(tmp, "streamed.xodr"))
+            slice_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            for _ in range(1000):
+                roi_slicer.load_roi_map(path, center, args.radius, required=(0,))
+            cached_us = (time.perf_counter() - t0) * 1000
+
+            print(f"{roads:>6} {os.path.getsize(path) / 1024:>7.0f} {len(keep):>5} {os.path.getsize(out) / 1024:>7.0f} "
+                  f"{legacy_ms:>14.1f} {first_ms:>9.1f} {slice_ms:>9.1f} {cached_us:>10.1f}")
+
+if __name__ == "__main__":
+    main()
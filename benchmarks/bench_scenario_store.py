@@ -0,0 +1,65 @@
+# benchmarks/bench_scenario_store.py
+"""
+ScenarioStore cost per compression setting: put (first write and dedup hit), get, size at rest.
+
+    python -m benchmarks.bench_scenario_store
+    python -m benchmarks.bench_scenario_store --vehicles 1000 --count 50
+
+Scenarios are real compiler output (synthetic dense traffic, see bench_compile), each made
+unique by a different Ego speed. "zstd" is skipped when zstandard is not installed.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from src.generators import scenario_compiler
+from src.generators.scenario_compiler import ScenarioCompiler
+from src.core import scenario_store
+from src.core.scenario_store import ScenarioStore, COMPRESSIONS
+from benchmarks.bench_compile import synthetic_positions, dense_blueprint
+
+def scenarios(count: int, vehicles: int) -> list:
+    scenario_compiler.get_vehicle_positions = synthetic_positions(vehicles)
+    compiler = ScenarioCompiler()
+    out = []
+    for i in range(count):
+        blueprint = dense_blueprint()
+        blueprint["actors"] = [dict(blueprint["actors"][0], speed=60 + i)] + blueprint["actors"][1:]
+        out.append(compiler.compile_to_bytes(blueprint, seed=i))
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description="Scenario store benchmark")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--vehicles", type=int, default=200)
+    args = parser.parse_args()
+
+    data = scenarios(args.count, args.vehicles)
+    raw = sum(len(d) for d in data)
+    print(f"{args.count} scenarios, {raw / 1024:.0f} KB raw")
+    print(f"{'compression':<12} {'put ms':>8} {'dedup ms':>9} {'get ms':>8} {'KB at rest':>11} {'ratio':>6}")
+    for compression in COMPRESSIONS:
+        if compression == "zstd" and scenario_store.zstandard is None:
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ScenarioStore(tmp, compression=compression)
+            t0 = time.perf_counter()
+            digests = [store.put(d) for d in data]
+            t1 = time.perf_counter()
+            for d in data:
+                store.put(d)
+            t2 = time.perf_counter()
+            for digest in digests:
+                store.get(digest)
+            t3 = time.perf_counter()
+            at_rest = store.stats()["bytes"]
+            store.close()
+        n = len(data)
+        print(f"{compression:<12} {(t1 - t0) / n * 1000:>8.2f} {(t2 - t1) / n * 1000:>9.2f} {(t3 - t2) / n * 1000:>8.2f} "
+              f"{at_rest / 1024:>11.0f} {raw / at_rest:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start benchmark for the API.
+Each measurement runs in a fresh interpreter so import caches don't hide regressions.
+
+    python -m benchmarks.bench_startup            # 5 runs each
+    python -m benchmarks.bench_startup --runs 10
+
+Uses the offline "mock" LLM backend, so no API key or network is needed.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Executed in a child interpreter; prints one JSON line of timings
+PROBE = r"""
+import time, json, asyncio
+t0 = time.perf_counter()
+import main
+t_import = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+main.services.startup(warmup={warmup})
+t_startup = time.perf_counter() - t0
+
+async def first_request():
+    pipeline = main.services.pipeline
+    t0 = time.perf_counter()
+    blueprint = await pipeline.generate_blueprint("A car cuts in front of the ego vehicle", "low")
+    path = await pipeline.compile(blueprint, output_name="_bench_startup.xosc")
+    elapsed = time.perf_counter() - t0
+    import os
+    if os.path.exists(path):
+        os.remove(path)
+    return elapsed
+
+t_first = asyncio.run(first_request())
+print(json.dumps({{"import": t_import, "startup": t_startup, "first_request": t_first}}))
+"""
+
+def run_probe(warmup: bool) -> dict:
+    env = dict(
+        os.environ,
+        LLM_BACKENDS="mock",
+        GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "bench"),
+        # Caches would turn the "first request" into a lookup after the first run
+        BLUEPRINT_CACHE_ENABLED="false",
+        SEMANTIC_CACHE_ENABLED="false",
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(warmup=warmup)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def summarize(label: str, samples: list):
+    print(f"\n{label}")
+    for key in ("import", "startup", "first_request"):
+        values = [s[key] * 1000 for s in samples]
+        print(f"  {key:<14} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+    total = [(s["import"] + s["startup"] + s["first_request"]) * 1000 for s in samples]
+    print(f"  {'total':<14} median {statistics.median(total):8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for warmup in (False, True):
+        samples = [run_probe(warmup) for _ in range(args.runs)]
+        summarize(f"warm-up {'on' if warmup else 'off'} ({args.runs} runs)", samples)
+
+if __name__ == "__main__":
+    main()
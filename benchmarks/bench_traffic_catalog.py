@@ -0,0 +1,54 @@
+# benchmarks/bench_traffic_catalog.py
+"""
+Dense-traffic scenarios with inline <Vehicle>s vs. <CatalogReference>s (TRAFFIC_CATALOG).
+
+    python -m benchmarks.bench_traffic_catalog
+    python -m benchmarks.bench_traffic_catalog --counts 200 2000 --runs 5
+
+Reports median compile_to_bytes time and output size per backend. Uses the synthetic
+traffic generator from bench_compile; the generated catalog goes to a temp OUTPUT_DIR.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+
+from src.core.config import settings
+from src.generators import scenario_compiler
+from src.generators.scenario_compiler import ScenarioCompiler, BACKENDS
+from benchmarks.bench_compile import synthetic_positions, dense_blueprint
+
+def measure(compiler: ScenarioCompiler, backend: str, runs: int):
+    times = []
+    for _ in range(runs):
+        random.seed(0)
+        t0 = time.perf_counter()
+        data = compiler.compile_to_bytes(dense_blueprint(), backend=backend)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), len(data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline vs. catalog-referenced traffic benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    compilers = {False: ScenarioCompiler(traffic_catalog=False), True: ScenarioCompiler(traffic_catalog=True)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.OUTPUT_DIR = tmp
+        print(f"{'vehicles':>8} {'backend':<8} {'entities':<8} {'time ms':>10} {'file KB':>10}")
+        for count in args.counts:
+            scenario_compiler.get_vehicle_positions = synthetic_positions(count)
+            for backend in BACKENDS:
+                for catalog, compiler in compilers.items():
+                    compiler.compile_to_bytes(dense_blueprint(), backend=backend) # Warm templates / catalog
+                    ms, size = measure(compiler, backend, args.runs)
+                    print(f"{count:>8} {backend:<8} {'catalog' if catalog else 'inline':<8} {ms:>10.1f} {size / 1024:>10.1f}")
+
+if __name__ == "__main__":
+    main()
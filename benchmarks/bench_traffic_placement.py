@@ -0,0 +1,89 @@
+# benchmarks/bench_traffic_placement.py
+"""
+Background traffic placement: the old per-slot loop of get_vehicle_positions (global
+random, dict of dicts) vs. sample_vehicle_positions (numpy Generator, all slots at once,
+TrafficLayout columns), on the same cached RoadModel.
+
+    python -m benchmarks.bench_traffic_placement
+    python -m benchmarks.bench_traffic_placement --roads 2000 --density 2 8
+
+Both draw from the same distributions; the check compares vehicle counts averaged over
+seeds, and that one seed always gives the same layout.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import numpy as np
+
+from src.core.config import settings
+from src.generators.road_model import load_road_model
+from src.generators.generate_traffic import sample_vehicle_positions
+from tests.conftest import synthetic_xodr
+
+VEHICLES = [{"name": "car_white", "length": 4.2}, {"name": "car_blue", "length": 4.5},
+            {"name": "car_red", "length": 4.6}, {"name": "car_yellow", "length": 5.0}]
+
+def legacy_positions(roadfile, ego_pos: tuple, density: float, rng=random) -> dict:
+    """ get_vehicle_positions before vectorizing (vehicle types passed in instead of read from a catalog). """
+    positions = {}
+    ego_s, _, ego_lid, ego_rid = ego_pos
+    car_density = int(100/density)
+    i = 0
+    for road_id, section_length, lane_ids in load_road_model(roadfile).roads():
+        for lane_id in lane_ids:
+            for s in range(0, int(section_length), car_density):
+                target_type = VEHICLES[int(rng.uniform(0, len(VEHICLES)-1))]
+                target_length = target_type["length"]
+                min_sample = s + target_length
+                if car_density > section_length:
+                    continue
+                s_noise = rng.uniform(min_sample, min_sample + car_density - target_length)
+                if (ego_s - target_length < s_noise < ego_s + target_length) and lane_id == ego_lid and road_id == ego_rid:
+                    continue
+                if s_noise > section_length - target_length or s_noise < target_length:
+                    continue
+                positions[i] = {"position": (s_noise, 0, lane_id, road_id), "catalog_name": target_type["name"]}
+                i += 1
+    return positions
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic placement benchmark")
+    parser.add_argument("--roads", type=int, default=500)
+    parser.add_argument("--density", type=float, nargs="+", default=[2.0, 8.0])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.ROAD_CACHE_DIR = ""
+        path = os.path.join(tmp, "synthetic.xodr")
+        synthetic_xodr(path, args.roads)
+        load_road_model(path)
+        ego = (50.0, 0, -1, 0)
+
+        print(f"{'cars/100m':>9} {'vehicles':>9} {'loop ms':>9} {'vectorized ms':>14} {'speedup':>8} {'+ to_dict ms':>13}")
+        for density in args.density:
+            layout = sample_vehicle_positions(path, ego, density, seed=0, vehicles=VEHICLES)
+            loop_ms = timed(lambda: legacy_positions(path, ego, density, random.Random(0)))
+            vector_ms = timed(lambda: sample_vehicle_positions(path, ego, density, seed=0, vehicles=VEHICLES))
+            dict_ms = timed(lambda: sample_vehicle_positions(path, ego, density, seed=0, vehicles=VEHICLES).to_dict())
+            print(f"{density:>9.1f} {len(layout):>9} {loop_ms:>9.1f} {vector_ms:>14.2f} {loop_ms / vector_ms:>7.0f}x {dict_ms:>13.1f}")
+
+            again = sample_vehicle_positions(path, ego, density, seed=0, vehicles=VEHICLES)
+            if not np.array_equal(layout.positions, again.positions):
+                print("  WARNING: same seed, different layout")
+            old = np.mean([len(legacy_positions(path, ego, density, random.Random(i))) for i in range(5)])
+            new = np.mean([len(sample_vehicle_positions(path, ego, density, seed=i, vehicles=VEHICLES)) for i in range(5)])
+            if abs(old - new) > 0.02 * old:
+                print(f"  WARNING: mean vehicle count {new:.0f} vs {old:.0f} for the loop")
+
+if __name__ == "__main__":
+    main()
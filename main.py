@@ -1,76 +1,65 @@
 import os
+import io
 import json
+import asyncio
 import logging
+import zipfile
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 import uvicorn
 
-from src.generators.llm_service import GroqLlmService
-from src.generators.scenario_compiler import ScenarioCompiler
-from src.core.knowledge_graph import KnowledgeGraph
+# Heavy dependencies (groq, scenariogeneration, numpy...) are imported lazily by the service container
+from src.generators.pipeline import BlueprintGenerationError
+from src.generators.scenario_parameters import esmini_args
+from src.core.services import ServiceContainer
+from src.core.concurrency import GenerationLimiter, QueueFullError
+from src.core.jobs import JobManager, JobStatus
+from src.core.scenario_store import scenario_hash
 from src.core.config import settings
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("API")
 
-# Initialize App & Services
-app = FastAPI(title="Neuro-Symbolic Scenario Fuzzer API")
+# Shared Services (built in the lifespan, or on first use)
+services = ServiceContainer()
+limiter = GenerationLimiter(settings.MAX_CONCURRENT_GENERATIONS, settings.GENERATION_QUEUE_SIZE)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services.startup()
+    job_manager.start()
+    retention = asyncio.create_task(services.run_store_retention())
+    yield
+    retention.cancel()
+    await job_manager.stop()
+    await services.shutdown()
+
+# Initialize App
+app = FastAPI(title="Neuro-Symbolic Scenario Fuzzer API", lifespan=lifespan)
 
 # Mount Static Folder for UI
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Global Service Instances
-llm_service = GroqLlmService()
-compiler = ScenarioCompiler()
-kg = KnowledgeGraph(db_dir="chroma_db")
-
 # --- Request Model ---
 class ScenarioRequest(BaseModel):
     prompt: str
     traffic_density: Optional[str] = "low"
 
-# --- Helper Functions ---
-def extract_json_from_text(text):
-    """ Robust Stack-Based JSON Extractor (Same as run_aiscenario.py) """
-    try:
-        start_index = text.find('{')
-        if start_index == -1: return None
-        brace_count = 0
-        in_string = False
-        escape = False
-        for i, char in enumerate(text[start_index:], start=start_index):
-            if char == '"' and not escape: in_string = not in_string
-            elif char == '\\' and in_string: escape = not escape; continue
-            elif not in_string:
-                if char == '{': brace_count += 1
-                elif char == '}': 
-                    brace_count -= 1
-                    if brace_count == 0: return text[start_index : i+1]
-            if escape: escape = False
-        return None
-    except Exception: return None
-
-def validate_blueprint(blueprint):
-    """ 
-    Safety check for the API. 
-    Ensures the LLM didn't forget required fields like 'type'.
-    """
-    if "actors" not in blueprint: blueprint["actors"] = []
-    if "actions" not in blueprint: blueprint["actions"] = []
-    
-    valid_actions = []
-    for action in blueprint["actions"]:
-        if "type" in action:
-            valid_actions.append(action)
-        else:
-            logger.warning(f"Skipping malformed action (missing 'type'): {action}")
-            
-    blueprint["actions"] = valid_actions
-    return blueprint
+class BatchScenarioRequest(BaseModel):
+    items: List[ScenarioRequest]
+
+class ScenarioFamilyRequest(BaseModel):
+    blueprints: List[dict]                  # blueprints[0] is compiled, the rest only contribute values
+    parameters: Optional[List[str]] = None  # Fields to parameterize (default: scenario_parameters.DEFAULT_PARAMETER_FIELDS)
+
+class ThresholdUpdate(BaseModel):
+    threshold: float
 
 # --- API Endpoints ---
 
@@ -78,105 +67,284 @@ def validate_blueprint(blueprint):
 async def read_index():
     return FileResponse('static/index.html')
 
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "services": services.stats(),
+        "generation": limiter.stats(),
+        "llm": services.llm_service.stats(),
+        "pipeline": services.pipeline.stats(),
+        "blueprint_cache": services.blueprint_cache.stats() if services.blueprint_cache else None,
+        "semantic_cache": services.semantic_cache.stats() if services.semantic_cache else None,
+        "scenario_store": services.scenario_store.stats() if services.scenario_store else None,
+        "rate_limiter": services.rate_limiter.stats(),
+        "jobs": job_manager.stats(),
+    }
+
+@app.get("/scenarios/{digest}")
+async def get_stored_scenario(digest: str):
+    """ Download a previously generated scenario by its X-Scenario-Hash. """
+    store = services.scenario_store
+    if not store:
+        raise HTTPException(status_code=404, detail="Scenario store is disabled.")
+    data = await asyncio.to_thread(store.get, digest)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Scenario not found.")
+    return Response(
+        content=data,
+        media_type="application/xml",
+        headers={"Content-Disposition": f'attachment; filename="scenario_{digest[:16]}.xosc"'},
+    )
+
+@app.get("/semantic-cache")
+async def semantic_cache_stats():
+    semantic_cache = services.semantic_cache
+    if not semantic_cache:
+        raise HTTPException(status_code=404, detail="Semantic cache is disabled.")
+    return semantic_cache.stats()
+
+@app.put("/semantic-cache/threshold")
+async def set_semantic_threshold(update: ThresholdUpdate):
+    semantic_cache = services.semantic_cache
+    if not semantic_cache:
+        raise HTTPException(status_code=404, detail="Semantic cache is disabled.")
+    try:
+        semantic_cache.set_threshold(update.threshold)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return semantic_cache.stats()
+
 @app.post("/generate-scenario")
 async def generate_scenario(request: ScenarioRequest):
-    user_requirement = request.prompt
-    logger.info(f"Received Request: {user_requirement}")
+    logger.info(f"Received Request: {request.prompt}")
+    try:
+        async with limiter.slot():
+            return await _run_pipeline(request)
+    except QueueFullError as e:
+        logger.warning(f"Rejecting request: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly.")
+
+def _counter_headers(counters: dict) -> dict:
+    """ Per-request LLM accounting as response headers, e.g. X-Llm-Calls: 1 """
+    return {"X-" + key.replace("_", "-").title(): str(value) for key, value in counters.items()}
+
+def _iter_chunks(data: bytes, chunk_size: int = 64 * 1024):
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
 
+async def _run_pipeline(request: ScenarioRequest):
     try:
-        # 1. KNOWLEDGE GRAPH RETRIEVAL (Logic from run_aiscenario.py)
-        # Determine Map Context
-        if "highway:" in user_requirement.lower(): map_key = "highway"
-        elif "city:" in user_requirement.lower(): map_key = "city"
-        else:
-            selected_map_data = kg.get_map_context(user_requirement)
-            map_key = "city" if selected_map_data["speed_limit"] == 50 else "highway"
-
-        # Rules from KG
-        context_prompt = kg.get_llm_system_prompt_context(user_requirement)
-        
-        # PROMPT CONSTRUCTION
-        schema_template = """
-        {
-          "map_key": "highway",
-          "traffic_density": "low",
-          "actors": [
-            {"name": "Ego", "type": "car", "lane": -2, "s": 0, "speed": 100},
-            {"name": "Target", "type": "car", "lane": -3, "s": 0, "speed": 130}
-          ],
-          "actions": [
-            { "type": "lane_change", "actor": "Target", "target_lane": -2, "trigger_time": 5.0, "duration": 2.0 },
-            { "type": "brake", "actor": "Ego", "target_speed": 60, "trigger_dist": 15, "trigger_entity": "Target" }
-          ]
-        }
-        """
-
-        full_prompt = f"""
-        You are an AI Scenario Architect.
-        
-        ### REQUEST ###
-        "{user_requirement}"
-        
-        ### KNOWLEDGE GRAPH RULES (MUST FOLLOW) ###
-        {context_prompt}
-        
-        ### INSTRUCTIONS ###
-        1. Read the "PHYSICS & LOGIC RULES" above carefully.
-        2. If the user asks for a Cut-In, ensure the Aggressor is FASTER and starts BEHIND or PARALLEL to the victim.
-        3. Set "traffic_density" to "{request.traffic_density}".
-        4. Output ONLY valid JSON matching the schema below.
-        
-        ### SCHEMA ###
-        {schema_template}
-        """
-
-        #LLM GENERATION (With Retry Logic)
-        blueprint = None
-        for attempt in range(3):
-            raw_response = llm_service.generate_code(user_prompt=full_prompt)
-            json_str = extract_json_from_text(raw_response)
-            
-            if json_str:
-                try:
-                    blueprint = json.loads(json_str)
-                    blueprint["map_key"] = map_key # Enforce map consistency
-                    
-                    # API Specific: Validate to prevent server crash
-                    blueprint = validate_blueprint(blueprint)
-                    break
-                except json.JSONDecodeError:
-                    continue
-        
-        if not blueprint:
-            raise HTTPException(status_code=500, detail="LLM failed to generate valid JSON scenario.")
-
-        # COMPILATION
-        # Generate a unique filename for the user
-        output_filename = f"scenario_{os.urandom(4).hex()}.xosc"
-        
-        # Ensure output directory exists
-        if not os.path.exists("outputs"):
-            os.makedirs("outputs")
-            
-        # Compile
-        xosc_path = compiler.compile(blueprint, output_name=output_filename)
-
-        if not os.path.exists(xosc_path):
-            raise HTTPException(status_code=500, detail="Compiler failed to write XOSC file.")
-
-        # RETURN FILE (Do not run Esmini here, just download)
-        return FileResponse(
-            path=xosc_path, 
-            filename=output_filename, 
-            media_type='application/xml'
+        counters = services.pipeline.new_counters()
+        blueprint = await services.pipeline.generate_blueprint(request.prompt, request.traffic_density, counters=counters)
+
+        # COMPILATION (in memory, no disk round trip; skipped if the scenario store has it)
+        xosc_bytes, store_key, from_store = await services.pipeline.compile_or_load(blueprint)
+        digest = scenario_hash(xosc_bytes)
+        output_filename = f"scenario_{digest[:16]}.xosc"
+
+        # Optional copy on disk, written asynchronously once the response is sent
+        background = None
+        if settings.PERSIST_SCENARIOS and not from_store:
+            background = BackgroundTask(services.pipeline.save_scenario, xosc_bytes, output_filename, store_key)
+
+        # STREAM BACK (Do not run Esmini here, just download)
+        headers = _counter_headers(counters)
+        headers["Content-Disposition"] = f'attachment; filename="{output_filename}"'
+        headers["Content-Length"] = str(len(xosc_bytes))
+        headers["X-Scenario-Hash"] = digest
+        headers["X-Scenario-Store"] = "hit" if from_store else "miss"
+        return StreamingResponse(
+            _iter_chunks(xosc_bytes),
+            media_type='application/xml',
+            headers=headers,
+            background=background,
         )
 
+    except BlueprintGenerationError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Pipeline Error: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+@app.post("/generate-scenarios")
+async def generate_scenarios(request: BatchScenarioRequest):
+    """
+    Batch generation for fuzzing campaigns.
+    LLM calls fan out concurrently under the shared rate limiter, compiles run on the
+    compile pool, and everything comes back as one zip with a manifest of per-item status.
+    """
+    if not request.items:
+        raise HTTPException(status_code=422, detail="Batch is empty.")
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Batch exceeds {settings.BATCH_MAX_ITEMS} items.")
+
+    logger.info(f"Received Batch: {len(request.items)} scenarios")
+    try:
+        async with limiter.slot():
+            results = await _run_batch(request.items)
+    except QueueFullError as e:
+        logger.warning(f"Rejecting batch: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly.")
+
+    # Package everything into one archive
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            xosc_bytes = result.pop("data", None)
+            if xosc_bytes:
+                archive.writestr(result["file"], xosc_bytes)
+        archive.writestr("manifest.json", json.dumps(results, indent=2))
+
+    return Response(
+        content=buffer.getvalue(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="scenarios.zip"'},
+    )
+
+async def _run_batch(items: List[ScenarioRequest]) -> list:
+    fan_out = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+    async def run_item(index: int, item: ScenarioRequest) -> dict:
+        counters = services.pipeline.new_counters()
+        result = {"index": index, "prompt": item.prompt, "traffic_density": item.traffic_density, "counters": counters}
+        async with fan_out:
+            try:
+                blueprint = await services.pipeline.generate_blueprint(item.prompt, item.traffic_density, counters=counters)
+                output_filename = f"scenario_{index:04d}.xosc"
+                xosc_bytes, store_key, from_store = await services.pipeline.compile_or_load(blueprint)
+                if settings.PERSIST_SCENARIOS and not from_store:
+                    await services.pipeline.save_scenario(xosc_bytes, f"batch_{os.urandom(4).hex()}_{output_filename}", store_key)
+                result.update(status="ok", file=output_filename, hash=scenario_hash(xosc_bytes), data=xosc_bytes)
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {e}")
+                result.update(status="error", error=str(e))
+        return result
+
+    return await asyncio.gather(*(run_item(i, item) for i, item in enumerate(items)))
+
+@app.post("/scenario-family")
+async def scenario_family(request: ScenarioFamilyRequest):
+    """
+    Fuzz sweeps: compiles a family of blueprints that only differ in numbers into ONE
+    .xosc with ParameterDeclarations, plus variants.json holding each variant's values
+    (and the matching `esmini --param` arguments).
+    """
+    if not request.blueprints:
+        raise HTTPException(status_code=422, detail="Family is empty.")
+    if len(request.blueprints) > settings.FAMILY_MAX_VARIANTS:
+        raise HTTPException(status_code=422, detail=f"Family exceeds {settings.FAMILY_MAX_VARIANTS} variants.")
+
+    try:
+        xosc_bytes, overrides = await services.pipeline.compile_family(request.blueprints, parameters=request.parameters or True)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid scenario family: {e}")
+
+    variants = [{"index": i, "parameters": values, "esmini_args": esmini_args(values)} for i, values in enumerate(overrides)]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("family.xosc", xosc_bytes)
+        archive.writestr("variants.json", json.dumps(variants, indent=2))
+
+    return Response(
+        content=buffer.getvalue(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="scenario_family.zip"'},
+    )
+
+# --- Job API (non-blocking generation) ---
+
+async def _run_job(job):
+    """ Worker-side pipeline for a single job, reporting progress as it goes. """
+    request = ScenarioRequest(**job.payload)
+    blueprint = await services.pipeline.generate_blueprint(
+        request.prompt, request.traffic_density,
+        progress=lambda stage, percent: job.update(stage=stage, progress=percent),
+        counters=job.counters,
+    )
+    job.update(stage="compiling", progress=85)
+    xosc_bytes, store_key, from_store = await services.pipeline.compile_or_load(blueprint)
+    digest = scenario_hash(xosc_bytes)
+    job.result_name = f"scenario_{digest[:16]}.xosc"
+    # Results are fetched later from another request, so jobs always persist:
+    # into the scenario store (served by digest, shared with /generate-scenario) or OUTPUT_DIR
+    if services.scenario_store:
+        if not from_store:
+            await services.pipeline.save_scenario(xosc_bytes, job.result_name, store_key)
+        job.result_digest = digest
+    else:
+        job.result_path = await services.pipeline.persist(xosc_bytes, f"scenario_{job.id}.xosc")
+
+job_manager = JobManager(
+    _run_job,
+    workers=settings.JOB_WORKERS,
+    max_queued=settings.JOB_QUEUE_SIZE,
+    ttl_seconds=settings.JOB_TTL_SECONDS,
+)
+
+def _get_job_or_404(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: ScenarioRequest):
+    logger.info(f"Received Job: {request.prompt}")
+    try:
+        job = job_manager.submit(request.model_dump())
+    except QueueFullError as e:
+        logger.warning(f"Rejecting job: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly.")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return _get_job_or_404(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """ Server-Sent Events stream of job progress; closes once the job finishes. """
+    job = _get_job_or_404(job_id)
+
+    async def event_stream():
+        version = -1
+        while True:
+            if job.version != version:
+                version = job.version
+                yield f"data: {json.dumps(job.to_dict())}\n\n"
+                if job.is_finished:
+                    return
+            else:
+                yield ": keep-alive\n\n" # Stops proxies from closing an idle connection
+            await job.wait_for_change(version, timeout=15)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = _get_job_or_404(job_id)
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error or "Job failed.")
+    if job.status != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Job is not finished (stage: {job.stage}).")
+    if job.result_digest and services.scenario_store:
+        data = await asyncio.to_thread(services.scenario_store.get, job.result_digest)
+        if data is not None:
+            return Response(
+                content=data,
+                media_type="application/xml",
+                headers={"Content-Disposition": f'attachment; filename="{job.result_name}"', "X-Scenario-Hash": job.result_digest},
+            )
+    elif job.result_path and os.path.exists(job.result_path):
+        return FileResponse(path=job.result_path, filename=job.result_name, media_type='application/xml')
+    raise HTTPException(status_code=410, detail="Job result is no longer available.")
+
 if __name__ == "__main__":
     import uvicorn
     # Runs the server locally on port 8000
@@ -11,30 +11,11 @@ import re
 from src.generators.llm_service import GroqLlmService 
 from src.generators.scenario_compiler import ScenarioCompiler
 from src.core.knowledge_graph import KnowledgeGraph
+from src.core.json_utils import extract_json_from_text
 from src.core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 
-def extract_json_from_text(text):
-    """ Robust JSON Extractor (Stack Method) """
-    try:
-        start_index = text.find('{')
-        if start_index == -1: return None
-        brace_count = 0
-        in_string = False
-        escape = False
-        for i, char in enumerate(text[start_index:], start=start_index):
-            if char == '"' and not escape: in_string = not in_string
-            elif char == '\\' and in_string: escape = not escape; continue
-            elif not in_string:
-                if char == '{': brace_count += 1
-                elif char == '}': 
-                    brace_count -= 1
-                    if brace_count == 0: return text[start_index : i+1]
-            if escape: escape = False
-        return None
-    except Exception: return None
-
 async def main():
     # INIT
     llm = GroqLlmService()
@@ -94,7 +75,7 @@ async def main():
     # GENERATE & COMPILE
     print("\nAI: Designing Scenario based on KG Rules...")
     try:
-        raw_response = llm.generate_code(user_prompt=full_prompt)
+        raw_response = llm.generate_json_stream(user_prompt=full_prompt)
         json_str = extract_json_from_text(raw_response)
         
         if not json_str:
@@ -0,0 +1,104 @@
+# src/core/blueprint.py
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, List
+from pydantic import TypeAdapter, ConfigDict, with_config #type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Typed intermediate representation of an LLM blueprint.
+# Parsed once (JSON -> slotted dataclasses in a single pydantic-core pass), with every
+# default resolved here, so the compiler and other consumers just read attributes.
+
+SPEED_ACTIONS = ("brake", "speed_change", "accelerate", "decelerate", "stop")
+
+# Per action type defaults (previously scattered through ScenarioCompiler.compile)
+ACTION_DEFAULTS = {
+    "traffic_light": {"id": "1", "state": "red", "trigger_time": 0.0},
+    "lane_change": {"target_lane": -1, "duration": 3.0, "trigger_time": 2.0, "trigger_dist": 20.0},
+    "cross_street": {"trigger_entity": "Ego", "trigger_dist": 30.0},
+    **{t: {"target_speed": 0.0, "duration": 5.0, "trigger_time": 5.0} for t in SPEED_ACTIONS},
+}
+
+# LLMs sometimes emit ids / names as numbers
+IR_CONFIG = ConfigDict(coerce_numbers_to_str=True)
+
+@with_config(IR_CONFIG)
+@dataclass(slots=True)
+class Actor:
+    name: str
+    type: str = "car"
+    lane: Optional[int] = None   # None = first driving lane of the map
+    s: float = 0.0
+    speed: float = 30.0          # km/h
+    offset: float = 0.0
+
+@with_config(IR_CONFIG)
+@dataclass(slots=True)
+class Action:
+    type: Optional[str] = None   # Actions without a type are dropped by Blueprint
+    actor: Optional[str] = None  # None = first actor
+    trigger_time: Optional[float] = None
+    trigger_dist: Optional[float] = None
+    trigger_entity: Optional[str] = None
+    duration: Optional[float] = None
+    target_speed: Optional[float] = None  # km/h
+    target_lane: Optional[int] = None
+    id: Optional[str] = None
+    state: Optional[str] = None
+
+    def __post_init__(self):
+        for name, value in ACTION_DEFAULTS.get(self.type, {}).items():
+            if getattr(self, name) is None:
+                setattr(self, name, value)
+        if self.type == "stop":
+            self.target_speed = 0.0
+
+@with_config(IR_CONFIG)
+@dataclass(slots=True)
+class Blueprint:
+    actors: List[Actor] = field(default_factory=list)
+    actions: List[Action] = field(default_factory=list)
+    map_key: str = "city"
+    traffic_density: Optional[str] = None
+    scenario_type: Optional[str] = None
+
+    def __post_init__(self):
+        valid_actions = []
+        for action in self.actions:
+            if action.type:
+                valid_actions.append(action)
+            else:
+                logger.warning(f"Skipping malformed action (missing 'type'): {action}")
+        self.actions = valid_actions
+
+        if self.actors:
+            first_actor_name = self.actors[0].name
+            for action in self.actions:
+                if action.actor is None:
+                    action.actor = first_actor_name
+
+    def to_dict(self) -> dict:
+        """ Plain JSON-ready dict (caches, manifests, LLM few-shots). """
+        return BLUEPRINT_ADAPTER.dump_python(self, exclude_none=True)
+
+BLUEPRINT_ADAPTER = TypeAdapter(Blueprint)
+BLUEPRINT_LIST_ADAPTER = TypeAdapter(List[Blueprint])
+
+def parse_blueprint_json(text) -> Blueprint:
+    """
+    JSON text/bytes -> Blueprint, decoding and validating in one pass.
+    Raises pydantic.ValidationError (a ValueError); see `is_json_syntax_error`.
+    """
+    return BLUEPRINT_ADAPTER.validate_json(text)
+
+def parse_blueprint(data) -> Blueprint:
+    """ dict -> Blueprint (an existing Blueprint is returned as is). """
+    if isinstance(data, Blueprint):
+        return data
+    return BLUEPRINT_ADAPTER.validate_python(data)
+
+def is_json_syntax_error(error: Exception) -> bool:
+    """ True if parsing failed because the text isn't JSON (worth repairing), not because of the schema. """
+    errors = getattr(error, "errors", None)
+    return bool(errors) and all(e["type"] == "json_invalid" for e in errors())
@@ -0,0 +1,120 @@
+# src/core/blueprint_cache.py
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class BlueprintCache:
+    """
+    Persistent cache of validated LLM blueprints (SQLite backend).
+    - Key: normalized prompt + traffic density + map key + hash of the KG context.
+    - Eviction: entries older than `ttl_seconds` expire, and once `max_entries`
+      is exceeded the least recently used entries are dropped.
+    Survives restarts, so repeated prompts skip the LLM entirely.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 1000, ttl_seconds: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS blueprints (
+                   key TEXT PRIMARY KEY,
+                   blueprint TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON blueprints(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Lower-case and collapse whitespace so trivial edits map to the same key."""
+        return re.sub(r"\s+", " ", prompt.strip().lower())
+
+    @classmethod
+    def make_key(cls, prompt: str, traffic_density: str, map_key: str, kg_context: str) -> str:
+        context_hash = hashlib.sha256(kg_context.encode("utf-8")).hexdigest()
+        raw = json.dumps([cls.normalize_prompt(prompt), traffic_density, map_key, context_hash])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Returns the cached blueprint dict, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT blueprint, created_at FROM blueprints WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            blueprint_json, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM blueprints WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE blueprints SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(blueprint_json)
+
+    def put(self, key: str, blueprint: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blueprints (key, blueprint, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(blueprint), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        # 1. TTL: drop everything expired
+        self._conn.execute("DELETE FROM blueprints WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        # 2. LRU: trim to the size cap
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM blueprints").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM blueprints WHERE key IN (SELECT key FROM blueprints ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            logger.debug(f"Blueprint cache evicted {overflow} LRU entries.")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM blueprints")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM blueprints").fetchone()
+        return {
+            "entries": count,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,63 @@
+# src/core/concurrency.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(RuntimeError):
+    """Raised when more requests are waiting for a generation slot than the queue allows."""
+    pass
+
+class GenerationLimiter:
+    """
+    Caps how many generation pipelines run at once on this worker.
+    - Up to `max_concurrent` requests run (LLM + compile).
+    - Up to `max_queued` more wait in line for a free slot.
+    - Anything beyond that is rejected immediately instead of piling up.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.waiting >= self.max_queued:
+            raise QueueFullError(f"Generation queue is full ({self.waiting} waiting).")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+
+# Bounded pool for CPU-bound compile work, so it never runs on the event loop thread.
+compile_executor = ThreadPoolExecutor(max_workers=settings.COMPILE_WORKERS, thread_name_prefix="compile")
+
+async def run_in_compile_pool(func, *args, **kwargs):
+    """
+    Runs a blocking callable (e.g. ScenarioCompiler.compile) on the compile pool and awaits the result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(compile_executor, lambda: func(*args, **kwargs))
@@ -12,9 +12,74 @@ class Settings(BaseSettings):
     ESMINI_BIN_PATH: str = "C:/tools/esmini-demo/bin/esmini.exe" # Or ./bin/esmini on Linux
     OUTPUT_DIR: str = os.path.join(os.getcwd(), "data", "scenarios")
     LOG_DIR: str = os.path.join(os.getcwd(), "data", "logs")
+    PERSIST_SCENARIOS: bool = True        # Also keep a copy of each streamed .xosc (scenario store or OUTPUT_DIR, written after the response)
+
+    # Concurrency (per uvicorn worker)
+    MAX_CONCURRENT_GENERATIONS: int = 4   # In-flight LLM + compile pipelines
+    GENERATION_QUEUE_SIZE: int = 32       # Requests allowed to wait for a slot before we answer 503
+    COMPILE_WORKERS: int = 2              # Threads running ScenarioCompiler.compile off the event loop
+    COMPILE_PROCESSES: int = 0            # Process pool size for ScenarioCompiler.compile_many (0 = one per CPU core)
+    COMPILER_BACKEND: str = "xosc"        # "xosc" (object graph, pretty printed) or "stream" (lxml incremental writer)
+    ACTION_TIMING: bool = False           # Time each action handler (per type totals in /health -> services.actions)
+    TRAFFIC_DENSITY: float = 2.0          # Background cars per 100 m of lane when traffic_density="high"
+    TRAFFIC_MIN_GAP: float = 15.0         # Min distance (m) between a background car and a primary actor on the same lane
+    TRAFFIC_CATALOG: bool = False         # Background cars as CatalogReferences (smaller files) instead of inline Vehicles
+    TRAFFIC_CATALOG_DIR: str = ""         # Shared VehicleCatalog dir to reference; "" = generate one under OUTPUT_DIR/catalogs
+    TRAFFIC_CATALOG_NAME: str = "TrafficVehicleCatalog"  # Catalog name used in the CatalogReferences
+    ROAD_CACHE_DIR: str = os.path.join(os.getcwd(), "data", "cache", "roads")  # Pickled road models shared by processes ("" = memory only)
+    ROI_SLICING: bool = False             # Point RoadNetwork at a map cut down to the roads around the Ego start
+    ROI_RADIUS: float = 300.0             # Roads within this distance (m) of the Ego start are kept
+    ROI_SNAP: float = 50.0                # Ego starts in the same ROI_SNAP grid cell share one sliced map (0 = exact)
+    ROI_CACHE_DIR: str = os.path.join(os.getcwd(), "data", "cache", "roi")  # Sliced maps, one file per (map, ROI)
+
+    # Startup
+    WARMUP_ON_STARTUP: bool = False       # Precompile one scenario per map before serving (slower boot, fast first request)
+
+    # LLM
+    LLM_BACKENDS: str = "groq"                # Priority ordered, comma separated (e.g. "groq,mock"); see llm_pool.LLM_BACKENDS
+    LLM_HEDGE_AFTER_SECONDS: float = 8.0      # Start the next backend if the current one is this slow
+    MOCK_LLM_LATENCY_SECONDS: float = 0.0     # Simulated round trip for the offline "mock" backend
+    LLM_STREAMING: bool = True  # Stream completions and stop once the JSON blueprint closes
+    LLM_REQUESTS_PER_MINUTE: float = 30       # Provider quota (Groq llama-3.3-70b defaults)
+    LLM_TOKENS_PER_MINUTE: float = 12000
+    LLM_MAX_RATE_LIMIT_RETRIES: int = 5       # Retries after a 429 before giving up on an item
+    LLM_BACKOFF_INITIAL_SECONDS: float = 2.0
+    LLM_BACKOFF_MAX_SECONDS: float = 60.0
+    LLM_PROMPT_TOKEN_BUDGET: int = 3000       # Max prompt tokens (static prefix + request + KG context)
+    LLM_FRAGMENT_REPAIR: bool = True          # If local JSON repair fails, ask the LLM to fix just the fragment
+
+    # Batch Generation
+    BATCH_MAX_ITEMS: int = 500
+    BATCH_CONCURRENCY: int = 8                # Items in flight at once within one batch
+    FAMILY_MAX_VARIANTS: int = 10000          # POST /scenario-family (variants are not compiled, only parameter values)
+
+    # Job API (POST /jobs)
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_SIZE: int = 100
+    JOB_TTL_SECONDS: float = 3600             # How long finished jobs (and their files) stay downloadable
+
+    # Scenario Store (content addressed copies of generated .xosc files)
+    SCENARIO_STORE_ENABLED: bool = True       # False = PERSIST_SCENARIOS writes loose files into OUTPUT_DIR
+    SCENARIO_STORE_DIR: str = os.path.join(os.getcwd(), "data", "store")
+    SCENARIO_STORE_COMPRESSION: str = "gzip"  # "none", "gzip" or "zstd" (needs the zstandard package)
+    SCENARIO_STORE_MAX_BYTES: int = 2 * 1024**3
+    SCENARIO_STORE_MAX_AGE_SECONDS: float = 30 * 24 * 3600  # Scenarios not stored or read for this long are dropped
+    SCENARIO_STORE_RETENTION_INTERVAL_SECONDS: float = 600  # How often the background retention sweep runs
+
+    # Blueprint Cache (skips the LLM for repeated prompts)
+    BLUEPRINT_CACHE_ENABLED: bool = True
+    BLUEPRINT_CACHE_PATH: str = os.path.join(os.getcwd(), "data", "cache", "blueprints.sqlite3")
+    BLUEPRINT_CACHE_MAX_ENTRIES: int = 1000
+    BLUEPRINT_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+
+    # Semantic Cache (reuses blueprints of paraphrased prompts)
+    SEMANTIC_CACHE_ENABLED: bool = False  # Needs sentence-transformers; the embedding model is loaded at startup
+    SEMANTIC_CACHE_PATH: str = os.path.join(os.getcwd(), "data", "cache", "semantic.sqlite3")
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Cosine similarity; higher = fewer hits, more diverse scenarios
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 5000
 
     class Config:
         env_file = ".env"
 
 # Singleton instance
-settings = Settings()
\ No newline at end of file
+settings = Settings()
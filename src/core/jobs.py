@@ -0,0 +1,156 @@
+# src/core/jobs.py
+import os
+import time
+import asyncio
+import logging
+from src.core.concurrency import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    TERMINAL = (DONE, FAILED)
+
+class Job:
+    """
+    One generation request tracked from submission to download.
+    `stage` / `progress` are updated by the pipeline as it moves along.
+    """
+
+    def __init__(self, job_id: str, payload: dict):
+        self.id = job_id
+        self.payload = payload
+        self.status = JobStatus.QUEUED
+        self.stage = "queued"
+        self.progress = 0
+        self.error = None
+        self.result_path = None    # Loose file in OUTPUT_DIR (scenario store disabled)
+        self.result_digest = None  # Scenario store hash (scenario store enabled)
+        self.result_name = None
+        self.counters = {}
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.version = 0
+        self._changed = asyncio.Event()
+
+    def update(self, stage: str = None, progress: int = None, status: str = None):
+        if stage is not None: self.stage = stage
+        if progress is not None: self.progress = progress
+        if status is not None: self.status = status
+        self.updated_at = time.time()
+        self.version += 1
+        # Wake every listener, then re-arm for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, version: int, timeout: float):
+        """Returns as soon as the job moves past `version`, or after `timeout` seconds."""
+        if self.version != version:
+            return
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in JobStatus.TERMINAL
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "counters": self.counters,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "result_url": f"/jobs/{self.id}/result" if self.status == JobStatus.DONE else None,
+            "result_hash": self.result_digest,
+        }
+
+class JobManager:
+    """
+    In-process job queue with a fixed pool of worker tasks.
+    - `submit()` returns immediately with a Job (the HTTP connection is freed).
+    - Workers call `handler(job)`, which runs the pipeline and reports progress via `job.update`.
+    - Finished jobs are kept for `ttl_seconds` so results can be downloaded, then dropped
+      by a sweeper task (loose result files with them; stored scenarios follow the store's retention).
+    """
+
+    def __init__(self, handler, workers: int = 4, max_queued: int = 100, ttl_seconds: float = 3600, sweep_seconds: float = None):
+        self.handler = handler
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self.sweep_seconds = min(max(ttl_seconds / 4, 1.0), 60.0) if sweep_seconds is None else sweep_seconds
+        self.jobs = {}
+        self._queue = asyncio.Queue(maxsize=max_queued)
+        self._tasks = []
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+        logger.info(f"Job manager started with {self.workers} workers.")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, payload: dict) -> Job:
+        self.start()
+        self._evict_expired()
+        job = Job(os.urandom(8).hex(), payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self._queue.qsize()} waiting).")
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                job.update(stage="starting", progress=5, status=JobStatus.RUNNING)
+                await self.handler(job)
+                job.update(stage="done", progress=100, status=JobStatus.DONE)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.update(stage="failed", status=JobStatus.FAILED)
+            finally:
+                self._queue.task_done()
+
+    async def _sweeper(self):
+        # Expired jobs go even when nothing new is submitted
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            self._evict_expired()
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [j.id for j in self.jobs.values() if j.is_finished and j.updated_at < cutoff]:
+            job = self.jobs.pop(job_id)
+            if job.result_path and os.path.exists(job.result_path):
+                os.remove(job.result_path)
+
+    def stats(self) -> dict:
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.workers, "queued": self._queue.qsize(), "jobs": counts}
@@ -0,0 +1,226 @@
+# src/core/json_utils.py
+# Shared JSON helpers for LLM output (used by main.py and run_aiscenario.py)
+import json
+from typing import Optional
+
+def extract_json_from_text(text):
+    """ Robust Stack-Based JSON Extractor: returns the first complete top-level {...} object. """
+    try:
+        extractor = IncrementalJsonExtractor()
+        return extractor.feed(text)
+    except Exception: return None
+
+class IncrementalJsonExtractor:
+    """
+    Stack-based JSON extractor that can be fed a token stream chunk by chunk.
+
+    Tracks brace depth (ignoring braces inside strings) and returns the first
+    complete top-level object as soon as its closing brace arrives, so the
+    caller can cancel the stream instead of waiting for trailing prose.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self.started = False
+        self.complete = False
+        self.result: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Consumes the next chunk. Returns the JSON string once the top-level
+        object has closed, otherwise None.
+        """
+        if self.complete or not chunk:
+            return self.result
+
+        start = 0
+        if not self.started:
+            start = chunk.find('{')
+            if start == -1: return None
+            self.started = True
+
+        for i in range(start, len(chunk)):
+            char = chunk[i]
+            if self._escape:
+                self._escape = False
+            elif self._in_string:
+                if char == '\\': self._escape = True
+                elif char == '"': self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start : i+1])
+                    self.result = "".join(self._parts)
+                    self.complete = True
+                    return self.result
+
+        self._parts.append(chunk[start:])
+        return None
+
+    @property
+    def partial(self) -> str:
+        """Everything captured so far (useful if the stream ends before the object closes)."""
+        return self.result if self.complete else "".join(self._parts)
+
+# Python-style literals models sometimes emit
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+
+def _last_token_index(out: list, end: int = None) -> int:
+    """Index of the last non-whitespace token in `out[:end]`, or -1. Scans in place, no slice copy."""
+    for idx in range((len(out) if end is None else end) - 1, -1, -1):
+        if not out[idx].isspace():
+            return idx
+    return -1
+
+def _drop_trailing_comma(out: list):
+    idx = _last_token_index(out)
+    if idx >= 0 and out[idx] == ",":
+        del out[idx:]
+
+def _insert_missing_comma(out: list, stack: list):
+    """ Adds the comma between two members / elements when the model forgot it ({"a": 1 "b": 2}). """
+    idx = _last_token_index(out)
+    if idx < 0 or not stack:
+        return
+    last = out[idx]
+    if last in ('}', ']') or last in _LITERALS.values() or last[0] in '-0123456789':
+        ends_value = True
+    elif last.startswith('"'):
+        # A string ends a value in an array, or in an object when it follows a colon (not a key)
+        prev = _last_token_index(out, idx)
+        ends_value = stack[-1] == ']' or (prev >= 0 and out[prev] == ':')
+    else:
+        ends_value = False
+    if ends_value:
+        out.insert(idx + 1, ',')
+
+def _repair_number(token: str) -> str:
+    """ Number as the model wrote it -> valid JSON: +1 -> 1, .5 -> 0.5, 5. -> 5.0, 1e -> 1, lone - -> null. """
+    sign = '-' if token.startswith('-') else ''
+    body = token.lstrip('+-')
+    if body.startswith('.'):
+        body = '0' + body
+    mantissa, e, exponent = body.partition('e') if 'e' in body else body.partition('E')
+    if mantissa.endswith('.'):
+        mantissa += '0'
+    if not exponent.lstrip('+-').isdigit():
+        e, exponent = '', '' # Dangling exponent (truncated 1e / 1e-)
+    number = sign + mantissa + e + exponent
+    try:
+        json.loads(number)
+        return number
+    except ValueError:
+        return 'null' # Nothing number-like left (a dangling "-" or "." on its own)
+
+def repair_json(text: str) -> str:
+    """
+    Tolerant single-pass cleanup of almost-JSON from an LLM.
+    Fixes: // # /* */ comments, single-quoted strings, unquoted keys and bare words,
+    Python True/False/None, trailing and missing commas, sloppy numbers (+1, .5, 5.,
+    a dangling -), and truncated output (unterminated string, dangling key/comma,
+    missing closing brackets).
+    Everything after the top-level object closes is dropped.
+    Returns the repaired text; the caller still has to json.loads it.
+    """
+    start = text.find('{')
+    if start == -1:
+        return text
+    text = text[start:]
+
+    out = []
+    stack = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+
+        # STRINGS (double or single quoted) -> always emitted double quoted
+        if c == '"' or c == "'":
+            _insert_missing_comma(out, stack)
+            quote = c
+            buf = []
+            j = i + 1
+            while j < n:
+                ch = text[j]
+                if ch == '\\' and j + 1 < n:
+                    nxt = text[j + 1]
+                    buf.append("'" if (quote == "'" and nxt == "'") else ch + nxt)
+                    j += 2
+                    continue
+                if ch == quote:
+                    break
+                if ch == '"':
+                    buf.append('\\"') # Only reachable inside single quotes
+                elif ch == '\n':
+                    buf.append('\\n')
+                else:
+                    buf.append(ch)
+                j += 1
+            out.append('"' + "".join(buf) + '"') # Also closes a string cut off by truncation
+            i = j + 1
+            continue
+
+        # COMMENTS
+        if c == '/' and text.startswith('//', i) or c == '#':
+            end = text.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if c == '/' and text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+
+        # STRUCTURE
+        if c in '{[':
+            _insert_missing_comma(out, stack)
+            stack.append('}' if c == '{' else ']')
+            out.append(c)
+        elif c in '}]':
+            if stack:
+                _drop_trailing_comma(out)
+                out.append(stack.pop()) # Use the expected closer even if the model mixed them up
+                if not stack:
+                    break # Top-level object done, ignore trailing prose
+        elif c.isdigit() or c in '-+.':
+            # NUMBERS (consumed whole so exponents like 1.5e2 are not mistaken for words)
+            j = i + 1
+            while j < n and (text[j].isdigit() or text[j] in '.eE+-'):
+                j += 1
+            _insert_missing_comma(out, stack)
+            out.append(_repair_number(text[i:j]))
+            i = j
+            continue
+        elif c.isalpha() or c == '_':
+            # BARE WORDS: literals pass through, anything else (unquoted keys/values) gets quoted
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in '_-.'):
+                j += 1
+            word = text[i:j]
+            _insert_missing_comma(out, stack)
+            out.append(_LITERALS.get(word, json.dumps(word)))
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    # TRUNCATION: tidy the tail and close whatever is still open
+    if stack:
+        idx = _last_token_index(out)
+        if idx >= 0 and out[idx] == ':':
+            out.append('null')
+        elif idx >= 0 and out[idx].startswith('"') and stack[-1] == '}':
+            prev = _last_token_index(out, idx)
+            if prev >= 0 and out[prev] in ('{', ','):
+                del out[prev + 1 if out[prev] == '{' else prev:] # Dangling key without a value
+        while stack:
+            _drop_trailing_comma(out)
+            out.append(stack.pop())
+
+    return "".join(out)
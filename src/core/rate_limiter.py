@@ -0,0 +1,80 @@
+# src/core/rate_limiter.py
+import time
+import asyncio
+import logging
+from src.core.token_usage import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+class ProviderRateLimitError(RuntimeError):
+    """Raised by LLM backends when the provider answers 429. `retry_after` is in seconds, if known."""
+    def __init__(self, message: str = "Provider rate limit hit", retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Async token bucket.
+    Refills at `rate` tokens per second up to `capacity`; callers await `acquire(n)`
+    until n tokens are available. `pause(seconds)` blocks every caller (used after a 429).
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self, tokens: float = 1.0):
+        # Never ask for more than the bucket can ever hold
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+class LlmRateLimiter:
+    """
+    Provider quota guard: one bucket for requests/minute and one for tokens/minute,
+    matching how Groq enforces its limits.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute / 60.0, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+        self.throttled = 0
+
+    async def acquire(self, prompt: str, completion_tokens: int = 800):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimate_tokens(prompt) + completion_tokens)
+
+    def backoff(self, seconds: float):
+        """Called on a 429: stop everyone, not just the caller that got rejected."""
+        self.throttled += 1
+        logger.warning(f"Rate limited by provider, pausing LLM calls for {seconds:.1f}s.")
+        self.requests.pause(seconds)
+        self.tokens.pause(seconds)
+
+    def stats(self) -> dict:
+        return {
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,223 @@
+# src/core/scenario_store.py
+import os
+import re
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard # Optional: only needed for compression="zstd"
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+SUFFIXES = {"none": ".xosc", "gzip": ".xosc.gz", "zstd": ".xosc.zst"}
+
+# FileHeader date changes on every compile; it is not part of the scenario's identity
+_HEADER_DATE = re.compile(rb'(<FileHeader\b[^>]*?)\sdate="[^"]*"')
+
+def scenario_hash(data: bytes) -> str:
+    """ sha256 of the canonical XML (the scenario minus its generation timestamp). """
+    return hashlib.sha256(_HEADER_DATE.sub(rb"\1", data, count=1)).hexdigest()
+
+class ScenarioStore:
+    """
+    Content-addressed store of compiled scenarios.
+    - Files live in sharded dirs: <root>/ab/cd/<sha256>.xosc[.gz|.zst], identical XML is stored once.
+    - A SQLite index keeps size / timestamps per object, plus `aliases`: blueprint key -> hash,
+      so a blueprint compiled before can be served without recompiling.
+    - `enforce_retention()` drops objects not stored or read for `max_age_seconds`, then least
+      recently used ones until the store fits in `max_bytes`. Run it periodically (see services).
+    """
+
+    def __init__(self, root: str, compression: str = "gzip", max_bytes: int = 2 * 1024**3,
+                 max_age_seconds: float = 30 * 24 * 3600):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}' (expected one of {COMPRESSIONS}).")
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, scenario store falls back to gzip.")
+            compression = "gzip"
+        self.root = root
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS objects (
+                   digest TEXT PRIMARY KEY,
+                   path TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   raw_size INTEGER NOT NULL,
+                   created_at REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS aliases (
+                   key TEXT PRIMARY KEY,
+                   digest TEXT NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_objects_last_access ON objects(last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_aliases_digest ON aliases(digest)")
+        self._conn.commit()
+
+    @staticmethod
+    def blueprint_key(blueprint: dict, **options) -> str:
+        """ Key of a blueprint's canonical form plus whatever compile options change the output. """
+        raw = json.dumps([blueprint, options], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _relative_path(self, digest: str) -> str:
+        return os.path.join(digest[:2], digest[2:4], digest + SUFFIXES[self.compression])
+
+    def _encode(self, data: bytes) -> bytes:
+        if self.compression == "gzip":
+            return gzip.compress(data, compresslevel=6)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return data
+
+    @staticmethod
+    def _decode(path: str, data: bytes) -> bytes:
+        # By suffix, so objects written under an earlier compression setting stay readable
+        if path.endswith(".gz"):
+            return gzip.decompress(data)
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError(f"{path} is zstd compressed but zstandard is not installed.")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    def put(self, data: bytes, key: str = None) -> str:
+        """ Stores `data` (if not already there) and returns its hash; `key` becomes an alias of it. """
+        digest = scenario_hash(data)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM objects WHERE digest = ?", (digest,)).fetchone()
+            if row is not None and os.path.exists(os.path.join(self.root, row[0])):
+                self.deduplicated += 1
+                self._conn.execute("UPDATE objects SET last_access = ? WHERE digest = ?", (now, digest))
+            else:
+                relative_path = self._relative_path(digest)
+                full_path = os.path.join(self.root, relative_path)
+                encoded = self._encode(data)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                tmp_path = f"{full_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(encoded)
+                os.replace(tmp_path, full_path)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO objects (digest, path, size, raw_size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, relative_path, len(encoded), len(data), now, now),
+                )
+            if key:
+                self._conn.execute("INSERT OR REPLACE INTO aliases (key, digest) VALUES (?, ?)", (key, digest))
+            self._conn.commit()
+        return digest
+
+    def get(self, digest: str):
+        """ -> the scenario bytes (decompressed), or None. """
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM objects WHERE digest = ?", (digest,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE objects SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            self._conn.commit()
+        full_path = os.path.join(self.root, row[0])
+        try:
+            with open(full_path, "rb") as f:
+                data = self._decode(full_path, f.read())
+        except FileNotFoundError:
+            # Deleted behind our back: forget it so the next put writes it again
+            with self._lock:
+                self._drop([digest])
+                self._conn.commit()
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def lookup(self, key: str):
+        """ blueprint key -> hash of the scenario it compiled to, or None. """
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM aliases WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_by_key(self, key: str):
+        digest = self.lookup(key)
+        if digest is None:
+            self.misses += 1
+            return None
+        return self.get(digest)
+
+    def _drop(self, digests: list):
+        for digest in digests:
+            row = self._conn.execute("SELECT path FROM objects WHERE digest = ?", (digest,)).fetchone()
+            if row:
+                try:
+                    os.remove(os.path.join(self.root, row[0]))
+                except FileNotFoundError:
+                    pass
+            self._conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+            self._conn.execute("DELETE FROM aliases WHERE digest = ?", (digest,))
+
+    def enforce_retention(self) -> int:
+        """ Age, then size (LRU) eviction; returns the number of scenarios removed. """
+        now = time.time()
+        with self._lock:
+            # 1. AGE: by last use, a scenario that keeps being compiled / served stays
+            expired = [d for (d,) in self._conn.execute("SELECT digest FROM objects WHERE last_access < ?", (now - self.max_age_seconds,))]
+            self._drop(expired)
+
+            # 2. SIZE: drop least recently used until under the cap
+            (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()
+            evicted = []
+            if total > self.max_bytes:
+                for digest, size in self._conn.execute("SELECT digest, size FROM objects ORDER BY last_access ASC").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append(digest)
+                    total -= size
+                self._drop(evicted)
+            self._conn.commit()
+
+        if expired or evicted:
+            logger.info(f"Scenario store retention: {len(expired)} expired, {len(evicted)} evicted for size.")
+        return len(expired) + len(evicted)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size, raw_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0) FROM objects"
+            ).fetchone()
+            (aliases,) = self._conn.execute("SELECT COUNT(*) FROM aliases").fetchone()
+        return {
+            "entries": count,
+            "aliases": aliases,
+            "bytes": size,
+            "raw_bytes": raw_size,
+            "compression": self.compression,
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "deduplicated": self.deduplicated,
+        }
@@ -0,0 +1,180 @@
+# src/core/semantic_cache.py
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Same model ingest_data.py uses for the knowledge base
+EMBEDDING_MODEL = "all-mpnet-base-v2"
+
+class SemanticBlueprintCache:
+    """
+    Near-duplicate prompt cache.
+    Embeds each prompt and reuses the blueprint of the most similar previously
+    validated prompt if the cosine similarity is above `threshold`.
+
+    Lookups are scoped: a blueprint is only reused for the same traffic density,
+    map key and KG context, so paraphrases never leak rules between maneuvers.
+    Raising the threshold trades latency (fewer hits) for diversity (more fresh LLM output).
+    """
+
+    def __init__(self, db_path: str, threshold: float = 0.92, max_entries: int = 5000, model_name: str = EMBEDDING_MODEL):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._model = None
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock() # Separate: lookups must not wait for the model download
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS semantic_blueprints (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   scope TEXT NOT NULL,
+                   prompt TEXT NOT NULL,
+                   embedding BLOB NOT NULL,
+                   blueprint TEXT NOT NULL
+               )"""
+        )
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        """Pulls the stored embeddings into one in-memory matrix for fast dot-product search."""
+        rows = self._conn.execute(
+            "SELECT id, scope, embedding, blueprint FROM semantic_blueprints ORDER BY id DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()[::-1]
+        # Row buffers grown geometrically up to max_entries; the first `_count` rows are live.
+        # Once full they are a ring: `_oldest` is the slot the next add overwrites.
+        self._matrix = None
+        self._ids = self._scopes = self._blueprints = np.empty(0, dtype=object)
+        self._count = self._oldest = 0
+        if rows:
+            self._reserve(len(rows), len(rows[0][2]) // 4)
+            self._matrix[:len(rows)] = [np.frombuffer(r[2], dtype=np.float32) for r in rows]
+            self._ids[:len(rows)] = [r[0] for r in rows]
+            self._scopes[:len(rows)] = [r[1] for r in rows]
+            self._blueprints[:len(rows)] = [r[3] for r in rows]
+            self._count = len(rows)
+        logger.info(f"Semantic cache loaded {len(rows)} entries.")
+
+    def _reserve(self, size: int, dim: int):
+        capacity = 0 if self._matrix is None else len(self._matrix)
+        if size <= capacity:
+            return
+        capacity = min(max(2 * capacity, size, 64), max(self.max_entries, size))
+        matrix = np.empty((capacity, dim), dtype=np.float32)
+        ids, scopes, blueprints = np.empty(capacity, dtype=np.int64), np.empty(capacity, dtype=object), np.empty(capacity, dtype=object)
+        n = self._count
+        if n:
+            matrix[:n], ids[:n], scopes[:n], blueprints[:n] = self._matrix[:n], self._ids[:n], self._scopes[:n], self._blueprints[:n]
+        self._matrix, self._ids, self._scopes, self._blueprints = matrix, ids, scopes, blueprints
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                # Checked again under the lock: concurrent first requests load the model once
+                if self._model is None:
+                    # Heavy import, only paid on first use
+                    from sentence_transformers import SentenceTransformer
+                    logger.info(f"Loading embedding model {self.model_name}...")
+                    self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def load_model(self):
+        """ Loads the embedding model now (startup) instead of on the first request. """
+        self._get_model()
+
+    def embed(self, prompt: str) -> np.ndarray:
+        vec = self._get_model().encode(prompt, normalize_embeddings=True)
+        return np.asarray(vec, dtype=np.float32)
+
+    @staticmethod
+    def make_scope(traffic_density: str, map_key: str, kg_context: str) -> str:
+        context_hash = hashlib.sha256(kg_context.encode("utf-8")).hexdigest()
+        return f"{traffic_density}|{map_key}|{context_hash}"
+
+    def lookup(self, embedding: np.ndarray, scope: str):
+        """
+        Returns (blueprint, similarity) for the best match in `scope`,
+        or (None, best_similarity) if nothing clears the threshold.
+        """
+        with self._lock:
+            if not self._count:
+                self.misses += 1
+                return None, 0.0
+
+            mask = self._scopes[:self._count] == scope
+            if not mask.any():
+                self.misses += 1
+                return None, 0.0
+
+            candidates = np.flatnonzero(mask)
+            sims = self._matrix[candidates] @ embedding
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None, similarity
+
+            self.hits += 1
+            blueprint_json = self._blueprints[candidates[best]]
+
+        return json.loads(blueprint_json), similarity
+
+    def add(self, prompt: str, embedding: np.ndarray, scope: str, blueprint: dict):
+        blueprint_json = json.dumps(blueprint)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO semantic_blueprints (scope, prompt, embedding, blueprint) VALUES (?, ?, ?, ?)",
+                (scope, prompt, embedding.tobytes(), blueprint_json),
+            )
+            if self.max_entries <= 0: # Keeps nothing
+                self._conn.execute("DELETE FROM semantic_blueprints WHERE id <= ?", (cur.lastrowid,))
+                self._conn.commit()
+                return
+            if self._count < self.max_entries:
+                slot = self._count
+                self._reserve(slot + 1, len(embedding))
+                self._count += 1
+            else:
+                # Full: the new entry replaces the oldest one, keeping the newest `max_entries`
+                slot = self._oldest
+                self._oldest = (slot + 1) % self.max_entries
+                self._conn.execute("DELETE FROM semantic_blueprints WHERE id <= ?", (int(self._ids[slot]),))
+            self._matrix[slot] = embedding
+            self._ids[slot] = cur.lastrowid
+            self._scopes[slot] = scope
+            self._blueprints[slot] = blueprint_json
+            self._conn.commit()
+
+    def set_threshold(self, threshold: float):
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError("Similarity threshold must be between 0 and 1.")
+        self.threshold = threshold
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._count,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,196 @@
+# src/core/services.py
+import os
+import time
+import asyncio
+import logging
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Small canned blueprint per map, compiled once at startup so the first real request is warm
+WARMUP_BLUEPRINTS = {
+    "highway": {
+        "map_key": "highway",
+        "actors": [
+            {"name": "Ego", "type": "car", "lane": -2, "s": 50, "speed": 100},
+            {"name": "Target", "type": "car", "lane": -3, "s": 35, "speed": 130}
+        ],
+        "actions": [
+            {"type": "lane_change", "actor": "Target", "target_lane": -2, "trigger_time": 4.0, "duration": 2.0}
+        ]
+    },
+    "city": {
+        "map_key": "city",
+        "actors": [
+            {"name": "Ego", "type": "car", "lane": -1, "s": 10, "speed": 40}
+        ],
+        "actions": [
+            {"type": "traffic_light", "id": "1", "state": "red", "trigger_time": 2.0}
+        ]
+    },
+}
+
+class ServiceContainer:
+    """
+    One place that owns every long-lived service of the API.
+    - Nothing is built at import time; each service (and its heavy imports such as
+      groq, scenariogeneration, numpy) is created on first access.
+    - A single KnowledgeGraph is shared by the pipeline and the compiler.
+    - `startup()` / `shutdown()` are driven by the FastAPI lifespan.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self.startup_timings = {}
+
+    def _get(self, name: str, factory):
+        if name not in self._instances:
+            started = time.perf_counter()
+            self._instances[name] = factory()
+            self.startup_timings[name] = round(time.perf_counter() - started, 4)
+        return self._instances[name]
+
+    @property
+    def kg(self):
+        def build():
+            from src.core.knowledge_graph import KnowledgeGraph
+            return KnowledgeGraph(db_dir="chroma_db")
+        return self._get("kg", build)
+
+    @property
+    def compiler(self):
+        def build():
+            from src.generators.scenario_compiler import ScenarioCompiler
+            return ScenarioCompiler(kg=self.kg)
+        return self._get("compiler", build)
+
+    @property
+    def llm_service(self):
+        def build():
+            from src.generators.llm_pool import create_llm_service
+            return create_llm_service(settings.LLM_BACKENDS)
+        return self._get("llm_service", build)
+
+    @property
+    def blueprint_cache(self):
+        def build():
+            if not settings.BLUEPRINT_CACHE_ENABLED:
+                return None
+            from src.core.blueprint_cache import BlueprintCache
+            return BlueprintCache(
+                settings.BLUEPRINT_CACHE_PATH,
+                max_entries=settings.BLUEPRINT_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.BLUEPRINT_CACHE_TTL_SECONDS,
+            )
+        return self._get("blueprint_cache", build)
+
+    @property
+    def semantic_cache(self):
+        def build():
+            if not settings.SEMANTIC_CACHE_ENABLED:
+                return None
+            from src.core.semantic_cache import SemanticBlueprintCache
+            return SemanticBlueprintCache(
+                settings.SEMANTIC_CACHE_PATH,
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            )
+        return self._get("semantic_cache", build)
+
+    @property
+    def scenario_store(self):
+        def build():
+            if not settings.SCENARIO_STORE_ENABLED:
+                return None
+            from src.core.scenario_store import ScenarioStore
+            return ScenarioStore(
+                settings.SCENARIO_STORE_DIR,
+                compression=settings.SCENARIO_STORE_COMPRESSION,
+                max_bytes=settings.SCENARIO_STORE_MAX_BYTES,
+                max_age_seconds=settings.SCENARIO_STORE_MAX_AGE_SECONDS,
+            )
+        return self._get("scenario_store", build)
+
+    @property
+    def rate_limiter(self):
+        def build():
+            from src.core.rate_limiter import LlmRateLimiter
+            return LlmRateLimiter(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+        return self._get("rate_limiter", build)
+
+    @property
+    def pipeline(self):
+        def build():
+            from src.generators.pipeline import ScenarioPipeline
+            return ScenarioPipeline(
+                self.llm_service, self.compiler, self.kg,
+                blueprint_cache=self.blueprint_cache,
+                semantic_cache=self.semantic_cache,
+                rate_limiter=self.rate_limiter,
+                scenario_store=self.scenario_store,
+            )
+        return self._get("pipeline", build)
+
+    def startup(self, warmup: bool = None):
+        """ Builds the full service graph; optionally warms the compiler (see `warm_up`). """
+        started = time.perf_counter()
+        self.pipeline # Pulls in every dependency
+        if self.semantic_cache:
+            self.load_embedding_model()
+        if settings.WARMUP_ON_STARTUP if warmup is None else warmup:
+            self.warm_up()
+        self.startup_timings["total"] = round(time.perf_counter() - started, 4)
+        logger.info(f"Services ready in {self.startup_timings['total']}s: {self.startup_timings}")
+
+    def load_embedding_model(self):
+        """ The semantic cache's model takes seconds to load; do it before serving, not in the first request. """
+        started = time.perf_counter()
+        try:
+            self.semantic_cache.load_model()
+        except Exception as e:
+            logger.warning(f"Could not load the semantic cache embedding model, semantic lookups will fail: {e}")
+        self.startup_timings["embedding_model"] = round(time.perf_counter() - started, 4)
+
+    def warm_up(self):
+        """
+        Compiles one small scenario per map (then deletes it) so lazy imports,
+        map resolution and the OpenSCENARIO writer are hot before the first request.
+        """
+        started = time.perf_counter()
+        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+        for map_key, blueprint in WARMUP_BLUEPRINTS.items():
+            try:
+                path = self.compiler.compile(blueprint, output_name=f"_warmup_{map_key}.xosc")
+                if os.path.exists(path):
+                    os.remove(path)
+            except Exception as e:
+                logger.warning(f"Warm-up compile for '{map_key}' failed: {e}")
+        self.startup_timings["warm_up"] = round(time.perf_counter() - started, 4)
+
+    async def run_store_retention(self):
+        """ Background task (started by the lifespan): age/size eviction of the scenario store. """
+        while True:
+            store = self.scenario_store
+            if store is None:
+                return
+            try:
+                await asyncio.to_thread(store.enforce_retention)
+            except Exception as e:
+                logger.warning(f"Scenario store retention failed: {e}")
+            await asyncio.sleep(settings.SCENARIO_STORE_RETENTION_INTERVAL_SECONDS)
+
+    async def shutdown(self):
+        from src.generators.compile_pool import shutdown_pools
+        shutdown_pools()
+        for name in ("blueprint_cache", "semantic_cache", "scenario_store"):
+            cache = self._instances.get(name)
+            if cache:
+                cache.close()
+        self._instances.clear()
+
+    def stats(self) -> dict:
+        stats = {"built": sorted(self._instances), "startup_seconds": self.startup_timings}
+        if "compiler" in self._instances:
+            from src.generators.atomic_behaviors import action_handler_stats
+            stats["actions"] = action_handler_stats()
+        return stats
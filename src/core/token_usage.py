@@ -0,0 +1,30 @@
+# src/core/token_usage.py
+# Per-request LLM token accounting.
+# The pipeline opens a `track_usage(counters)` scope; every backend call made inside it
+# (including hedged calls on other tasks, which inherit the context) adds to the same counters.
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_counters = ContextVar("llm_usage_counters", default=None)
+
+def estimate_tokens(text: str) -> int:
+    """ ~4 characters per token; close enough for budgeting when the provider gives no usage. """
+    return (len(text) + 3) // 4 if text else 0
+
+@contextmanager
+def track_usage(counters: dict):
+    token = _current_counters.set(counters)
+    try:
+        yield counters
+    finally:
+        _current_counters.reset(token)
+
+def record_usage(prompt_tokens: int, completion_tokens: int, estimated: bool = False):
+    """ Called by LLM backends after each call. No-op outside a track_usage scope. """
+    counters = _current_counters.get()
+    if counters is None:
+        return
+    counters["prompt_tokens"] = counters.get("prompt_tokens", 0) + (prompt_tokens or 0)
+    counters["completion_tokens"] = counters.get("completion_tokens", 0) + (completion_tokens or 0)
+    if estimated:
+        counters["estimated_usage_calls"] = counters.get("estimated_usage_calls", 0) + 1
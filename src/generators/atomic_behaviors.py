@@ -1,6 +1,11 @@
 # src/generators/atomic_behaviors.py
-# This file was only used for testing purpose to see what happens as if the sceanrio was generated by behaviors using specific classes
+# Maneuver building blocks.
+# The *Maneuver classes below were written to test composing scenarios from behaviors;
+# the ActionHandler subclasses at the bottom are what ScenarioCompiler dispatches blueprint actions to.
+import abc
+import time
 from scenariogeneration import xosc
+from src.core.blueprint import SPEED_ACTIONS
 
 class AtomicBehavior:
     """Base class for all maneuvers"""
@@ -134,4 +139,156 @@ class KeepSpeedManeuver(AtomicBehavior):
         trigger = xosc.ValueTrigger(f"{actor_name}_StartTrigger", 0, xosc.ConditionEdge.none, xosc.SimulationTimeCondition(0, xosc.Rule.greaterThan))
         event.add_trigger(trigger)
         maneuver.add_event(event)
-        return maneuver
\ No newline at end of file
+        return maneuver
+
+# --- ACTION HANDLERS ---
+# One handler instance per blueprint action type, looked up by ScenarioCompiler in a dict.
+# Adding a maneuver = subclassing ActionHandler + @register_action; other types are unaffected.
+
+ACTION_HANDLERS = {}
+
+def register_action(cls):
+    """ Class decorator: one instance per entry of `cls.action_types`, so stats are per type. """
+    for action_type in cls.action_types:
+        ACTION_HANDLERS[action_type] = cls(action_type)
+    return cls
+
+def get_action_handler(action_type: str):
+    """ -> the registered handler, or None for an unknown type (the action is skipped). """
+    return ACTION_HANDLERS.get(action_type)
+
+def action_handler_stats() -> dict:
+    """ {action type: {"calls", "seconds"}} for the types that were compiled at least once. """
+    return {t: h.stats() for t, h in ACTION_HANDLERS.items() if h.calls}
+
+def reset_action_handler_stats():
+    for handler in ACTION_HANDLERS.values():
+        handler.calls, handler.seconds = 0, 0.0
+
+class ActionHandler(abc.ABC):
+    """
+    Turns one blueprint action into the xosc.Event of its maneuver.
+    Not an AtomicBehavior: handlers build one Event per action, the compiler owns the Maneuver.
+    `params` is the compile's ParameterBindings and `owner` its parameter prefix
+    (e.g. "TargetAct0"), so numeric fields can become $Parameters.
+    Counts calls always; wall time only when `timed` (settings.ACTION_TIMING).
+    """
+    action_types = ()
+
+    def __init__(self, action_type: str):
+        self.action_type = action_type
+        self.calls = 0
+        self.seconds = 0.0
+
+    @abc.abstractmethod
+    def build_event(self, action, actor_name: str, owner: str, params) -> xosc.Event:
+        ...
+
+    @abc.abstractmethod
+    def parameter_fields(self, action) -> tuple:
+        """ (field, value) pairs build_event binds for `action`, same order and units (see ScenarioCompiler.parameter_values). """
+        ...
+
+    def handle(self, action, actor_name: str, owner: str, params, timed: bool = False) -> xosc.Event:
+        self.calls += 1
+        if not timed:
+            return self.build_event(action, actor_name, owner, params)
+        started = time.perf_counter()
+        try:
+            return self.build_event(action, actor_name, owner, params)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "seconds": round(self.seconds, 6)}
+
+    @staticmethod
+    def _time_trigger(name: str, owner: str, action, params) -> xosc.ValueTrigger:
+        return xosc.ValueTrigger(name, 0, xosc.ConditionEdge.rising, xosc.SimulationTimeCondition(params.bind(owner, "trigger_time", action.trigger_time), xosc.Rule.greaterThan))
+
+@register_action
+class TrafficLightHandler(ActionHandler):
+    action_types = ("traffic_light",)
+
+    def build_event(self, action, actor_name, owner, params):
+        raw_state = action.state.lower()
+        esmini_state = "on;off;off"
+        if "green" in raw_state: esmini_state = "off;off;on"
+        elif "yellow" in raw_state: esmini_state = "off;on;off"
+        elif ";" in raw_state: esmini_state = raw_state
+
+        evt = xosc.Event("TLEvent", xosc.Priority.override)
+        evt.add_trigger(self._time_trigger("TLTrig", owner, action, params))
+        evt.add_action("TLAction", xosc.TrafficSignalStateAction(action.id, esmini_state))
+        return evt
+
+    def parameter_fields(self, action):
+        return (("trigger_time", action.trigger_time),)
+
+@register_action
+class LaneChangeHandler(ActionHandler):
+    action_types = ("lane_change",)
+
+    def build_event(self, action, actor_name, owner, params):
+        target_lane = params.bind(owner, "target_lane", action.target_lane)
+        duration = params.bind(owner, "duration", action.duration)
+        lc_action = xosc.AbsoluteLaneChangeAction(target_lane, xosc.TransitionDynamics(xosc.DynamicsShapes.sinusoidal, xosc.DynamicsDimension.time, duration))
+
+        if action.trigger_entity is not None:
+            dist = params.bind(owner, "trigger_dist", action.trigger_dist)
+            cond = xosc.RelativeDistanceCondition(dist, xosc.Rule.lessThan, entity=action.trigger_entity, dist_type=xosc.RelativeDistanceType.longitudinal, coordinate_system=xosc.CoordinateSystem.entity)
+            # Trigger entity is the ACTOR (Ego), triggered by proximity to TARGET
+            trig = xosc.EntityTrigger("LCTrig", 0, xosc.ConditionEdge.rising, cond, triggerentity=actor_name)
+        else:
+            trig = self._time_trigger("LCTrig", owner, action, params)
+
+        evt = xosc.Event("LCEvent", xosc.Priority.override)
+        evt.add_trigger(trig)
+        evt.add_action("LCAction", lc_action)
+        return evt
+
+    def parameter_fields(self, action):
+        trigger = ("trigger_dist", action.trigger_dist) if action.trigger_entity is not None else ("trigger_time", action.trigger_time)
+        return (("target_lane", action.target_lane), ("duration", action.duration), trigger)
+
+@register_action
+class CrossStreetHandler(ActionHandler):
+    action_types = ("cross_street",)
+    start_s = 50
+    duration = 5.0
+
+    def build_event(self, action, actor_name, owner, params):
+        traj_shape = xosc.Polyline([0.0, self.duration], [xosc.LanePosition(s=self.start_s, offset=-4, lane_id=-1, road_id=0), xosc.LanePosition(s=self.start_s, offset=4, lane_id=-1, road_id=0)])
+        traj = xosc.Trajectory("WalkPath", False)
+        traj.add_shape(traj_shape)
+        cross_action = xosc.FollowTrajectoryAction(traj, xosc.FollowingMode.position, xosc.ReferenceContext.relative, 1.0, 0.0)
+
+        target_ent = action.trigger_entity
+        cond = xosc.RelativeDistanceCondition(params.bind(owner, "trigger_dist", action.trigger_dist), xosc.Rule.lessThan, entity=target_ent, dist_type=xosc.RelativeDistanceType.longitudinal, coordinate_system=xosc.CoordinateSystem.entity)
+        trig = xosc.EntityTrigger("CrossTrig", 0, xosc.ConditionEdge.rising, cond, triggerentity=target_ent)
+
+        evt = xosc.Event("CrossEvent", xosc.Priority.override)
+        evt.add_trigger(trig)
+        evt.add_action("WalkAction", cross_action)
+        return evt
+
+    def parameter_fields(self, action):
+        return (("trigger_dist", action.trigger_dist),)
+
+@register_action
+class SpeedChangeHandler(ActionHandler):
+    action_types = SPEED_ACTIONS
+
+    def build_event(self, action, actor_name, owner, params):
+        # Defaults (brake/stop -> 0 km/h) are resolved in the Blueprint IR
+        spd = params.bind(owner, "target_speed", action.target_speed / 3.6)
+        dur = params.bind(owner, "duration", action.duration)
+        spd_action = xosc.AbsoluteSpeedAction(spd, xosc.TransitionDynamics(xosc.DynamicsShapes.linear, xosc.DynamicsDimension.time, dur))
+
+        evt = xosc.Event("SpeedEvent", xosc.Priority.override)
+        evt.add_trigger(self._time_trigger("SpeedTrig", owner, action, params))
+        evt.add_action("SpeedAction", spd_action)
+        return evt
+
+    def parameter_fields(self, action):
+        return (("target_speed", action.target_speed / 3.6), ("duration", action.duration), ("trigger_time", action.trigger_time))
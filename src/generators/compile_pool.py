@@ -0,0 +1,73 @@
+# src/generators/compile_pool.py
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-process compiler, built once by the pool initializer (KG + map skeletons)
+_worker_compiler = None
+
+# (workers, skeleton_cache) -> ProcessPoolExecutor, kept alive between campaigns
+_pools = {}
+
+def _init_worker(skeleton_cache: bool):
+    global _worker_compiler
+    from src.generators.scenario_compiler import ScenarioCompiler
+    _worker_compiler = ScenarioCompiler(skeleton_cache=skeleton_cache)
+    _worker_compiler.warm_maps()
+
+def _compile_item(job) -> dict:
+    index, blueprint, seed, backend, parameters, output_prefix = job
+    try:
+        if output_prefix:
+            path = _worker_compiler.compile(blueprint, output_name=f"{output_prefix}{index:05d}.xosc",
+                                            backend=backend, parameters=parameters, seed=seed)
+            return {"index": index, "status": "ok", "path": path}
+        data = _worker_compiler.compile_to_bytes(blueprint, backend=backend, parameters=parameters, seed=seed)
+        return {"index": index, "status": "ok", "data": data}
+    except Exception as e:
+        return {"index": index, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+def get_pool(workers: int, skeleton_cache: bool = True) -> ProcessPoolExecutor:
+    key = (workers, skeleton_cache)
+    pool = _pools.get(key)
+    if pool is None:
+        # spawn: safe next to the API's threads, and the only start method on Windows
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(skeleton_cache,),
+        )
+        _pools[key] = pool
+        logger.info(f"Started compile process pool with {workers} workers.")
+    return pool
+
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(wait=True, cancel_futures=True)
+    _pools.clear()
+
+def compile_many(blueprints: list, workers: int = None, seed=0, backend: str = None,
+                 parameters=None, output_prefix: str = None, skeleton_cache: bool = True) -> list:
+    """ See ScenarioCompiler.compile_many. """
+    if not blueprints:
+        return []
+    workers = workers or settings.COMPILE_PROCESSES or os.cpu_count() or 1
+    if output_prefix:
+        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+
+    jobs = [(i, blueprint, f"{seed}:{i}", backend, parameters, output_prefix) for i, blueprint in enumerate(blueprints)]
+
+    # Large chunks amortize IPC, several per worker keep the tail short
+    chunksize = max(1, len(jobs) // (workers * 4))
+    try:
+        return list(get_pool(workers, skeleton_cache).map(_compile_item, jobs, chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died hard (OOM, segfault): drop the pool so the next call starts fresh
+        _pools.pop((workers, skeleton_cache), None)
+        raise
@@ -1,7 +1,20 @@
 import random
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+import numpy as np
 
-from src.generators.road_helpers import parse_road
+from src.generators.road_model import RoadModel, load_road_model
+
+# One row per background vehicle (see sample_vehicle_positions)
+TRAFFIC_DTYPE = np.dtype([("s", np.float64), ("t", np.float64), ("lane", np.int64), ("road", np.int64), ("model", np.int64)])
+
+# Used when there is no vehicle catalog to read: esmini's stock car models (resources/models/<name>.osgb)
+DEFAULT_VEHICLES = [
+    {"name": "car_white", "length": 5.04},
+    {"name": "car_blue", "length": 4.5},
+    {"name": "car_red", "length": 5.04},
+    {"name": "car_yellow", "length": 5.04},
+]
 
 def get_vehicle_types(catalog_path) -> list:
     """
@@ -13,6 +26,7 @@ def get_vehicle_types(catalog_path) -> list:
 
     Parameters:
         catalog_path (str): Path to the XML file containing the vehicle catalog.
+                            None: DEFAULT_VEHICLES.
 
     Returns:
         list: A list of dictionaries, each representing a vehicle with:
@@ -25,6 +39,9 @@ def get_vehicle_types(catalog_path) -> list:
                   {"name": "car_blue", "length": 4.5}
               ]
     """
+    if catalog_path is None:
+        return [dict(vehicle) for vehicle in DEFAULT_VEHICLES]
+
     # Parse the XML file using ElementTree
     tree = ET.parse(catalog_path)
     root = tree.getroot()
@@ -48,7 +65,88 @@ def get_vehicle_types(catalog_path) -> list:
 
     return vehicle_data
 
-def get_vehicle_positions(roadfile, ego_pos: tuple, density: float, catalog_path: str) -> list:
+@dataclass(slots=True)
+class TrafficLayout:
+    """ Columnar traffic: `positions` is a TRAFFIC_DTYPE array, `model` indexes `vehicles`. """
+    positions: np.ndarray
+    vehicles: list
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def catalog_names(self) -> np.ndarray:
+        names = np.array([v["name"] for v in self.vehicles] or [""], dtype=object)
+        return names[self.positions["model"]]
+
+    def to_dict(self) -> dict:
+        """ The dict get_vehicle_positions has always returned: {i: {"position": (s, t, lane, road), "catalog_name": name}}. """
+        names = self.catalog_names
+        return {
+            i: {"position": (s, t, lane, road), "catalog_name": name}
+            for i, (s, t, lane, road, name) in enumerate(zip(
+                self.positions["s"].tolist(), self.positions["t"].tolist(),
+                self.positions["lane"].tolist(), self.positions["road"].tolist(), names.tolist()))
+        }
+
+# model path -> (RoadModel, road id, lane id, road length per drivable lane); rebuilt when the model is reloaded
+_lane_tables = {}
+
+def _drivable_lanes(model: RoadModel) -> tuple:
+    cached = _lane_tables.get(model.path)
+    if cached is not None and cached[0] is model:
+        return cached[1]
+    roads, lanes, lengths = [], [], []
+    for road_id, length, lane_ids in model.roads():
+        roads += [road_id] * len(lane_ids)
+        lanes += lane_ids
+        lengths += [length] * len(lane_ids)
+    table = (np.array(roads, dtype=np.int64), np.array(lanes, dtype=np.int64), np.array(lengths, dtype=np.float64))
+    _lane_tables[model.path] = (model, table)
+    return table
+
+def sample_vehicle_positions(roadfile, ego_pos: tuple, density: float, catalog_path: str = None, seed=None, vehicles: list = None) -> TrafficLayout:
+    """
+    Vectorized get_vehicle_positions: every slot of every drivable lane is sampled at once.
+    Same rules (one car per 100/density m slot, jittered within it, none on top of the ego
+    or hanging off a road end), drawn from numpy.random.default_rng(seed), so a seed
+    always gives the same layout.
+
+    Parameters:
+        roadfile, ego_pos, density, catalog_path: as in get_vehicle_positions.
+        seed (int | numpy.random.Generator, optional): Seed or generator for the layout.
+        vehicles (list, optional): get_vehicle_types() output, to skip reading the catalog.
+
+    Returns:
+        TrafficLayout: TRAFFIC_DTYPE rows (s, t, lane, road, model) plus the vehicle list `model` indexes.
+    """
+    rng = np.random.default_rng(seed)
+    ego_s, _, ego_lid, ego_rid = ego_pos
+    vehicles = vehicles if vehicles is not None else get_vehicle_types(catalog_path)
+    roads, lanes, lengths = _drivable_lanes(load_road_model(roadfile))
+    car_density = int(100/density)
+
+    # Slots of range(0, int(length), car_density) on each lane; lanes shorter than a slot get none
+    slots = np.where(lengths >= car_density, (lengths.astype(np.int64) + car_density - 1) // car_density, 0)
+    lane_of = np.repeat(np.arange(len(lanes)), slots)
+    s = (np.arange(slots.sum()) - np.repeat(np.cumsum(slots) - slots, slots)) * car_density
+    road, lane, length = roads[lane_of], lanes[lane_of], lengths[lane_of]
+
+    # Every catalog entry equally likely (the loop version's int(uniform(0, n - 1)) never picked the last one)
+    model = rng.integers(0, len(vehicles), size=len(s))
+    car_length = np.array([v["length"] for v in vehicles], dtype=np.float64)[model]
+    min_sample = s + car_length # add a car length to avoid on top of eachother
+    s_noise = min_sample + rng.random(len(s)) * (car_density - car_length)
+
+    on_ego = (ego_s - car_length < s_noise) & (s_noise < ego_s + car_length) & (lane == ego_lid) & (road == ego_rid)
+    off_road = (s_noise > length - car_length) | (s_noise < car_length)
+    keep = ~(on_ego | off_road)
+
+    positions = np.zeros(int(keep.sum()), dtype=TRAFFIC_DTYPE)
+    positions["s"], positions["lane"], positions["road"], positions["model"] = s_noise[keep], lane[keep], road[keep], model[keep]
+    return TrafficLayout(positions, vehicles)
+
+def get_vehicle_positions(roadfile, ego_pos: tuple, density: float, catalog_path: str, rng=None, columnar: bool = False) -> list:
     """
     Generates random vehicle positions along lanes of a road network while ensuring no overlap with the ego vehicle.
 
@@ -64,7 +162,10 @@ def get_vehicle_positions(roadfile, ego_pos: tuple, density: float, catalog_path
                         - lane_id (int): Lane identifier.
                         - road_id (int): Road identifier.
         density (float): Desired vehicle density, representing the number of cars per 100 meters.
-        catalog_path (str): Path to the vehicle catalog XML file, used to fetch vehicle types.
+        catalog_path (str): Path to the vehicle catalog XML file, used to fetch vehicle types (None: DEFAULT_VEHICLES).
+        rng (random.Random, optional): Source of randomness, for reproducible traffic. Defaults to the global `random`.
+                                       Only seeds the numpy generator of sample_vehicle_positions.
+        columnar (bool, optional): Return the TrafficLayout itself instead of the dict below.
 
     Returns:
         list: A dictionary mapping vehicle indices to their properties, where each entry contains:
@@ -78,38 +179,6 @@ def get_vehicle_positions(roadfile, ego_pos: tuple, density: float, catalog_path
                   ...
               }
     """
-    positions = {}
-    ego_s, _, ego_lid, ego_rid = ego_pos
-    _, road_dict = parse_road(roadfile)
-    vehicles = get_vehicle_types(catalog_path)
-    
-    car_factor = density # cars/100m
-    car_density = int(100/car_factor)
-    i = 0
-    for road_id in list(road_dict)[2:]:
-        section_length = road_dict[road_id]["length"]
-        for lane_id in road_dict[road_id]["lane_ids"]:
-            min_sample = 0
-            for s in range(0, int(section_length), car_density):
-                target_type = vehicles[int(random.uniform(0, len(vehicles)-1))]
-                target_name = target_type["name"]
-                target_length = target_type["length"]
-                min_sample = s + target_length # add a car length to avoid on top of eachother
-
-                if car_density > section_length:
-                    continue # No cars on roads shorter than density
-
-                s_noise = random.uniform(min_sample, min_sample + car_density - target_length)
-
-                if (ego_s - target_length < s_noise < ego_s + target_length) and lane_id == ego_lid and road_id == ego_rid:
-                    continue # Don't place a target on top of ego
-
-                if s_noise > section_length - target_length or s_noise < target_length: # Max noise
-                    continue
-                
-                positions[i] = {}
-                positions[i]["position"] = (s_noise, 0, lane_id, road_id)
-                positions[i]["catalog_name"] = target_name
-                i += 1
-    
-    return positions
+    rng = rng or random
+    layout = sample_vehicle_positions(roadfile, ego_pos, density, catalog_path, seed=rng.getrandbits(64))
+    return layout if columnar else layout.to_dict()
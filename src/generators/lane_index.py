@@ -0,0 +1,54 @@
+# src/generators/lane_index.py
+import bisect
+import numpy as np
+
+class LaneIndex:
+    """
+    Occupied longitudinal positions, kept sorted per (road, lane).
+    Answers "is there anything within `min_gap` metres of s on this lane of this road?"
+    with a binary search instead of a scan over every occupied position.
+    Positions are (lane, s) or (lane, s, road) tuples; the road defaults to 0.
+    """
+
+    def __init__(self, positions=()):
+        self._lanes = {}  # (road id, lane id) -> sorted list of s
+        for position in positions:
+            self.add(*position)
+
+    def __len__(self):
+        return sum(len(v) for v in self._lanes.values())
+
+    def add(self, lane, s: float, road=0):
+        bisect.insort(self._lanes.setdefault((road, lane), []), s)
+
+    def is_clear(self, lane, s: float, min_gap: float, road=0) -> bool:
+        occupied = self._lanes.get((road, lane))
+        if not occupied:
+            return True
+        idx = bisect.bisect_left(occupied, s)
+        if idx < len(occupied) and occupied[idx] - s < min_gap:
+            return False
+        return idx == 0 or s - occupied[idx - 1] >= min_gap
+
+    def clear_mask(self, lanes, s, min_gap: float, roads=None) -> np.ndarray:
+        """
+        Vectorized `is_clear` for many candidates at once.
+        `lanes` / `s` (/ `roads`, default all 0) are equally long sequences;
+        returns a bool array (True = keep).
+        """
+        lanes = np.asarray(lanes)
+        s = np.asarray(s, dtype=float)
+        roads = np.zeros(len(s), dtype=np.int64) if roads is None else np.asarray(roads)
+        mask = np.ones(len(s), dtype=bool)
+        for (road, lane), occupied in self._lanes.items():
+            on_lane = np.flatnonzero((lanes == lane) & (roads == road))
+            if not len(on_lane):
+                continue
+            occ = np.asarray(occupied, dtype=float)
+            cand = s[on_lane]
+            idx = np.searchsorted(occ, cand)
+            left = occ[np.maximum(idx - 1, 0)]
+            right = occ[np.minimum(idx, len(occ) - 1)]
+            nearest = np.minimum(np.abs(cand - left), np.abs(right - cand))
+            mask[on_lane] = nearest >= min_gap
+        return mask
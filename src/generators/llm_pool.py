@@ -0,0 +1,170 @@
+# src/generators/llm_pool.py
+import json
+import asyncio
+import logging
+from src.interfaces.llm_interface import IAsyncLlmInterface
+from src.core.json_utils import extract_json_from_text, repair_json
+from src.core.rate_limiter import ProviderRateLimitError
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _groq_backend():
+    from src.generators.llm_service import AsyncGroqLlmService
+    return AsyncGroqLlmService()
+
+def _mock_backend():
+    from src.generators.mock_llm_service import MockLlmService
+    return MockLlmService(latency=settings.MOCK_LLM_LATENCY_SECONDS)
+
+# Name -> factory. Factories return an IAsyncLlmInterface (wrap sync services in AsyncLlmAdapter).
+LLM_BACKENDS = {
+    "groq": _groq_backend,
+    "mock": _mock_backend,
+}
+
+def register_backend(name: str, factory):
+    """Makes a new backend selectable through settings.LLM_BACKENDS."""
+    LLM_BACKENDS[name] = factory
+
+def create_llm_service(backend_names: str = None, hedge_after: float = None):
+    """
+    Builds the LLM pool from a comma separated, priority ordered list of backend names
+    (e.g. "groq,mock").
+    """
+    names = [n.strip() for n in (backend_names or settings.LLM_BACKENDS).split(",") if n.strip()]
+    unknown = [n for n in names if n not in LLM_BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown LLM backend(s): {unknown}. Available: {sorted(LLM_BACKENDS)}")
+
+    backends = [(name, LLM_BACKENDS[name]()) for name in names]
+    return LlmBackendPool(backends, hedge_after=settings.LLM_HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after)
+
+def is_valid_blueprint_response(text: str) -> bool:
+    json_str = extract_json_from_text(text or "")
+    if not json_str:
+        return False
+    try:
+        return isinstance(json.loads(json_str), dict)
+    except json.JSONDecodeError:
+        return False
+
+def _reply_rank(text: str) -> int:
+    """ 2 = strict JSON blueprint, 1 = local repair makes it a JSON object, 0 = anything else. """
+    if is_valid_blueprint_response(text):
+        return 2
+    try:
+        return 1 if isinstance(json.loads(repair_json(text)), dict) else 0
+    except json.JSONDecodeError:
+        return 0
+
+class LlmBackendPool(IAsyncLlmInterface):
+    """
+    Priority ordered set of LLM backends behaving as one.
+    - Hedging: if the active backend has not answered after `hedge_after` seconds,
+      the next backend is started in parallel; the first strict JSON blueprint wins
+      and the losers are cancelled.
+    - Failover: an error or an empty answer immediately starts the next backend.
+    A non-empty answer that is not strict JSON is not a failure: it is kept and, unless a
+    hedged backend still running does better, returned so the pipeline's repair stages
+    get it. If every backend fails and one of them was rate limited, that error is
+    re-raised so the pipeline's backoff still applies.
+    """
+
+    def __init__(self, backends: list, hedge_after: float = 8.0):
+        if not backends:
+            raise ValueError("LlmBackendPool needs at least one backend.")
+        self.backends = backends
+        self.hedge_after = hedge_after
+        self.hedges = 0
+        self.failovers = 0
+        self.wins = {name: 0 for name, _ in backends}
+        self.errors = {name: 0 for name, _ in backends}
+
+    @property
+    def model(self) -> str:
+        return "+".join(getattr(backend, "model", name) for name, backend in self.backends)
+
+    async def _invoke(self, backend, method: str, user_prompt: str, system_prompt: str) -> str:
+        func = getattr(backend, method, None) or backend.agenerate_code
+        return await func(user_prompt=user_prompt, system_prompt=system_prompt)
+
+    async def _race(self, method: str, user_prompt: str, system_prompt: str) -> str:
+        queue = list(self.backends)
+        running = {}
+        rate_limited = None
+        best, best_rank, best_name = "", -1, None # Best non-strict answer so far
+
+        def launch_next() -> bool:
+            if not queue:
+                return False
+            name, backend = queue.pop(0)
+            task = asyncio.create_task(self._invoke(backend, method, user_prompt, system_prompt))
+            running[task] = name
+            return True
+
+        launch_next()
+        try:
+            while running:
+                timeout = self.hedge_after if queue else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Slow answer: hedge with the next backend
+                    self.hedges += 1
+                    logger.info(f"No answer after {self.hedge_after}s, hedging with next backend.")
+                    launch_next()
+                    continue
+
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        result = task.result()
+                    except ProviderRateLimitError as e:
+                        rate_limited = e
+                        self.errors[name] += 1
+                        logger.warning(f"LLM backend '{name}' rate limited.")
+                    except Exception as e:
+                        self.errors[name] += 1
+                        logger.warning(f"LLM backend '{name}' failed: {e}")
+                    else:
+                        if result and result.strip():
+                            rank = _reply_rank(result)
+                            if rank == 2:
+                                self.wins[name] += 1
+                                return result
+                            logger.info(f"LLM backend '{name}' returned malformed JSON, leaving it to the repair stages.")
+                            if rank > best_rank:
+                                best, best_rank, best_name = result, rank, name
+                            continue
+                        self.errors[name] += 1
+                        logger.warning(f"LLM backend '{name}' returned an empty answer.")
+
+                    if launch_next():
+                        self.failovers += 1
+        finally:
+            for task in running:
+                task.cancel()
+
+        if best:
+            self.wins[best_name] += 1
+            return best
+        if rate_limited:
+            raise rate_limited
+        return ""
+
+    async def agenerate_code(self, user_prompt: str, system_prompt: str = "") -> str:
+        return await self._race("agenerate_code", user_prompt, system_prompt)
+
+    async def agenerate_json_stream(self, user_prompt: str, system_prompt: str = "") -> str:
+        return await self._race("agenerate_json_stream", user_prompt, system_prompt)
+
+    def stats(self) -> dict:
+        return {
+            "backends": [name for name, _ in self.backends],
+            "hedge_after_seconds": self.hedge_after,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "wins": self.wins,
+            "errors": self.errors,
+        }
@@ -1,13 +1,24 @@
 # src/generators/llm_service.py
 import os
 import re
+import asyncio
 import logging
-from groq import Groq
-from src.interfaces.llm_interface import ILlmInterface
+from groq import Groq, AsyncGroq, RateLimitError
+from src.interfaces.llm_interface import ILlmInterface, IAsyncLlmInterface
+from src.core.json_utils import IncrementalJsonExtractor
+from src.core.rate_limiter import ProviderRateLimitError
+from src.core.token_usage import estimate_tokens, record_usage
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+def _retry_after(error: RateLimitError):
+    """Reads the provider's Retry-After header (seconds) from a 429, if present."""
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
 class GroqLlmService(ILlmInterface):
     def __init__(self):
         self.api_key = os.environ.get("GROQ_API_KEY")
@@ -31,11 +42,72 @@ class GroqLlmService(ILlmInterface):
                 temperature=0.2,
                 max_tokens=6000,
             )
+            self._record_usage(chat_completion)
             return self._clean_output(chat_completion.choices[0].message.content)
         except Exception as e:
             logger.error(f"Groq API Error: {e}")
             return ""
 
+    def generate_json_stream(self, user_prompt: str, system_prompt: str = "") -> str:
+        """
+        Streaming variant of generate_code for JSON blueprints.
+        Feeds tokens into an IncrementalJsonExtractor and closes the stream as soon as
+        the top-level object is complete, so trailing prose is never generated or billed.
+        Returns the JSON string (or whatever partial text arrived if it never closed).
+        """
+        logger.info(f"Streaming request to Groq ({self.model})...")
+        if not system_prompt:
+            system_prompt = "You are an expert Python Simulation Engineer."
+
+        extractor = IncrementalJsonExtractor()
+        try:
+            stream = self.client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                model=self.model,
+                temperature=0.2,
+                max_tokens=6000,
+                stream=True,
+            )
+            received = 0
+            usage = None
+            try:
+                for chunk in stream:
+                    usage = self._chunk_usage(chunk) or usage
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    received += len(delta or "")
+                    if delta and extractor.feed(delta):
+                        logger.info("Blueprint closed, stopping stream early.")
+                        break
+            finally:
+                stream.close()
+            self._record_stream_usage(usage, system_prompt + user_prompt, received)
+        except Exception as e:
+            logger.error(f"Groq API Error: {e}")
+        return extractor.partial
+
+    @staticmethod
+    def _record_usage(chat_completion):
+        usage = getattr(chat_completion, "usage", None)
+        if usage:
+            record_usage(usage.prompt_tokens, usage.completion_tokens)
+
+    @staticmethod
+    def _chunk_usage(chunk):
+        # Groq attaches usage to the final chunk of a stream (x_groq.usage)
+        x_groq = getattr(chunk, "x_groq", None)
+        return getattr(x_groq, "usage", None) if x_groq else None
+
+    @staticmethod
+    def _record_stream_usage(usage, prompt_text: str, received_chars: int):
+        """ Real usage if the stream ran to the end; an estimate if we cancelled it early. """
+        if usage:
+            record_usage(usage.prompt_tokens, usage.completion_tokens)
+        else:
+            record_usage(estimate_tokens(prompt_text), (received_chars + 3) // 4, estimated=True)
+
     def _clean_output(self, raw_text: str) -> str:
         code_match = re.search(r'```python(.*?)```', raw_text, re.DOTALL)
         if code_match:
@@ -113,4 +185,86 @@ class AI_Generated_Scenario:
         with open(output_path, "w") as f:
             f.write(full_file_content)
         logger.info(f"Code saved to {output_path}")
-        return output_path
\ No newline at end of file
+        return output_path
+
+class AsyncGroqLlmService(GroqLlmService, IAsyncLlmInterface):
+    """
+    Non-blocking Groq client for the API.
+    Shares model/config and output cleaning with GroqLlmService.
+    """
+    def __init__(self):
+        super().__init__()
+        self.async_client = AsyncGroq(api_key=self.api_key)
+
+    async def agenerate_code(self, user_prompt: str, system_prompt: str = "") -> str:
+        logger.info(f"Sending async request to Groq ({self.model})...")
+        if not system_prompt:
+            system_prompt = "You are an expert Python Simulation Engineer."
+
+        try:
+            chat_completion = await self.async_client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                model=self.model,
+                temperature=0.2,
+                max_tokens=6000,
+            )
+            self._record_usage(chat_completion)
+            return self._clean_output(chat_completion.choices[0].message.content)
+        except RateLimitError as e:
+            raise ProviderRateLimitError(str(e), retry_after=_retry_after(e)) from e # Let the caller back off
+        except Exception as e:
+            logger.error(f"Groq API Error: {e}")
+            return ""
+
+    async def agenerate_json_stream(self, user_prompt: str, system_prompt: str = "") -> str:
+        """
+        Async twin of generate_json_stream: cancels the stream once the blueprint object closes.
+        """
+        logger.info(f"Streaming async request to Groq ({self.model})...")
+        if not system_prompt:
+            system_prompt = "You are an expert Python Simulation Engineer."
+
+        extractor = IncrementalJsonExtractor()
+        try:
+            stream = await self.async_client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                model=self.model,
+                temperature=0.2,
+                max_tokens=6000,
+                stream=True,
+            )
+            received = 0
+            usage = None
+            try:
+                async for chunk in stream:
+                    usage = self._chunk_usage(chunk) or usage
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    received += len(delta or "")
+                    if delta and extractor.feed(delta):
+                        logger.info("Blueprint closed, stopping stream early.")
+                        break
+            finally:
+                await stream.close()
+            self._record_stream_usage(usage, system_prompt + user_prompt, received)
+        except RateLimitError as e:
+            raise ProviderRateLimitError(str(e), retry_after=_retry_after(e)) from e # Let the caller back off
+        except Exception as e:
+            logger.error(f"Groq API Error: {e}")
+        return extractor.partial
+
+class AsyncLlmAdapter(IAsyncLlmInterface):
+    """
+    Wraps any synchronous ILlmInterface and runs it in a worker thread,
+    so backends without a native async client can still be awaited.
+    """
+    def __init__(self, service: ILlmInterface):
+        self.service = service
+
+    async def agenerate_code(self, user_prompt: str, system_prompt: str = "") -> str:
+        return await asyncio.to_thread(self.service.generate_code, user_prompt=user_prompt, system_prompt=system_prompt)
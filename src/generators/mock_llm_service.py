@@ -0,0 +1,136 @@
+# src/generators/mock_llm_service.py
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from src.interfaces.llm_interface import ILlmInterface, IAsyncLlmInterface
+from src.core.token_usage import estimate_tokens, record_usage
+
+logger = logging.getLogger(__name__)
+
+# Canned blueprints, one per maneuver family the KG knows about
+CANNED_BLUEPRINTS = {
+    "cut_in": {
+        "map_key": "highway",
+        "traffic_density": "low",
+        "actors": [
+            {"name": "Ego", "type": "car", "lane": -2, "s": 50, "speed": 100},
+            {"name": "Target", "type": "car", "lane": -3, "s": 35, "speed": 130}
+        ],
+        "actions": [
+            {"type": "lane_change", "actor": "Target", "target_lane": -2, "trigger_time": 4.0, "duration": 2.0},
+            {"type": "brake", "actor": "Ego", "target_speed": 60, "trigger_time": 6.0, "duration": 3.0}
+        ]
+    },
+    "brake_check": {
+        "map_key": "highway",
+        "traffic_density": "low",
+        "actors": [
+            {"name": "Ego", "type": "car", "lane": -2, "s": 30, "speed": 110},
+            {"name": "Target", "type": "car", "lane": -2, "s": 80, "speed": 120}
+        ],
+        "actions": [
+            {"type": "brake", "actor": "Target", "target_speed": 0, "trigger_time": 5.0, "duration": 2.5},
+            {"type": "brake", "actor": "Ego", "target_speed": 0, "trigger_time": 5.8, "duration": 3.0}
+        ]
+    },
+    "overtake": {
+        "map_key": "highway",
+        "traffic_density": "low",
+        "actors": [
+            {"name": "Ego", "type": "car", "lane": -3, "s": 20, "speed": 120},
+            {"name": "Target", "type": "truck", "lane": -3, "s": 70, "speed": 80}
+        ],
+        "actions": [
+            {"type": "lane_change", "actor": "Ego", "target_lane": -2, "trigger_entity": "Target", "trigger_dist": 25, "duration": 3.0},
+            {"type": "lane_change", "actor": "Ego", "target_lane": -3, "trigger_time": 12.0, "duration": 3.0}
+        ]
+    },
+    "pedestrian": {
+        "map_key": "city",
+        "traffic_density": "low",
+        "actors": [
+            {"name": "Ego", "type": "car", "lane": -1, "s": 10, "speed": 40},
+            {"name": "Walker", "type": "pedestrian", "lane": -1, "s": 50, "speed": 0}
+        ],
+        "actions": [
+            {"type": "cross_street", "actor": "Walker", "trigger_entity": "Ego", "trigger_dist": 30},
+            {"type": "brake", "actor": "Ego", "target_speed": 0, "trigger_time": 3.0, "duration": 2.0}
+        ]
+    },
+    "traffic_light": {
+        "map_key": "city",
+        "traffic_density": "low",
+        "actors": [
+            {"name": "Ego", "type": "car", "lane": -1, "s": 10, "speed": 45}
+        ],
+        "actions": [
+            {"type": "traffic_light", "id": "1", "state": "red", "trigger_time": 2.0},
+            {"type": "stop", "actor": "Ego", "trigger_time": 4.0, "duration": 3.0}
+        ]
+    },
+}
+
+# Keyword -> blueprint family (first match wins)
+KEYWORDS = [
+    ("pedestrian", "pedestrian"),
+    ("cross", "pedestrian"),
+    ("light", "traffic_light"),
+    ("cut", "cut_in"),
+    ("brake", "brake_check"),
+    ("overtake", "overtake"),
+    ("pass", "overtake"),
+]
+
+class MockLlmService(ILlmInterface, IAsyncLlmInterface):
+    """
+    Deterministic offline stand-in for an LLM backend.
+    Returns a canned blueprint chosen from the request text (same prompt -> same answer),
+    so the rest of the pipeline can be benchmarked and load-tested with no network.
+    `latency` simulates provider round-trip time in seconds.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.model = "mock"
+        self.calls = 0
+
+    @staticmethod
+    def _request_text(user_prompt: str) -> str:
+        match = re.search(r'### REQUEST ###\s*"(.*?)"', user_prompt, re.DOTALL)
+        return match.group(1) if match else user_prompt
+
+    def _respond(self, user_prompt: str, system_prompt: str = "") -> str:
+        self.calls += 1
+        request = self._request_text(user_prompt).lower()
+
+        family = next((fam for word, fam in KEYWORDS if word in request), None)
+        if family is None:
+            # Stable pick for anything unrecognised
+            digest = int(hashlib.sha256(request.encode("utf-8")).hexdigest(), 16)
+            family = sorted(CANNED_BLUEPRINTS)[digest % len(CANNED_BLUEPRINTS)]
+
+        blueprint = json.loads(json.dumps(CANNED_BLUEPRINTS[family]))
+        density = re.search(r'Set "traffic_density" to "(\w+)"', user_prompt)
+        if density:
+            blueprint["traffic_density"] = density.group(1)
+
+        # Mimic a chatty model: JSON wrapped in prose
+        response = f"Here is the scenario blueprint:\n{json.dumps(blueprint, indent=2)}\nLet me know if you need changes."
+        record_usage(estimate_tokens(system_prompt + user_prompt), estimate_tokens(response), estimated=True)
+        return response
+
+    def generate_code(self, user_prompt: str, system_prompt: str = "") -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(user_prompt, system_prompt)
+
+    async def agenerate_code(self, user_prompt: str, system_prompt: str = "") -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(user_prompt, system_prompt)
+
+    async def agenerate_json_stream(self, user_prompt: str, system_prompt: str = "") -> str:
+        return await self.agenerate_code(user_prompt, system_prompt)
@@ -0,0 +1,305 @@
+# src/generators/pipeline.py
+import os
+import json
+import asyncio
+import logging
+import aiofiles
+from src.core.knowledge_graph import KnowledgeGraph
+from src.core.blueprint import Blueprint, parse_blueprint, parse_blueprint_json, is_json_syntax_error
+from src.core.rate_limiter import LlmRateLimiter, ProviderRateLimitError
+from src.core.concurrency import run_in_compile_pool
+from src.core.json_utils import extract_json_from_text, repair_json
+from src.core.token_usage import track_usage
+from src.generators.prompt_builder import PromptAssembler
+from src.generators.scenario_compiler import COMPILER_OUTPUT_VERSION
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_REPAIR_PROMPT = """
+The following JSON fragment is malformed or truncated.
+Return ONLY the corrected JSON object. Do not add, remove or rename fields, and do not add commentary.
+
+{fragment}
+"""
+
+class BlueprintGenerationError(RuntimeError):
+    """The LLM did not produce a usable blueprint after all attempts."""
+    pass
+
+class ScenarioPipeline:
+    """
+    Prompt -> KG context -> (caches | LLM) -> validated blueprint -> .xosc
+    Shared by the single-scenario and batch endpoints.
+    """
+
+    def __init__(self, llm_service, compiler, kg: KnowledgeGraph,
+                 blueprint_cache=None,
+                 semantic_cache=None,
+                 rate_limiter: LlmRateLimiter = None,
+                 prompt_assembler: PromptAssembler = None,
+                 scenario_store=None):
+        self.llm_service = llm_service
+        self.compiler = compiler
+        self.kg = kg
+        self.blueprint_cache = blueprint_cache
+        self.semantic_cache = semantic_cache
+        self.rate_limiter = rate_limiter
+        self.scenario_store = scenario_store
+        self.prompt_assembler = prompt_assembler or PromptAssembler(settings.LLM_PROMPT_TOKEN_BUDGET)
+        self.totals = self.new_counters()
+
+    @staticmethod
+    def new_counters() -> dict:
+        """
+        Per-request LLM accounting.
+        `regenerations_avoided` = full-prompt round trips the repair stage saved.
+        """
+        return {
+            "llm_calls": 0, "local_repairs": 0, "fragment_repairs": 0, "regenerations_avoided": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "estimated_usage_calls": 0,
+        }
+
+    # --- 1. KNOWLEDGE GRAPH ---
+    def resolve_map_key(self, user_requirement: str) -> str:
+        if "highway:" in user_requirement.lower(): return "highway"
+        if "city:" in user_requirement.lower(): return "city"
+        selected_map_data = self.kg.get_map_context(user_requirement)
+        return "city" if selected_map_data["speed_limit"] == 50 else "highway"
+
+    # --- 2. PROMPT ---
+    def build_prompt(self, user_requirement: str, context_prompt: str, traffic_density: str) -> tuple:
+        """ (system_prompt, user_prompt): stable cached prefix + variable tail. """
+        return self.prompt_assembler.assemble(user_requirement, context_prompt, traffic_density)
+
+    # --- 3. LLM ---
+    async def _call_llm(self, user_prompt: str, system_prompt: str = "") -> str:
+        """
+        One LLM round trip, throttled by the shared rate limiter.
+        On a provider 429 every caller is paused and the call retried with exponential backoff.
+        Malformed replies come back as they are (the pool only fails over on errors / empty
+        replies), so _parse_blueprint's repair steps get to see them. "" if no backend answered.
+        """
+        delay = settings.LLM_BACKOFF_INITIAL_SECONDS
+        for attempt in range(settings.LLM_MAX_RATE_LIMIT_RETRIES + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(system_prompt + user_prompt)
+            try:
+                if settings.LLM_STREAMING:
+                    # Stream stops as soon as the blueprint object closes
+                    return await self.llm_service.agenerate_json_stream(user_prompt=user_prompt, system_prompt=system_prompt)
+                return await self.llm_service.agenerate_code(user_prompt=user_prompt, system_prompt=system_prompt)
+            except ProviderRateLimitError as e:
+                wait = e.retry_after or delay
+                if self.rate_limiter:
+                    self.rate_limiter.backoff(wait)
+                else:
+                    await asyncio.sleep(wait)
+                delay = min(delay * 2, settings.LLM_BACKOFF_MAX_SECONDS)
+        raise BlueprintGenerationError("LLM provider kept rate limiting the request.")
+
+    @staticmethod
+    def _loads_blueprint(text: str) -> Blueprint:
+        """
+        JSON text -> Blueprint IR in one pass (decode + validate + defaults).
+        Only malformed JSON raises (JSONDecodeError) so the repair steps below get a go;
+        a schema violation (e.g. "speed": "fast") returns None, repairing text won't fix it.
+        """
+        try:
+            return parse_blueprint_json(text)
+        except ValueError as e:
+            if is_json_syntax_error(e):
+                raise json.JSONDecodeError(str(e), text, 0)
+            logger.warning(f"Blueprint rejected by validation: {e}")
+            return None
+
+    async def _parse_blueprint(self, raw_response: str, counters: dict):
+        """
+        JSON text -> Blueprint, escalating only as far as needed:
+        1. plain parse
+        2. local repair (commas, quotes, comments, truncation) - no LLM call
+        3. "repair only this fragment" LLM call - much smaller than a full regeneration
+        Returns None if all three fail, so the caller regenerates from scratch.
+        """
+        candidate = extract_json_from_text(raw_response or "")
+        if candidate is None:
+            start = (raw_response or "").find('{')
+            if start == -1:
+                return None
+            candidate = raw_response[start:] # Object never closed (truncated output)
+
+        try:
+            return self._loads_blueprint(candidate)
+        except json.JSONDecodeError:
+            pass
+
+        try:
+            blueprint = self._loads_blueprint(repair_json(candidate))
+            if blueprint is None:
+                return None
+            counters["local_repairs"] += 1
+            counters["regenerations_avoided"] += 1
+            logger.info("Blueprint JSON repaired locally.")
+            return blueprint
+        except json.JSONDecodeError:
+            pass
+
+        if not settings.LLM_FRAGMENT_REPAIR:
+            return None
+
+        counters["llm_calls"] += 1
+        fixed = await self._call_llm(FRAGMENT_REPAIR_PROMPT.format(fragment=candidate), system_prompt="You repair malformed JSON.")
+        if not fixed or not fixed.strip():
+            logger.warning("Fragment repair got no answer, regenerating.")
+            return None
+        try:
+            blueprint = self._loads_blueprint(repair_json(extract_json_from_text(fixed) or fixed))
+            if blueprint is None:
+                return None
+            counters["fragment_repairs"] += 1
+            counters["regenerations_avoided"] += 1
+            logger.info("Blueprint JSON repaired by fragment request.")
+            return blueprint
+        except json.JSONDecodeError:
+            return None
+
+    async def generate_blueprint(self, user_requirement: str, traffic_density: str = "low", progress=None, counters: dict = None) -> Blueprint:
+        """
+        `progress(stage, percent)` is an optional callback used by the job API to report where we are.
+        `counters` (see new_counters) is filled with this request's LLM/repair accounting.
+        """
+        report = progress or (lambda stage, percent: None)
+        counters = counters if counters is not None else {}
+        for key, value in self.new_counters().items():
+            counters.setdefault(key, value)
+        try:
+            with track_usage(counters):
+                return await self._generate_blueprint(user_requirement, traffic_density, report, counters)
+        finally:
+            for key, value in counters.items():
+                self.totals[key] = self.totals.get(key, 0) + value
+
+    async def _generate_blueprint(self, user_requirement: str, traffic_density: str, report, counters: dict) -> Blueprint:
+
+        report("knowledge_graph", 10)
+        map_key = self.resolve_map_key(user_requirement)
+        context_prompt = self.kg.get_llm_system_prompt_context(user_requirement)
+        system_prompt, user_prompt = self.build_prompt(user_requirement, context_prompt, traffic_density)
+
+        # BLUEPRINT CACHE (Same prompt + density + map + KG rules -> same blueprint)
+        report("cache_lookup", 20)
+        blueprint = None
+        cache_key = None
+        if self.blueprint_cache:
+            cache_key = self.blueprint_cache.make_key(user_requirement, traffic_density, map_key, context_prompt)
+            cached = self.blueprint_cache.get(cache_key)
+            if cached:
+                logger.info("Blueprint cache hit, skipping LLM.")
+                return parse_blueprint(cached)
+
+        # SEMANTIC CACHE (Paraphrases of an already validated prompt)
+        embedding = None
+        semantic_scope = None
+        if self.semantic_cache:
+            semantic_scope = self.semantic_cache.make_scope(traffic_density, map_key, context_prompt)
+            try:
+                embedding = await asyncio.to_thread(self.semantic_cache.embed, user_requirement)
+                cached, similarity = self.semantic_cache.lookup(embedding, semantic_scope)
+                if cached:
+                    logger.info(f"Semantic cache hit (similarity={similarity:.3f}), skipping LLM.")
+                    cached["map_key"] = map_key
+                    if self.blueprint_cache:
+                        self.blueprint_cache.put(cache_key, cached)
+                    return parse_blueprint(cached)
+            except Exception as e:
+                logger.warning(f"Semantic cache unavailable: {e}")
+                embedding = None
+
+        #LLM GENERATION (With Retry Logic)
+        for attempt in range(3):
+            report(f"llm_attempt_{attempt + 1}", 30 + attempt * 15)
+            counters["llm_calls"] += 1
+            blueprint = await self._parse_blueprint(await self._call_llm(user_prompt, system_prompt), counters)
+
+            if blueprint is not None:
+                blueprint.map_key = map_key # Enforce map consistency
+
+                if self.blueprint_cache or embedding is not None:
+                    stored = blueprint.to_dict()
+                    if self.blueprint_cache:
+                        self.blueprint_cache.put(cache_key, stored)
+                    if embedding is not None:
+                        self.semantic_cache.add(user_requirement, embedding, semantic_scope, stored)
+                return blueprint
+
+        raise BlueprintGenerationError("LLM failed to generate valid JSON scenario.")
+
+    def stats(self) -> dict:
+        return {"totals": dict(self.totals), "prompt": self.prompt_assembler.stats()}
+
+    # --- 4. COMPILATION ---
+    async def compile(self, blueprint: Blueprint, output_name: str = None, backend: str = None) -> str:
+        # Generate a unique filename for the user
+        output_name = output_name or f"scenario_{os.urandom(4).hex()}.xosc"
+        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+
+        # Compile (off the event loop, bounded by COMPILE_WORKERS)
+        return await run_in_compile_pool(self.compiler.compile, blueprint, output_name=output_name, backend=backend)
+
+    async def compile_to_bytes(self, blueprint: Blueprint, backend: str = None) -> bytes:
+        # In-memory variant: nothing touches the disk unless `persist` is called
+        return await run_in_compile_pool(self.compiler.compile_to_bytes, blueprint, backend=backend)
+
+    async def compile_family(self, blueprints: list, parameters=True, backend: str = None):
+        # One parameterized file + per-variant values (see ScenarioCompiler.compile_family)
+        return await run_in_compile_pool(self.compiler.compile_family, blueprints, parameters=parameters, backend=backend)
+
+    def scenario_key(self, blueprint: Blueprint, backend: str = None):
+        """
+        Scenario store key of a blueprint, or None when its output isn't reproducible
+        (dense traffic is randomized per compile) or there is no store.
+        """
+        if not self.scenario_store or blueprint.traffic_density == "high":
+            return None
+        road_path, scene_path = self.compiler.map_paths(blueprint)
+        options = dict(
+            backend=backend or settings.COMPILER_BACKEND,
+            traffic_catalog=self.compiler.traffic_catalog,
+            version=settings.VERSION,
+            compiler_output=COMPILER_OUTPUT_VERSION,
+            esmini=settings.ESMINI_BIN_PATH,
+            road=road_path, # As written into RoadNetwork
+            scene=scene_path,
+        )
+        if settings.ROI_SLICING: # RoadNetwork points at a sliced map
+            options["roi"] = [settings.ROI_RADIUS, settings.ROI_SNAP]
+        return self.scenario_store.blueprint_key(blueprint.to_dict(), **options)
+
+    async def compile_or_load(self, blueprint: Blueprint, backend: str = None):
+        """
+        -> (xosc bytes, store key, came from the store?)
+        A blueprint whose canonical form was compiled before is read back from the scenario store.
+        """
+        key = self.scenario_key(blueprint, backend)
+        if key:
+            data = await asyncio.to_thread(self.scenario_store.get_by_key, key)
+            if data is not None:
+                return data, key, True
+        return await self.compile_to_bytes(blueprint, backend=backend), key, False
+
+    async def save_scenario(self, data: bytes, output_name: str, key: str = None) -> str:
+        """
+        PERSIST_SCENARIOS target: the content-addressed scenario store when enabled (returns
+        the hash), else a loose file in OUTPUT_DIR (returns the path).
+        """
+        if self.scenario_store:
+            return await asyncio.to_thread(self.scenario_store.put, data, key)
+        return await self.persist(data, output_name)
+
+    async def persist(self, data: bytes, output_name: str) -> str:
+        """ Async write of an already serialized scenario into OUTPUT_DIR (aiofiles, no event-loop blocking). """
+        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+        full_path = os.path.join(settings.OUTPUT_DIR, output_name)
+        async with aiofiles.open(full_path, "wb") as f:
+            await f.write(data)
+        return full_path
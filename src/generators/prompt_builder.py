@@ -0,0 +1,94 @@
+# src/generators/prompt_builder.py
+import logging
+from src.core.token_usage import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_TEMPLATE = """
+{
+  "map_key": "highway",
+  "traffic_density": "low",
+  "actors": [
+    {"name": "Ego", "type": "car", "lane": -2, "s": 0, "speed": 100},
+    {"name": "Target", "type": "car", "lane": -3, "s": 0, "speed": 130}
+  ],
+  "actions": [
+    { "type": "lane_change", "actor": "Target", "target_lane": -2, "trigger_time": 5.0, "duration": 2.0 },
+    { "type": "brake", "actor": "Ego", "target_speed": 60, "trigger_dist": 15, "trigger_entity": "Target" }
+  ]
+}
+"""
+
+# Byte-identical on every call so the provider can reuse its prefix cache.
+STATIC_PREFIX = f"""You are an AI Scenario Architect.
+
+### INSTRUCTIONS ###
+1. Read the "PHYSICS & LOGIC RULES" in the KNOWLEDGE GRAPH RULES of the request carefully.
+2. If the user asks for a Cut-In, ensure the Aggressor is FASTER and starts BEHIND or PARALLEL to the victim.
+3. Use the "traffic_density" given with the request.
+4. Output ONLY valid JSON matching the schema below.
+
+### SCHEMA ###
+{SCHEMA_TEMPLATE}"""
+
+class PromptAssembler:
+    """
+    Builds LLM prompts as (system, user):
+    - system: the static role/instructions/schema block, compiled once and never changed,
+      so consecutive requests share the longest possible prefix.
+    - user: only the variable parts (request, KG context, density), appended last.
+    Enforces `token_budget` on the total by trimming the KG context first, then the request;
+    a budget the static prefix alone already uses up is a ValueError, not an empty request.
+    """
+
+    def __init__(self, token_budget: int = 3000, static_prefix: str = STATIC_PREFIX):
+        self.system_prompt = static_prefix
+        self.prefix_tokens = estimate_tokens(static_prefix)
+        self.token_budget = token_budget
+        self.truncations = 0
+
+    def _variable_part(self, user_requirement: str, context_prompt: str, traffic_density: str) -> str:
+        return f"""### REQUEST ###
+"{user_requirement}"
+
+### KNOWLEDGE GRAPH RULES (MUST FOLLOW) ###
+{context_prompt}
+
+### SETTINGS ###
+Set "traffic_density" to "{traffic_density}".
+"""
+
+    @staticmethod
+    def _trim(text: str, max_tokens: int) -> str:
+        # Inverse of estimate_tokens (~4 chars per token)
+        return text[:max(0, max_tokens) * 4]
+
+    def assemble(self, user_requirement: str, context_prompt: str, traffic_density: str) -> tuple:
+        """ Returns (system_prompt, user_prompt) within the token budget. """
+        user_prompt = self._variable_part(user_requirement, context_prompt, traffic_density)
+        overflow = self.prefix_tokens + estimate_tokens(user_prompt) - self.token_budget
+        if overflow <= 0:
+            return self.system_prompt, user_prompt
+
+        # Nothing left for the request once the fixed parts are in: refuse instead of sending an empty tail
+        fixed_tokens = self.prefix_tokens + estimate_tokens(self._variable_part("", "", traffic_density))
+        if fixed_tokens >= self.token_budget:
+            raise ValueError(f"Static prompt prefix ({fixed_tokens} tokens) leaves no room for the request "
+                             f"within the token budget ({self.token_budget}).")
+
+        # Over budget: KG context goes first, the user's own words last
+        self.truncations += 1
+        context_tokens = estimate_tokens(context_prompt)
+        context_prompt = self._trim(context_prompt, context_tokens - overflow)
+        overflow -= context_tokens - estimate_tokens(context_prompt)
+        if overflow > 0:
+            user_requirement = self._trim(user_requirement, estimate_tokens(user_requirement) - overflow)
+        logger.warning(f"Prompt exceeded token budget ({self.token_budget}), trimmed KG context/request.")
+        return self.system_prompt, self._variable_part(user_requirement, context_prompt, traffic_density)
+
+    def stats(self) -> dict:
+        return {
+            "token_budget": self.token_budget,
+            "static_prefix_tokens": self.prefix_tokens,
+            "truncations": self.truncations,
+        }
@@ -0,0 +1,219 @@
+# src/generators/road_geometry.py
+import numpy as np
+from src.generators.road_model import (
+    RoadModel, ARC, SPIRAL, POLY3, PARAM_POLY3,
+    GEOM_S, GEOM_X, GEOM_Y, GEOM_HDG, GEOM_LENGTH, GEOM_TYPE,
+    POLY_S, POLY_A,
+)
+
+# Vectorized OpenDRIVE geometry: (road, s, lane) -> world x, y, heading for arrays of s.
+# Every function takes a cached RoadModel (road_model.load_road_model) and a road *index*
+# (RoadModel.road_index(road_id)); s outside [0, road length] is clamped.
+
+SPIRAL_NODES = 16       # Gauss-Legendre nodes for the spiral (clothoid) integral
+POLY3_SAMPLES = 256     # Arc length table per poly3 record (s -> u)
+
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(SPIRAL_NODES)
+
+def _poly(coeffs: np.ndarray, ds: np.ndarray) -> np.ndarray:
+    """ a + b*ds + c*ds^2 + d*ds^3, one coefficient row per ds. """
+    return coeffs[..., 0] + ds * (coeffs[..., 1] + ds * (coeffs[..., 2] + ds * coeffs[..., 3]))
+
+def _poly_slope(coeffs: np.ndarray, ds: np.ndarray) -> np.ndarray:
+    return coeffs[..., 1] + ds * (2 * coeffs[..., 2] + ds * 3 * coeffs[..., 3])
+
+def _line(x0, y0, h0, ds):
+    return x0 + ds * np.cos(h0), y0 + ds * np.sin(h0), h0
+
+def _arc(x0, y0, h0, ds, curvature):
+    straight = np.abs(curvature) < 1e-12
+    k = np.where(straight, 1.0, curvature)
+    hdg = h0 + curvature * ds
+    x = np.where(straight, x0 + ds * np.cos(h0), x0 + (np.sin(hdg) - np.sin(h0)) / k)
+    y = np.where(straight, y0 + ds * np.sin(h0), y0 - (np.cos(hdg) - np.cos(h0)) / k)
+    return x, y, hdg
+
+def _spiral(x0, y0, h0, ds, curv_start, curv_end, length):
+    # Heading is quadratic in the distance travelled: h(u) = h0 + k0*u + dk*u^2/2
+    dk = (curv_end - curv_start) / np.where(length > 0, length, 1.0)
+    half = ds / 2
+    u = half[:, None] * (_GL_NODES + 1)                                 # (n, nodes) in [0, ds]
+    theta = h0[:, None] + curv_start[:, None] * u + dk[:, None] * u * u / 2
+    x = x0 + half * (np.cos(theta) @ _GL_WEIGHTS)
+    y = y0 + half * (np.sin(theta) @ _GL_WEIGHTS)
+    return x, y, h0 + curv_start * ds + dk * ds * ds / 2
+
+def _local_to_world(x0, y0, h0, u, v):
+    cos_h, sin_h = np.cos(h0), np.sin(h0)
+    return x0 + u * cos_h - v * sin_h, y0 + u * sin_h + v * cos_h
+
+def _evaluate(geom: np.ndarray, params: np.ndarray, ds: np.ndarray):
+    """ Position / heading at distance ds into each geometry row (one row per sample). """
+    x0, y0, h0 = geom[:, GEOM_X], geom[:, GEOM_Y], geom[:, GEOM_HDG]
+    g_type = geom[:, GEOM_TYPE].astype(np.int64)
+    x, y, hdg = _line(x0, y0, h0, ds)
+    hdg = np.array(hdg, dtype=np.float64, copy=True)
+
+    sel = g_type == ARC
+    if sel.any():
+        x[sel], y[sel], hdg[sel] = _arc(x0[sel], y0[sel], h0[sel], ds[sel], params[sel, 0])
+
+    sel = g_type == SPIRAL
+    if sel.any():
+        x[sel], y[sel], hdg[sel] = _spiral(x0[sel], y0[sel], h0[sel], ds[sel], params[sel, 0], params[sel, 1], geom[sel, GEOM_LENGTH])
+
+    sel = g_type == POLY3
+    if sel.any():
+        u = _poly3_u(geom[sel, GEOM_LENGTH], params[sel, :4], ds[sel])
+        v = _poly(params[sel, :4], u)
+        x[sel], y[sel] = _local_to_world(x0[sel], y0[sel], h0[sel], u, v)
+        hdg[sel] = h0[sel] + np.arctan(_poly_slope(params[sel, :4], u))
+
+    sel = g_type == PARAM_POLY3
+    if sel.any():
+        p_params = params[sel]
+        p = np.where(p_params[:, 8] > 0, ds[sel] / np.where(geom[sel, GEOM_LENGTH] > 0, geom[sel, GEOM_LENGTH], 1.0), ds[sel])
+        u, v = _poly(p_params[:, 0:4], p), _poly(p_params[:, 4:8], p)
+        x[sel], y[sel] = _local_to_world(x0[sel], y0[sel], h0[sel], u, v)
+        hdg[sel] = h0[sel] + np.arctan2(_poly_slope(p_params[:, 4:8], p), _poly_slope(p_params[:, 0:4], p))
+
+    return x, y, hdg
+
+def _poly3_u(lengths: np.ndarray, coeffs: np.ndarray, ds: np.ndarray) -> np.ndarray:
+    """ Local u reached after arc length ds along v = a + b*u + c*u^2 + d*u^3 (per sample). """
+    u = np.empty_like(ds)
+    # One arc length table per distinct record; samples of the same record share it
+    records, inverse = np.unique(np.column_stack([lengths, coeffs]), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    for r, record in enumerate(records):
+        length, abcd = record[0], record[1:]
+        grid = np.linspace(0.0, max(length, 1e-9), POLY3_SAMPLES) # u <= s, so u in [0, length]
+        arc = np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(grid), np.diff(_poly(abcd, grid))))])
+        mask = inverse == r
+        u[mask] = np.interp(ds[mask], arc, grid)
+    return u
+
+def reference_line(model: RoadModel, road: int, s) -> tuple:
+    """
+    Road reference line at every s (array_like) of road index `road`.
+    -> (x, y, hdg) arrays.
+    """
+    s = np.clip(np.asarray(s, dtype=np.float64).reshape(-1), 0.0, model.lengths[road])
+    geom, params = model.geometries(road)
+    if not len(geom):
+        raise ValueError(f"Road {model.road_ids[road]} has no planView geometry.")
+    row = np.clip(np.searchsorted(geom[:, GEOM_S], s, side="right") - 1, 0, len(geom) - 1)
+    ds = np.clip(s - geom[row, GEOM_S], 0.0, geom[row, GEOM_LENGTH])
+    return _evaluate(geom[row], params[row], ds)
+
+def center_offset(model: RoadModel, road: int, s: np.ndarray) -> np.ndarray:
+    """ <laneOffset> (lateral shift of the center lane) at every s. """
+    start, stop = model.center_offset_offsets[road], model.center_offset_offsets[road + 1]
+    if start == stop:
+        return np.zeros_like(s)
+    records = model.center_offsets[start:stop]
+    row = np.clip(np.searchsorted(records[:, POLY_S], s, side="right") - 1, 0, len(records) - 1)
+    return _poly(records[row, POLY_A:], s - records[row, POLY_S])
+
+def _lane_width(model: RoadModel, lane: int, ds: np.ndarray) -> np.ndarray:
+    """ Width of lane row `lane` at ds metres into its lane section. """
+    start, stop = model.width_offsets[lane], model.width_offsets[lane + 1]
+    if start == stop:
+        return np.zeros_like(ds)
+    records = model.lane_widths[start:stop]
+    row = np.clip(np.searchsorted(records[:, POLY_S], ds, side="right") - 1, 0, len(records) - 1)
+    return _poly(records[row, POLY_A:], ds - records[row, POLY_S])
+
+def lane_t(model: RoadModel, road: int, s, lane_id: int, offset=0.0) -> np.ndarray:
+    """
+    Lateral position (t, positive to the left) of the center of `lane_id` at every s,
+    plus `offset` within the lane (positive to the left). Lane 0 is the center line.
+    A lane missing from a lane section contributes nothing there.
+    """
+    s = np.clip(np.asarray(s, dtype=np.float64).reshape(-1), 0.0, model.lengths[road])
+    t = center_offset(model, road, s) + offset
+    if lane_id == 0:
+        return t
+
+    first, last = model.section_offsets[road], model.section_offsets[road + 1]
+    section_s = model.section_s[first:last]
+    if not len(section_s):
+        return t
+    section = first + np.clip(np.searchsorted(section_s, s, side="right") - 1, 0, len(section_s) - 1)
+
+    side = 1 if lane_id > 0 else -1
+    for sec in np.unique(section):
+        on_section = section == sec
+        ds = s[on_section] - model.section_s[sec]
+        shift = np.zeros_like(ds)
+        for lane in range(model.lane_offsets[sec], model.lane_offsets[sec + 1]):
+            other = int(model.lane_ids[lane])
+            if other * side <= 0 or abs(other) > abs(lane_id):
+                continue
+            width = _lane_width(model, lane, ds)
+            shift += width / 2 if other == lane_id else width
+        t[on_section] += side * shift
+    return t
+
+def lane_to_world(model: RoadModel, road: int, s, lane_id: int, offset=0.0) -> tuple:
+    """ (road index, s[], lane, offset) -> world (x, y, hdg) arrays, the way esmini places a LanePosition. """
+    s = np.asarray(s, dtype=np.float64).reshape(-1)
+    x, y, hdg = reference_line(model, road, s)
+    t = lane_t(model, road, s, lane_id, offset)
+    return x - t * np.sin(hdg), y + t * np.cos(hdg), hdg
+
+def road_width(model: RoadModel, road: int, s) -> tuple:
+    """ -> (left, right) extent of the outermost lanes from the reference line at every s (both >= 0). """
+    s = np.clip(np.asarray(s, dtype=np.float64).reshape(-1), 0.0, model.lengths[road])
+    first, last = model.section_offsets[road], model.section_offsets[road + 1]
+    left, right = np.zeros_like(s), np.zeros_like(s)
+    if first == last:
+        return left, right
+    section = first + np.clip(np.searchsorted(model.section_s[first:last], s, side="right") - 1, 0, last - first - 1)
+    for sec in np.unique(section):
+        on_section = section == sec
+        ds = s[on_section] - model.section_s[sec]
+        for lane in range(model.lane_offsets[sec], model.lane_offsets[sec + 1]):
+            width = _lane_width(model, lane, ds)
+            if model.lane_ids[lane] > 0:
+                left[on_section] += width
+            else:
+                right[on_section] += width
+    shift = center_offset(model, road, s)
+    return np.maximum(left + shift, 0.0), np.maximum(right - shift, 0.0)
+
+def reference_polyline(model: RoadModel, road: int, step: float = 5.0) -> tuple:
+    """
+    Reference line sampled every `step` metres plus at each geometry start and end and the road end.
+    -> (s, x, y, hdg) arrays, empty for a road without geometry.
+    """
+    geom, _ = model.geometries(road)
+    if not len(geom):
+        empty = np.empty(0)
+        return empty, empty, empty, empty
+    length = model.lengths[road]
+    # Just before the next start: where a geometry ends (records don't always join up exactly)
+    ends = np.nextafter(geom[1:, GEOM_S], -np.inf)
+    s = np.unique(np.concatenate([np.arange(0.0, length, step), geom[:, GEOM_S], ends, [length]]))
+    return (s, *reference_line(model, road, s))
+
+def road_bounds(model: RoadModel, step: float = 5.0, include_lanes: bool = True) -> np.ndarray:
+    """
+    Axis-aligned bounding box of every road: (roads, 4) array of xmin, ymin, xmax, ymax.
+    Taken over reference_polyline(step); with `include_lanes` the outer lane edges are
+    sampled too. NaN for roads without geometry.
+    """
+    bounds = np.full((len(model), 4), np.nan)
+    for road in range(len(model)):
+        s, x, y, hdg = reference_polyline(model, road, step)
+        if not len(s):
+            continue
+        xs, ys = [x], [y]
+        if include_lanes:
+            left, right = road_width(model, road, s)
+            normal_x, normal_y = -np.sin(hdg), np.cos(hdg)
+            xs += [x + left * normal_x, x - right * normal_x]
+            ys += [y + left * normal_y, y - right * normal_y]
+        xs, ys = np.concatenate(xs), np.concatenate(ys)
+        bounds[road] = xs.min(), ys.min(), xs.max(), ys.max()
+    return bounds
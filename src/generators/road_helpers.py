@@ -1,4 +1,5 @@
 import xml.etree.ElementTree as ET
+from src.generators.road_index import RoadIndex
 
 def get_lanesection_ids(lane_element, all_types: bool = False):
     """
@@ -57,7 +58,7 @@ def get_first_last_road_geom(planview_element: ET.Element) -> tuple:
     
     return first_geom, last_geom
 
-def get_roads_within_bounds(road_dict: dict, location: tuple, boundaries: tuple, condition: str = "start_and_stop") -> list:
+def get_roads_within_bounds(road_dict, location: tuple, boundaries: tuple, condition: str = "start_and_stop") -> list:
     """
     Identifies roads within a specified boundary region based on their start and stop coordinates.
 
@@ -67,9 +68,11 @@ def get_roads_within_bounds(road_dict: dict, location: tuple, boundaries: tuple,
     coordinates of the road.
 
     Parameters:
-        road_dict (dict): A dictionary containing road data, where each road entry 
+        road_dict (dict | RoadIndex): A dictionary containing road data, where each road entry 
                           includes "first_geom" and "last_geom" as (x, y) coordinate 
-                          tuples.
+                          tuples. A RoadIndex (road_index.load_road_index) answers the same 
+                          query from its grid instead of scanning every road; junction 
+                          roads are skipped, like in parse_road's default dict.
         location (tuple[float, float]): The central point (x, y) around which the boundary is defined.
         boundaries (tuple[float, float]): The (x, y) offsets from the location, defining 
                                           the rectangular boundary region.
@@ -82,12 +85,15 @@ def get_roads_within_bounds(road_dict: dict, location: tuple, boundaries: tuple,
     Returns:
         list[str]: A list of road keys that satisfy the boundary condition.
     """
+    if isinstance(road_dict, RoadIndex):
+        return road_dict.within_bounds(location, boundaries, condition)
+
     loc_max = (location[0]+boundaries[0], location[1]+boundaries[1])
     loc_min = (location[0]-boundaries[0], location[1]-boundaries[1])
 
     roads_within_bounds = []
     for road in road_dict:
-        if road in ["total_road_length", "drivable_lanes_length"]: # Ignore these 2 summary keys
+        if not isinstance(road_dict[road], dict): # Summary keys (total_road_length, ...)
             continue
         road_start = road_dict[road]["first_geom"]
         road_stop = road_dict[road]["last_geom"]
@@ -129,6 +135,8 @@ def slice_road(tree: ET.ElementTree, roads_to_keep: list, output: str) -> None:
 
     Returns:
         None: The function modifies the XML tree in place and writes the changes to `output`.
+
+    For slicing a map file around a point without loading it whole, see roi_slicer.load_roi_map.
     """
     root = tree.getroot()
     road_elem = root.findall('road')
@@ -150,7 +158,7 @@ def slice_road(tree: ET.ElementTree, roads_to_keep: list, output: str) -> None:
         num_connections = len(connections)
         if connections:
             for connection in connections:
-                if int(connection.get("incomingRoad")) in removed_roads or int(connection.get("connectingRoad") in removed_roads):
+                if int(connection.get("incomingRoad")) in removed_roads or int(connection.get("connectingRoad")) in removed_roads:
                     junc.remove(connection)
                     removed_connections += 1
 
@@ -0,0 +1,231 @@
+# src/generators/road_index.py
+import os
+import logging
+import threading
+import numpy as np
+from src.core.config import settings
+from src.generators import road_geometry
+from src.generators.road_model import RoadModel, load_road_model, _disk_path, _load_from_disk, _save_to_disk
+
+logger = logging.getLogger(__name__)
+
+# Spatial index over the roads of one map, for "which roads are in this box" queries.
+# Start / stop points, accurate road boxes (road_geometry.road_bounds) and the sampled
+# reference line of every road go into a uniform grid (CSR: one sorted slice of road
+# indices per cell), so a query only looks at the roads in the cells it touches.
+# Built once per cached map and pickled next to the road model.
+
+ROAD_INDEX_VERSION = 2 # Bump when the layout changes, invalidates pickled indexes
+POLYLINE_STEP = 5.0    # Reference line sampling (m) for road boxes and segment queries
+
+CONDITIONS = ("start_and_stop", "start_or_stop", "start", "stop")
+
+class _Grid:
+    """ Boxes (xmin, ymin, xmax, ymax) bucketed into every cell they touch. """
+    __slots__ = ("origin", "cell", "shape", "offsets", "items")
+
+    def __init__(self, boxes: np.ndarray, origin: tuple, cell: float, shape: tuple):
+        self.origin, self.cell, self.shape = origin, cell, shape
+        nx, ny = shape
+        items = np.flatnonzero(~np.isnan(boxes).any(axis=1))
+        ix0, iy0 = self._cells(boxes[items, 0], boxes[items, 1])
+        ix1, iy1 = self._cells(boxes[items, 2], boxes[items, 3])
+        width = ix1 - ix0 + 1
+        counts = width * (iy1 - iy0 + 1)
+        # One (cell, item) pair per cell a box touches
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        width = np.repeat(width, counts)
+        cell_ids = (np.repeat(iy0, counts) + k // width) * nx + np.repeat(ix0, counts) + k % width
+        order = np.argsort(cell_ids, kind="stable") # Stable: items stay ascending within a cell
+        self.items = np.repeat(items, counts)[order]
+        self.offsets = np.searchsorted(cell_ids[order], np.arange(nx * ny + 1))
+
+    def _cells(self, x, y) -> tuple:
+        nx, ny = self.shape
+        ix = np.clip(np.floor((np.asarray(x) - self.origin[0]) / self.cell), 0, nx - 1).astype(np.int64)
+        iy = np.clip(np.floor((np.asarray(y) - self.origin[1]) / self.cell), 0, ny - 1).astype(np.int64)
+        return ix, iy
+
+    def candidates(self, xmin: float, ymin: float, xmax: float, ymax: float) -> np.ndarray:
+        """ Sorted, unique items in the cells touching the box (a superset of the hits). """
+        nx, ny = self.shape
+        x0, y0 = self.origin
+        if xmin > xmax or ymin > ymax or xmax < x0 or ymax < y0 or xmin > x0 + nx * self.cell or ymin > y0 + ny * self.cell:
+            return np.empty(0, dtype=np.int64)
+        (ix0, ix1), (iy0, iy1) = self._cells([xmin, xmax], [ymin, ymax])
+        # Cells of one grid row are contiguous, so each row is a single slice
+        rows = [self.items[self.offsets[iy * nx + ix0]:self.offsets[iy * nx + ix1 + 1]] for iy in range(iy0, iy1 + 1)]
+        return np.unique(np.concatenate(rows))
+
+def _segments_hit_box(x0, y0, x1, y1, box) -> np.ndarray:
+    """ Liang-Barsky: which segments (x0, y0)-(x1, y1) touch the closed box. """
+    xmin, ymin, xmax, ymax = box
+    dx, dy = x1 - x0, y1 - y0
+    t_in, t_out = np.zeros_like(x0), np.ones_like(x0)
+    hit = np.ones(len(x0), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, x0 - xmin), (dx, xmax - x0), (-dy, y0 - ymin), (dy, ymax - y0)):
+            parallel = p == 0
+            hit &= ~(parallel & (q < 0))
+            r = q / p
+            t_in = np.where(~parallel & (p < 0), np.maximum(t_in, r), t_in)
+            t_out = np.where(~parallel & (p > 0), np.minimum(t_out, r), t_out)
+    return hit & (t_in <= t_out)
+
+class RoadIndex:
+    """
+    Roads of one map by position. Road indices follow RoadModel order (file order), and
+    queries return road ids in that order, like road_helpers.get_roads_within_bounds.
+    """
+
+    def __init__(self, model: RoadModel, step: float = POLYLINE_STEP):
+        self.path = model.path
+        self.road_ids = model.road_ids.copy()
+        self.junctions = model.junctions != -1
+        self.starts = model.first_geom.copy()
+        self.stops = model.last_geom.copy()
+        self.bounds = road_geometry.road_bounds(model, step=step)
+
+        polylines = [road_geometry.reference_polyline(model, road, step) for road in range(len(model))]
+        self.polyline_offsets = np.concatenate([[0], np.cumsum([len(p[0]) for p in polylines])]).astype(np.int64)
+        self.polyline = np.column_stack([
+            np.concatenate([p[1] for p in polylines] + [np.empty(0)]),
+            np.concatenate([p[2] for p in polylines] + [np.empty(0)]),
+        ])
+
+        # One grid for all three layers; about one road per cell
+        known = np.concatenate([self.starts, self.stops, self.bounds[:, :2], self.bounds[:, 2:]])
+        known = known[~np.isnan(known).any(axis=1)]
+        if len(known):
+            lo, hi = known.min(axis=0), known.max(axis=0)
+        else:
+            lo, hi = np.zeros(2), np.ones(2)
+        extent = np.maximum(hi - lo, 1.0)
+        cell = max(float(np.sqrt(extent[0] * extent[1] / max(len(model), 1))), 1.0)
+        shape = (int(extent[0] // cell) + 1, int(extent[1] // cell) + 1)
+        origin = (float(lo[0]), float(lo[1]))
+        self._starts = _Grid(np.hstack([self.starts, self.starts]), origin, cell, shape)
+        self._stops = _Grid(np.hstack([self.stops, self.stops]), origin, cell, shape)
+        self._bounds = _Grid(self.bounds, origin, cell, shape)
+
+    def __len__(self):
+        return len(self.road_ids)
+
+    def _ids(self, roads: np.ndarray, junctions: bool) -> list:
+        if not junctions:
+            roads = roads[~self.junctions[roads]]
+        return self.road_ids[roads].tolist()
+
+    def within_bounds(self, location: tuple, boundaries: tuple, condition: str = "start_and_stop", junctions: bool = False) -> list:
+        """
+        Road ids whose first / last geometry point lies strictly inside location +- boundaries,
+        per `condition` (see road_helpers.get_roads_within_bounds). Junction roads only if asked.
+        """
+        if condition not in CONDITIONS:
+            logger.warning(f"Not valid condition {condition}, using start_and_stop")
+            condition = "start_and_stop"
+        xmin, ymin = location[0] - boundaries[0], location[1] - boundaries[1]
+        xmax, ymax = location[0] + boundaries[0], location[1] + boundaries[1]
+
+        if condition in ("start", "start_and_stop"):
+            roads = self._starts.candidates(xmin, ymin, xmax, ymax)
+        elif condition == "stop":
+            roads = self._stops.candidates(xmin, ymin, xmax, ymax)
+        else:
+            roads = np.union1d(self._starts.candidates(xmin, ymin, xmax, ymax), self._stops.candidates(xmin, ymin, xmax, ymax))
+
+        def inside(points):
+            p = points[roads]
+            return (p[:, 0] < xmax) & (p[:, 0] > xmin) & (p[:, 1] < ymax) & (p[:, 1] > ymin)
+
+        if condition == "start":
+            keep = inside(self.starts)
+        elif condition == "stop":
+            keep = inside(self.stops)
+        elif condition == "start_or_stop":
+            keep = inside(self.starts) | inside(self.stops)
+        else:
+            keep = inside(self.starts) & inside(self.stops)
+        return self._ids(roads[keep], junctions)
+
+    def intersecting(self, location: tuple, boundaries: tuple, junctions: bool = False, exact: bool = True) -> list:
+        """
+        Road ids whose reference line passes through the box location +- boundaries (edges included).
+        exact=False: every road whose box (lanes included) overlaps the query box.
+        """
+        box = (location[0] - boundaries[0], location[1] - boundaries[1], location[0] + boundaries[0], location[1] + boundaries[1])
+        roads = self._overlapping(box)
+        if not exact or not len(roads):
+            return self._ids(roads, junctions)
+
+        owner, p0, p1 = self._segments(roads)
+        hit = _segments_hit_box(p0[:, 0], p0[:, 1], p1[:, 0], p1[:, 1], box)
+        return self._ids(np.unique(owner[hit]), junctions)
+
+    def within_radius(self, location: tuple, radius: float, junctions: bool = False) -> list:
+        """ Road ids whose reference line comes within `radius` of location. """
+        roads = self._overlapping((location[0] - radius, location[1] - radius, location[0] + radius, location[1] + radius))
+        if not len(roads):
+            return []
+        owner, p0, p1 = self._segments(roads)
+        # Distance from location to each segment (projection clamped to the segment)
+        d = p1 - p0
+        rel = np.asarray(location, dtype=np.float64) - p0
+        length_sq = (d * d).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = np.clip(np.where(length_sq > 0, (rel * d).sum(axis=1) / length_sq, 0.0), 0.0, 1.0)
+        near = np.hypot(*(rel - u[:, None] * d).T) <= radius
+        return self._ids(np.unique(owner[near]), junctions)
+
+    def _overlapping(self, box: tuple) -> np.ndarray:
+        """ Indices of the roads whose box overlaps `box` (xmin, ymin, xmax, ymax). """
+        roads = self._bounds.candidates(*box)
+        b = self.bounds[roads]
+        return roads[(b[:, 0] <= box[2]) & (b[:, 2] >= box[0]) & (b[:, 1] <= box[3]) & (b[:, 3] >= box[1])]
+
+    def _segments(self, roads: np.ndarray) -> tuple:
+        """ (owner road, p0, p1) for every reference line segment of `roads`; a one point line is one empty segment. """
+        first, last = self.polyline_offsets[roads], self.polyline_offsets[roads + 1]
+        points = last - first
+        counts = np.where(points > 1, points - 1, points)
+        starts = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        ends = np.minimum(starts + 1, np.repeat(last - 1, counts))
+        return np.repeat(roads, counts), self.polyline[starts], self.polyline[ends]
+
+def build_road_index(roadfile: str) -> RoadIndex:
+    return RoadIndex(load_road_model(roadfile))
+
+# --- CACHE ---
+# Same scheme as road_model: path -> (mtime_ns, size, RoadIndex) in memory, pickles in ROAD_CACHE_DIR
+_indexes = {}
+_lock = threading.Lock()
+stats = {"memory_hits": 0, "disk_hits": 0, "builds": 0}
+
+def load_road_index(roadfile: str) -> RoadIndex:
+    """ Cached RoadIndex of an .xodr (built from the cached RoadModel on a miss). """
+    stat = os.stat(roadfile)
+    key = os.path.abspath(roadfile)
+    cached = _indexes.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        stats["memory_hits"] += 1
+        return cached[2]
+
+    with _lock:
+        disk_path = _disk_path(roadfile, stat.st_mtime_ns, stat.st_size, f".index{ROAD_INDEX_VERSION}.pkl") if settings.ROAD_CACHE_DIR else None
+        index = _load_from_disk(disk_path) if disk_path else None
+        if index is not None:
+            stats["disk_hits"] += 1
+        else:
+            index = build_road_index(roadfile)
+            stats["builds"] += 1
+            if disk_path:
+                try:
+                    _save_to_disk(disk_path, index)
+                except OSError as e:
+                    logger.warning(f"Could not write road index cache {disk_path}: {e}")
+        _indexes[key] = (stat.st_mtime_ns, stat.st_size, index)
+    return index
+
+def clear_road_indexes():
+    """ Drops the in-memory cache (the pickles in ROAD_CACHE_DIR stay). """
+    _indexes.clear()
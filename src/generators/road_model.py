@@ -0,0 +1,282 @@
+# src/generators/road_model.py
+import os
+import pickle
+import hashlib
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+import numpy as np
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Compact, array-backed OpenDRIVE road model.
+# Parsed once per (file, mtime, size), kept in memory and pickled to ROAD_CACHE_DIR so
+# other processes (compile pool workers, restarts) never parse the XML again.
+# Per road / section / lane / geometry data lives in flat numpy arrays; `*_offsets`
+# arrays (CSR style) say which slice belongs to which parent.
+
+ROAD_MODEL_VERSION = 3 # Bump when the layout changes, invalidates pickled models
+
+DRIVABLE_LANE_TYPES = ("driving", "offRamp", "onRamp")
+
+# Geometry type codes (geometry[:, GEOM_TYPE])
+LINE, ARC, SPIRAL, POLY3, PARAM_POLY3 = range(5)
+GEOMETRY_TYPES = {"line": LINE, "arc": ARC, "spiral": SPIRAL, "poly3": POLY3, "paramPoly3": PARAM_POLY3}
+# Columns of `geometry`
+GEOM_S, GEOM_X, GEOM_Y, GEOM_HDG, GEOM_LENGTH, GEOM_TYPE = range(6)
+# Columns of `geometry_params`, by type:
+#   arc: curvature | spiral: curvStart, curvEnd | poly3: a, b, c, d
+#   paramPoly3: aU, bU, cU, dU, aV, bV, cV, dV, normalized (1.0 = pRange "normalized")
+GEOMETRY_PARAMS = {
+    ARC: ("curvature",),
+    SPIRAL: ("curvStart", "curvEnd"),
+    POLY3: ("a", "b", "c", "d"),
+    PARAM_POLY3: ("aU", "bU", "cU", "dU", "aV", "bV", "cV", "dV"),
+}
+N_GEOMETRY_PARAMS = 9
+
+LEFT, RIGHT = 1, -1 # lane_side values (the center lane carries no width and is not stored)
+
+# Columns of `lane_widths` / `center_offsets` (cubic polynomial records)
+POLY_S, POLY_A, POLY_B, POLY_C, POLY_D = range(5)
+
+@dataclass(slots=True)
+class RoadModel:
+    path: str
+    road_ids: np.ndarray          # (roads,) int
+    lengths: np.ndarray           # (roads,) float
+    junctions: np.ndarray         # (roads,) int, -1 = not a junction road
+    first_geom: np.ndarray        # (roads, 2) x, y of the first geometry (NaN if none)
+    last_geom: np.ndarray         # (roads, 2) x, y of the last geometry
+    geometry_offsets: np.ndarray  # (roads + 1,) into geometry
+    geometry: np.ndarray          # (geometries, 6) s, x, y, hdg, length, type
+    geometry_params: np.ndarray   # (geometries, 9) see GEOMETRY_PARAMS
+    section_offsets: np.ndarray   # (roads + 1,) into section_s
+    section_s: np.ndarray         # (sections,) start s of each lane section
+    lane_offsets: np.ndarray      # (sections + 1,) into lane_ids
+    lane_ids: np.ndarray          # (lanes,) int, left lanes then right lanes, file order
+    lane_side: np.ndarray         # (lanes,) LEFT / RIGHT
+    lane_drivable: np.ndarray     # (lanes,) bool, type in DRIVABLE_LANE_TYPES
+    width_offsets: np.ndarray     # (lanes + 1,) into lane_widths
+    lane_widths: np.ndarray       # (widths, 5) sOffset (from the section start), a, b, c, d
+    center_offset_offsets: np.ndarray  # (roads + 1,) into center_offsets
+    center_offsets: np.ndarray    # (records, 5) <laneOffset> s, a, b, c, d
+    junction_ids: np.ndarray      # (junctions,) int
+    connection_offsets: np.ndarray  # (junctions + 1,) into connections
+    connections: np.ndarray       # (connections, 2) incomingRoad, connectingRoad
+
+    def __len__(self):
+        return len(self.road_ids)
+
+    def road_index(self, road_id: int) -> int:
+        hits = np.flatnonzero(self.road_ids == road_id)
+        if not len(hits):
+            raise KeyError(road_id)
+        return int(hits[0])
+
+    def geometries(self, index: int):
+        """ -> (geometry rows, param rows) of road `index`. """
+        start, stop = self.geometry_offsets[index], self.geometry_offsets[index + 1]
+        return self.geometry[start:stop], self.geometry_params[start:stop]
+
+    def section_lanes(self, section: int, all_types: bool = False) -> np.ndarray:
+        start, stop = self.lane_offsets[section], self.lane_offsets[section + 1]
+        ids = self.lane_ids[start:stop]
+        return ids if all_types else ids[self.lane_drivable[start:stop]]
+
+    def road_lanes(self, index: int, all_types: bool = False) -> list:
+        """
+        Lane ids of a road as road_helpers.get_lanesection_ids reports them: for each side,
+        the lanes of the first lane section that has that side.
+        """
+        lane_ids = []
+        for side in (LEFT, RIGHT):
+            for section in range(self.section_offsets[index], self.section_offsets[index + 1]):
+                start, stop = self.lane_offsets[section], self.lane_offsets[section + 1]
+                on_side = self.lane_side[start:stop] == side
+                if on_side.any():
+                    keep = on_side if all_types else on_side & self.lane_drivable[start:stop]
+                    lane_ids += self.lane_ids[start:stop][keep].tolist()
+                    break
+        return lane_ids
+
+    def roads(self, junctions: bool = False, all_lane_types: bool = False):
+        """ Yields (road_id, length, lane_ids) in file order, skipping junction roads unless asked. """
+        for index in range(len(self.road_ids)):
+            if self.junctions[index] != -1 and not junctions:
+                continue
+            yield int(self.road_ids[index]), float(self.lengths[index]), self.road_lanes(index, all_lane_types)
+
+    def to_road_dict(self, junctions: bool = False, all_lane_types: bool = False) -> dict:
+        """ The dict road_helpers.parse_road returns (summary keys first, then one entry per road). """
+        road_dict = {"total_road_length": 0.0, "drivable_lanes_length": 0.0}
+        for index in range(len(self.road_ids)):
+            if self.junctions[index] != -1 and not junctions:
+                continue
+            lanes = self.road_lanes(index, all_lane_types)
+            length = float(self.lengths[index])
+            road_dict[int(self.road_ids[index])] = {
+                "first_geom": tuple(self.first_geom[index].tolist()),
+                "last_geom": tuple(self.last_geom[index].tolist()),
+                "length": length,
+                "lane_ids": lanes,
+            }
+            road_dict["total_road_length"] += length
+            road_dict["drivable_lanes_length"] += length * len(lanes)
+        return road_dict
+
+def _float(element, name: str, default: float = 0.0) -> float:
+    value = element.get(name)
+    return float(value) if value is not None else default
+
+def build_road_model(roadfile: str) -> RoadModel:
+    """ One pass over the .xodr; every road is kept (junction roads included). """
+    root = ET.parse(roadfile).getroot()
+
+    road_ids, lengths, junctions, first_geom, last_geom = [], [], [], [], []
+    geometry, geometry_params, geometry_offsets = [], [], [0]
+    section_s, section_offsets = [], [0]
+    lane_ids, lane_side, lane_drivable, lane_offsets = [], [], [], [0]
+    lane_widths, width_offsets = [], [0]
+    center_offsets, center_offset_offsets = [], [0]
+    junction_ids, connections, connection_offsets = [], [], [0]
+
+    for road in root.iter("road"):
+        road_ids.append(int(road.get("id")))
+        lengths.append(_float(road, "length"))
+        junctions.append(int(road.get("junction", "-1")))
+
+        geoms = road.findall("planView/geometry")
+        for geom in geoms:
+            record = [_float(geom, "s"), _float(geom, "x"), _float(geom, "y"), _float(geom, "hdg"), _float(geom, "length"), LINE]
+            params = [0.0] * N_GEOMETRY_PARAMS
+            for child in geom:
+                g_type = GEOMETRY_TYPES.get(child.tag)
+                if g_type is None:
+                    continue
+                record[GEOM_TYPE] = g_type
+                for col, name in enumerate(GEOMETRY_PARAMS.get(g_type, ())):
+                    params[col] = _float(child, name)
+                if g_type == PARAM_POLY3:
+                    params[8] = 1.0 if child.get("pRange") == "normalized" else 0.0
+                break
+            geometry.append(record)
+            geometry_params.append(params)
+        geometry_offsets.append(len(geometry))
+        if geoms:
+            first_geom.append((_float(geoms[0], "x"), _float(geoms[0], "y")))
+            last_geom.append((_float(geoms[-1], "x"), _float(geoms[-1], "y")))
+        else:
+            first_geom.append((np.nan, np.nan))
+            last_geom.append((np.nan, np.nan))
+
+        for record in road.findall("lanes/laneOffset"):
+            center_offsets.append([_float(record, k) for k in ("s", "a", "b", "c", "d")])
+        center_offset_offsets.append(len(center_offsets))
+
+        for section in road.findall("lanes/laneSection"):
+            section_s.append(_float(section, "s"))
+            for tag, side in (("left", LEFT), ("right", RIGHT)):
+                for lane in section.findall(f"{tag}/lane"):
+                    lane_ids.append(int(lane.get("id")))
+                    lane_side.append(side)
+                    lane_drivable.append(lane.get("type") in DRIVABLE_LANE_TYPES)
+                    for width in lane.findall("width"):
+                        lane_widths.append([_float(width, k) for k in ("sOffset", "a", "b", "c", "d")])
+                    width_offsets.append(len(lane_widths))
+            lane_offsets.append(len(lane_ids))
+        section_offsets.append(len(section_s))
+
+    for junction in root.iter("junction"):
+        junction_ids.append(int(junction.get("id")))
+        for connection in junction.findall("connection"):
+            connections.append((int(connection.get("incomingRoad")), int(connection.get("connectingRoad"))))
+        connection_offsets.append(len(connections))
+
+    return RoadModel(
+        path=roadfile,
+        road_ids=np.array(road_ids, dtype=np.int64),
+        lengths=np.array(lengths, dtype=np.float64),
+        junctions=np.array(junctions, dtype=np.int64),
+        first_geom=np.array(first_geom, dtype=np.float64).reshape(-1, 2),
+        last_geom=np.array(last_geom, dtype=np.float64).reshape(-1, 2),
+        geometry_offsets=np.array(geometry_offsets, dtype=np.int64),
+        geometry=np.array(geometry, dtype=np.float64).reshape(-1, 6),
+        geometry_params=np.array(geometry_params, dtype=np.float64).reshape(-1, N_GEOMETRY_PARAMS),
+        section_offsets=np.array(section_offsets, dtype=np.int64),
+        section_s=np.array(section_s, dtype=np.float64),
+        lane_offsets=np.array(lane_offsets, dtype=np.int64),
+        lane_ids=np.array(lane_ids, dtype=np.int64),
+        lane_side=np.array(lane_side, dtype=np.int8),
+        lane_drivable=np.array(lane_drivable, dtype=bool),
+        width_offsets=np.array(width_offsets, dtype=np.int64),
+        lane_widths=np.array(lane_widths, dtype=np.float64).reshape(-1, 5),
+        center_offset_offsets=np.array(center_offset_offsets, dtype=np.int64),
+        center_offsets=np.array(center_offsets, dtype=np.float64).reshape(-1, 5),
+        junction_ids=np.array(junction_ids, dtype=np.int64),
+        connection_offsets=np.array(connection_offsets, dtype=np.int64),
+        connections=np.array(connections, dtype=np.int64).reshape(-1, 2),
+    )
+
+# --- CACHE ---
+# path -> (mtime_ns, size, RoadModel); checked with one os.stat per lookup
+_models = {}
+_lock = threading.Lock()
+stats = {"memory_hits": 0, "disk_hits": 0, "parses": 0}
+
+def _disk_path(roadfile: str, mtime_ns: int, size: int, suffix: str = ".pkl") -> str:
+    raw = f"{ROAD_MODEL_VERSION}|{os.path.abspath(roadfile)}|{mtime_ns}|{size}"
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(roadfile))[0]
+    return os.path.join(settings.ROAD_CACHE_DIR, f"{name}-{digest}{suffix}")
+
+def _load_from_disk(path: str):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable road model cache {path}: {e}")
+        return None
+
+def _save_to_disk(path: str, model: RoadModel):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_road_model(roadfile: str) -> RoadModel:
+    """
+    Cached RoadModel of an .xodr: memory, then ROAD_CACHE_DIR, then a parse.
+    An edited file (new mtime or size) is parsed again.
+    """
+    stat = os.stat(roadfile)
+    key = os.path.abspath(roadfile)
+    cached = _models.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        stats["memory_hits"] += 1
+        return cached[2]
+
+    with _lock:
+        disk_path = _disk_path(roadfile, stat.st_mtime_ns, stat.st_size) if settings.ROAD_CACHE_DIR else None
+        model = _load_from_disk(disk_path) if disk_path else None
+        if model is not None:
+            stats["disk_hits"] += 1
+        else:
+            model = build_road_model(roadfile)
+            stats["parses"] += 1
+            if disk_path:
+                try:
+                    _save_to_disk(disk_path, model)
+                except OSError as e:
+                    logger.warning(f"Could not write road model cache {disk_path}: {e}")
+        _models[key] = (stat.st_mtime_ns, stat.st_size, model)
+    return model
+
+def clear_road_models():
+    """ Drops the in-memory cache (the pickles in ROAD_CACHE_DIR stay). """
+    _models.clear()
@@ -0,0 +1,146 @@
+# src/generators/roi_slicer.py
+import os
+import math
+import hashlib
+import logging
+import threading
+import contextlib
+import numpy as np
+from lxml import etree
+from src.core.config import settings
+from src.generators.road_model import load_road_model
+from src.generators.road_index import load_road_index
+
+logger = logging.getLogger(__name__)
+
+# Region of interest maps: the roads of an .xodr around the Ego start, written once per
+# (map, ROI) into ROI_CACHE_DIR so RoadNetwork can point esmini at a small file.
+# Which roads and junctions to keep comes from the cached RoadIndex / RoadModel; the .xodr
+# itself is streamed (lxml iterparse) and never held in memory as a whole tree.
+
+ROI_VERSION = 1 # Bump when the slicing rules change, invalidates sliced maps
+
+def _kept_junctions(model, keep: set) -> set:
+    """ Ids (str) of the junctions with at least one connection between two kept roads. """
+    kept = np.isin(model.connections, list(keep)).all(axis=1)
+    owner = np.repeat(np.arange(len(model.junction_ids)), np.diff(model.connection_offsets))
+    return {str(j) for j in model.junction_ids[np.unique(owner[kept])]}
+
+def _fix_road_links(road, keep: set, junctions: set):
+    """ Drops predecessor / successor links to roads or junctions that are not in the slice. """
+    if road.get("junction", "-1") not in junctions:
+        road.set("junction", "-1")
+    link = road.find("{*}link")
+    if link is None:
+        return
+    for target in list(link):
+        element_type, element_id = target.get("elementType", "road"), target.get("elementId")
+        if (element_type == "junction" and element_id not in junctions) or (element_type == "road" and element_id not in keep):
+            link.remove(target)
+
+def slice_xodr(roadfile: str, roads_to_keep, output: str) -> dict:
+    """
+    Streams `roadfile` into `output` keeping only the roads in `roads_to_keep` (ids).
+    Junction connections that reference a dropped road are removed, junctions left
+    without connections are dropped, and road links to anything dropped are cut.
+    Everything else (header, controllers, ...) is copied as is.
+    -> {"roads": kept roads, "junctions": kept junctions}
+    """
+    keep = {int(road) for road in roads_to_keep}
+    junctions = _kept_junctions(load_road_model(roadfile), keep) | {"-1"}
+    keep = {str(road) for road in keep}
+    written = {"roads": 0, "junctions": 0}
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = f"{output}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f, etree.xmlfile(f, encoding="utf-8") as xf, contextlib.ExitStack() as document:
+        xf.write_declaration()
+        root = None
+        for _, element in etree.iterparse(roadfile, events=("end",), remove_blank_text=True):
+            parent = element.getparent()
+            if parent is None or parent.getparent() is not None:
+                continue # Only complete top level elements (or the root itself)
+            if root is None:
+                root = parent
+                document.enter_context(xf.element(root.tag, dict(root.attrib), nsmap=root.nsmap))
+
+            tag = etree.QName(element).localname
+            if tag == "road":
+                if element.get("id") in keep:
+                    _fix_road_links(element, keep, junctions)
+                    xf.write(element)
+                    written["roads"] += 1
+            elif tag == "junction":
+                if element.get("id") in junctions:
+                    for connection in element.findall("{*}connection"):
+                        if connection.get("incomingRoad") not in keep or connection.get("connectingRoad") not in keep:
+                            element.remove(connection)
+                    xf.write(element)
+                    written["junctions"] += 1
+            else:
+                xf.write(element)
+            # Free it; earlier siblings are already gone, so this is O(1)
+            element.clear()
+            root.remove(element)
+    os.replace(tmp_path, output)
+    return written
+
+# --- CACHE ---
+# ROI key -> sliced file; the file name is derived from the key, so other processes find it too
+_slices = {}
+_lock = threading.Lock()
+stats = {"memory_hits": 0, "disk_hits": 0, "slices": 0, "full_maps": 0}
+
+def roi(center: tuple, radius: float = None) -> tuple:
+    """
+    (x, y, radius) of the ROI used for an Ego start at `center`. The center is snapped to a
+    ROI_SNAP grid (so nearby starts share one map) and the radius grown to still cover `center`.
+    """
+    radius = settings.ROI_RADIUS if radius is None else radius
+    snap = settings.ROI_SNAP
+    if snap <= 0:
+        return float(center[0]), float(center[1]), float(radius)
+    x, y = round(center[0] / snap) * snap, round(center[1] / snap) * snap
+    return float(x), float(y), float(radius + snap * math.sqrt(2) / 2)
+
+def _roi_path(roadfile: str, stat, key: tuple) -> str:
+    raw = f"{ROI_VERSION}|{os.path.abspath(roadfile)}|{stat.st_mtime_ns}|{stat.st_size}|{key}"
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(roadfile))[0]
+    return os.path.join(settings.ROI_CACHE_DIR, f"{name}-roi-{digest}.xodr")
+
+def load_roi_map(roadfile: str, center: tuple, radius: float = None, required=()) -> str:
+    """
+    Path of `roadfile` cut to the roads within `radius` (default ROI_RADIUS) of `center`,
+    plus the `required` road ids (the roads the actors are placed on). Sliced once per
+    (map, ROI), see roi(). Returns `roadfile` itself when the ROI covers every road.
+    """
+    stat = os.stat(roadfile)
+    x, y, r = roi(center, radius)
+    key = (x, y, r, tuple(sorted(int(road) for road in required)))
+    memory_key = (os.path.abspath(roadfile), stat.st_mtime_ns, stat.st_size, key)
+    path = _slices.get(memory_key)
+    if path is not None:
+        stats["memory_hits"] += 1
+        return path
+
+    with _lock:
+        path = _roi_path(roadfile, stat, key)
+        if os.path.exists(path):
+            stats["disk_hits"] += 1
+        else:
+            index = load_road_index(roadfile)
+            keep = set(index.within_radius((x, y), r, junctions=True)) | set(key[3])
+            if len(keep) >= len(index):
+                stats["full_maps"] += 1
+                path = roadfile
+            else:
+                written = slice_xodr(roadfile, keep, path)
+                stats["slices"] += 1
+                logger.info(f"Sliced {os.path.basename(roadfile)} to {written['roads']}/{len(index)} roads around ({x:.0f}, {y:.0f}) r={r:.0f} m")
+        _slices[memory_key] = path
+    return path
+
+def clear_roi_maps():
+    """ Drops the in-memory cache (the sliced files in ROI_CACHE_DIR stay). """
+    _slices.clear()
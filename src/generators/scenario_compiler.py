@@ -1,9 +1,25 @@
 # src/generators/scenario_compiler.py
+import io
 import os
+import copy
 import random
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
 import logging
-from scenariogeneration import xosc
+import numpy as np
+from lxml import etree
+from scenariogeneration import xosc, prettify
 from src.core.knowledge_graph import KnowledgeGraph
+from src.core.blueprint import Blueprint, parse_blueprint
+from src.generators.atomic_behaviors import get_action_handler
+from src.generators.lane_index import LaneIndex
+from src.generators.road_model import load_road_model
+from src.generators.road_index import load_road_index
+from src.generators.roi_slicer import load_roi_map
+from src.generators import road_geometry
+from src.generators.xosc_stream_writer import write_scenario, to_lxml
+from src.generators.scenario_parameters import ParameterBindings, variant_overrides
 from src.core.config import settings
 
 # --- IMPORT OFFICIAL TRAFFIC LOGIC ---
@@ -12,159 +28,342 @@ from src.generators.generate_traffic import get_vehicle_positions
 
 logger = logging.getLogger(__name__)
 
+# "xosc": full scenariogeneration object graph, pretty printed
+# "stream": lxml incremental writer, background traffic emitted straight to the output (compact XML)
+BACKENDS = ("xosc", "stream")
+
+COMPILER_OUTPUT_VERSION = 1 # Bump when the generated XML changes for the same blueprint (invalidates stored scenarios)
+
 class ScenarioCompiler:
-    def __init__(self):
-        self.kg = KnowledgeGraph(db_dir="chroma_db")
+    def __init__(self, kg: KnowledgeGraph = None, skeleton_cache: bool = True, traffic_catalog: bool = None):
+        # Share the caller's KG when given (the API's service container does), else build our own
+        self.kg = kg or KnowledgeGraph(db_dir="chroma_db")
+
+        # SKELETON CACHE
+        # Parts that never change for a given map / entity type are built once and shared
+        # between compiles (they are only read when the XML is generated).
+        self.skeleton_cache = skeleton_cache
+        self._skeletons = {}   # map file -> road network, dynamics, stop trigger, catalog...
+        self._prototypes = {}  # (entity type, model) -> Vehicle/Pedestrian, cloned per actor
+        self._stream_templates = {}  # Element templates for the "stream" backend
 
-    def compile(self, blueprint: dict, output_name="ai_scenario.xosc"):
+        # TRAFFIC CATALOG
+        # Background cars as <CatalogReference>s into a VehicleCatalog instead of inline
+        # <Vehicle>s (primary actors stay inline). See _traffic_catalog_dir.
+        self.traffic_catalog = settings.TRAFFIC_CATALOG if traffic_catalog is None else traffic_catalog
+        self._catalog_locations = {}  # catalog directory -> xosc.Catalog (<CatalogLocations>)
+        self._written_catalogs = set()  # generated catalog files known to exist
+
+    def compile(self, blueprint: Blueprint, output_name="ai_scenario.xosc", backend: str = None, parameters=None, seed=None):
         """
-        Symbolic Engine: Converts JSON Blueprint -> OpenSCENARIO (.xosc)
+        Symbolic Engine: Converts JSON Blueprint -> OpenSCENARIO (.xosc) on disk
+        `parameters`: blueprint fields to emit as ParameterDeclarations instead of literals
+        (True = DEFAULT_PARAMETER_FIELDS), see scenario_parameters.py.
+        `seed`: makes dense traffic reproducible (None = global `random`, as before).
         """
-        # 1. RESOLVE CONTEXT
-        map_key = blueprint.get("map_key", "city")
-        
-        if map_key in self.kg.static_maps:
-            context = self.kg.static_maps[map_key]
+        full_path = os.path.join(settings.OUTPUT_DIR, output_name)
+        if self._resolve_backend(backend) == "xosc":
+            self.build_scenario(blueprint, parameters, seed).write_xml(full_path)
         else:
-            context = self.kg.get_map_context(blueprint.get("scenario_type", "city"))
-            
-        # Define paths
-        road_path = os.path.join(settings.ESMINI_BIN_PATH, "../resources/xodr", context["file"])
-        scene_path = os.path.join(settings.ESMINI_BIN_PATH, "../resources/models", context["model_file"])
-        
-        road = xosc.RoadNetwork(roadfile=road_path, scenegraph=scene_path)
+            os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+            with open(full_path, "wb") as f:
+                self._stream_scenario(blueprint, f, parameters, seed)
+        return full_path
+
+    def compile_to_bytes(self, blueprint: Blueprint, backend: str = None, parameters=None, seed=None) -> bytes:
+        """
+        Same output as `compile`, serialized in memory (no disk write / re-read).
+        """
+        if self._resolve_backend(backend) == "xosc":
+            return prettify(self.build_scenario(blueprint, parameters, seed).get_element(), encoding="utf-8")
+        buffer = io.BytesIO()
+        self._stream_scenario(blueprint, buffer, parameters, seed)
+        return buffer.getvalue()
+
+    def compile_to_stream(self, blueprint: Blueprint, stream, backend: str = None, parameters=None, seed=None):
+        """
+        Writes the .xosc into any binary file-like object (BytesIO, socket, gzip...).
+        """
+        if self._resolve_backend(backend) == "xosc":
+            stream.write(self.compile_to_bytes(blueprint, backend="xosc", parameters=parameters, seed=seed))
+        else:
+            self._stream_scenario(blueprint, stream, parameters, seed)
+
+    def compile_many(self, blueprints: list, workers: int = None, seed=0, backend: str = None,
+                     parameters=None, output_prefix: str = None) -> list:
+        """
+        Compiles a whole campaign on a process pool (see compile_pool.py).
+        Returns one result dict per blueprint, in order:
+          {"index", "status": "ok", "data": bytes}         (or "path" when output_prefix is set)
+          {"index", "status": "error", "error": "..."}     (a bad item never aborts the batch)
+        Item i is seeded with f"{seed}:{i}", so reruns produce identical dense traffic.
+        """
+        from src.generators.compile_pool import compile_many
+        self.warm_maps() # Road models get pickled to ROAD_CACHE_DIR once here, workers just load them
+        return compile_many(blueprints, workers=workers, seed=seed, backend=backend,
+                            parameters=parameters, output_prefix=output_prefix,
+                            skeleton_cache=self.skeleton_cache)
+
+    def compile_family(self, blueprints: list, parameters=True, backend: str = None):
+        """
+        One parameterized .xosc for a whole family of fuzz variants.
+        blueprints[0] provides the structure and default values; returns
+        (xosc_bytes, [parameter values per blueprint]) so the simulator can run every
+        variant against the same file. Only the first blueprint is compiled.
+        """
+        if not blueprints:
+            raise ValueError("A scenario family needs at least one blueprint.")
+        blueprints = [parse_blueprint(b) for b in blueprints]
+        overrides = variant_overrides(self, blueprints[0], blueprints, parameters)
+        return self.compile_to_bytes(blueprints[0], backend=backend, parameters=parameters), overrides
+
+    def parameter_values(self, blueprint: Blueprint, parameters=True) -> dict:
+        """
+        {"EgoSpeed": 27.77, ...} that `compile(blueprint, parameters=...)` would declare.
+        Read straight off the Blueprint IR (same fields, names and units as _build), nothing is built.
+        """
+        blueprint: Blueprint = parse_blueprint(blueprint)
+        params = ParameterBindings(parameters)
+        context = self._resolve_context(blueprint)
+        default_lane = context.get("lanes", context.get("driving_lanes", [-1]))[0]
+        for actor in blueprint.actors:
+            for field, value in self._actor_fields(actor, default_lane):
+                params.bind(actor.name, field, value)
+        for idx, action in enumerate(blueprint.actions):
+            handler = get_action_handler(action.type)
+            if handler is not None:
+                for field, value in handler.parameter_fields(action):
+                    params.bind(f"{action.actor}Act{idx}", field, value)
+        return params.values
+
+    @staticmethod
+    def _actor_fields(actor, default_lane: int) -> tuple:
+        """ (field, value) pairs of an actor's Init position and speed, in compiled units (m, m/s). """
+        offset = actor.offset
+        if actor.type == "pedestrian" and offset == 0: offset = -4.0
+        lane_id = actor.lane if actor.lane is not None else default_lane
+        return (("s", actor.s), ("offset", offset), ("lane", lane_id), ("speed", actor.speed / 3.6))
+
+    @staticmethod
+    def _resolve_backend(backend: str = None) -> str:
+        backend = backend or settings.COMPILER_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown compiler backend '{backend}' (expected one of {BACKENDS}).")
+        return backend
+
+    def build_scenario(self, blueprint: Blueprint, parameters=None, seed=None) -> xosc.Scenario:
+        return self._build(blueprint, embed_traffic=True, parameters=parameters, seed=seed)[0]
+
+    def warm_maps(self):
+        """ Prebuilds the skeleton and road model of every static map (used by compile pool workers). """
+        for context in self.kg.static_maps.values():
+            skeleton = self._get_skeleton(context)
+            try:
+                load_road_model(skeleton["road_path"])
+                if settings.ROI_SLICING:
+                    load_road_index(skeleton["road_path"])
+            except (OSError, ET.ParseError) as e:
+                logger.debug(f"No road model for {context['file']}: {e}")
+
+    def _build(self, blueprint: Blueprint, embed_traffic: bool, parameters=None, plan_traffic: bool = True, seed=None):
+        """
+        Returns (scenario, traffic, step_time, bindings).
+        With embed_traffic=False background vehicles are only planned, not added to the
+        object graph; the caller is expected to emit `traffic` itself.
+        """
+        blueprint: Blueprint = parse_blueprint(blueprint) # Accepts raw dicts too
+        params = ParameterBindings(parameters)
+
+        # 1. RESOLVE CONTEXT
+        context = self._resolve_context(blueprint)
+        skeleton = self._get_skeleton(context)
+        step_time = skeleton["step_time"]
 
         # 2. ENTITIES
         entities = xosc.Entities()
         init = xosc.Init()
-        step_time = xosc.TransitionDynamics(xosc.DynamicsShapes.step, xosc.DynamicsDimension.time, 0)
         
         occupied_positions = [] 
 
         # A. BUILD PRIMARY ACTORS
-        first_actor_name = None
-        for actor in blueprint["actors"]:
-            name = actor["name"]
-            if not first_actor_name: first_actor_name = name
+        default_lanes = context.get("lanes", context.get("driving_lanes", [-1]))
+        for actor in blueprint.actors:
+            name = actor.name
             
             # Save position to avoid collisions
-            lane = actor.get("lane", -1)
-            s_pos = actor.get("s", 0)
-            occupied_positions.append((lane, s_pos))
+            s_pos = actor.s
+            occupied_positions.append((actor.lane if actor.lane is not None else -1, s_pos, 0)) # Actors start on road 0
 
-            e_type = actor.get("type", "car")
+            e_type = actor.type
             self._add_entity(entities, name, e_type)
 
             # Init Position
-            default_lanes = context.get("lanes", context.get("driving_lanes", [-1]))
-            lane_id = actor.get("lane", default_lanes[0])
-            
-            speed = actor.get("speed", 30) / 3.6 
-            
-            offset = actor.get("offset", 0)
-            if e_type == "pedestrian" and offset == 0: offset = -4.0
+            values = {field: params.bind(name, field, value) for field, value in self._actor_fields(actor, default_lanes[0])}
+            position = xosc.LanePosition(s=values["s"], offset=values["offset"], lane_id=values["lane"], road_id=0)
+            init.add_init_action(name, xosc.TeleportAction(position))
+            init.add_init_action(name, xosc.AbsoluteSpeedAction(values["speed"], step_time))
 
-            init.add_init_action(name, xosc.TeleportAction(xosc.LanePosition(s=s_pos, offset=offset, lane_id=lane_id, road_id=0)))
-            init.add_init_action(name, xosc.AbsoluteSpeedAction(speed, step_time))
+        # Optionally a small map around the Ego start instead of the whole one
+        road_path, road_network = skeleton["road_path"], skeleton["road"]
+        if settings.ROI_SLICING and blueprint.actors:
+            roi_path = self._roi_map(road_path, blueprint.actors[0], default_lanes[0])
+            if roi_path != road_path:
+                road_path = roi_path
+                road_network = xosc.RoadNetwork(roadfile=roi_path, scenegraph=skeleton["scene_path"])
 
         # B. MACRO: DENSE TRAFFIC (Using Official Logic)
-        if blueprint.get("traffic_density") == "high":
+        traffic = []
+        catalog = skeleton["catalog"]
+        if plan_traffic and blueprint.traffic_density == "high":
             # Pass road_path so the generator can parse the OpenDRIVE file
-            self._generate_dense_traffic(entities, init, road_path, occupied_positions)
+            rng = random if seed is None else random.Random(seed)
+            traffic = self._plan_dense_traffic(road_path, occupied_positions, rng)
+            if traffic and self.traffic_catalog:
+                catalog = self._get_catalog_location(self._traffic_catalog_dir(traffic))
+            if embed_traffic:
+                self._add_traffic(entities, init, traffic, step_time)
 
         # 3. STORYBOARD
-        stop_trigger = xosc.ValueTrigger("StopSim", 0, xosc.ConditionEdge.rising, xosc.SimulationTimeCondition(60, xosc.Rule.greaterThan), triggeringpoint="stop")
-        sb = xosc.StoryBoard(init, stop_trigger)
+        sb = xosc.StoryBoard(init, skeleton["stop_trigger"])
 
-        for idx, action in enumerate(blueprint["actions"]):
-            actor_name = action.get("actor", first_actor_name)
-            man_name = f"{actor_name}_act_{idx}_{action['type']}"
+        for idx, action in enumerate(blueprint.actions):
+            actor_name = action.actor
+            owner = f"{actor_name}Act{idx}" # Parameter prefix, e.g. $TargetAct0TriggerTime
+            man_name = f"{actor_name}_act_{idx}_{action.type}"
+            handler = get_action_handler(action.type) # O(1), see atomic_behaviors.ACTION_HANDLERS
+            if handler is None:
+                logger.debug(f"No handler for action type '{action.type}', skipped.")
+                continue
             maneuver = xosc.Maneuver(man_name)
-            event_added = False
-
-            # TRAFFIC LIGHTS
-            if action["type"] == "traffic_light":
-                tl_id = action.get("id", "1")
-                raw_state = action.get("state", "red").lower()
-                esmini_state = "on;off;off"
-                if "green" in raw_state: esmini_state = "off;off;on"
-                elif "yellow" in raw_state: esmini_state = "off;on;off"
-                elif ";" in raw_state: esmini_state = raw_state 
-                
-                tl_action = xosc.TrafficSignalStateAction(tl_id, esmini_state)
-                trig = xosc.ValueTrigger("TLTrig", 0, xosc.ConditionEdge.rising, xosc.SimulationTimeCondition(action.get("trigger_time", 0), xosc.Rule.greaterThan))
-                evt = xosc.Event("TLEvent", xosc.Priority.override)
-                evt.add_trigger(trig)
-                evt.add_action("TLAction", tl_action)
-                maneuver.add_event(evt)
-                event_added = True
-
-            # LANE CHANGE 
-            elif action["type"] == "lane_change":
-                target_lane = action.get("target_lane", -1)
-                duration = action.get("duration", 3.0)
-                lc_action = xosc.AbsoluteLaneChangeAction(target_lane, xosc.TransitionDynamics(xosc.DynamicsShapes.sinusoidal, xosc.DynamicsDimension.time, duration))
-                
-                if "trigger_entity" in action:
-                    ent = action["trigger_entity"]
-                    dist = action.get("trigger_dist", 20)
-                    cond = xosc.RelativeDistanceCondition(dist, xosc.Rule.lessThan, entity=ent, dist_type=xosc.RelativeDistanceType.longitudinal, coordinate_system=xosc.CoordinateSystem.entity)
-                    # Trigger entity is the ACTOR (Ego), triggered by proximity to TARGET
-                    trig = xosc.EntityTrigger("LCTrig", 0, xosc.ConditionEdge.rising, cond, triggerentity=actor_name)
-                else:
-                    trig = xosc.ValueTrigger("LCTrig", 0, xosc.ConditionEdge.rising, xosc.SimulationTimeCondition(action.get("trigger_time", 2), xosc.Rule.greaterThan))
-                
-                evt = xosc.Event("LCEvent", xosc.Priority.override)
-                evt.add_trigger(trig)
-                evt.add_action("LCAction", lc_action)
-                maneuver.add_event(evt)
-                event_added = True
-
-            # PEDESTRIAN CROSSING
-            elif action["type"] == "cross_street":
-                start_s = 50 
-                duration = 5.0
-                traj_shape = xosc.Polyline([0.0, duration], [xosc.LanePosition(s=start_s, offset=-4, lane_id=-1, road_id=0), xosc.LanePosition(s=start_s, offset=4, lane_id=-1, road_id=0)])
-                traj = xosc.Trajectory("WalkPath", False)
-                traj.add_shape(traj_shape)
-                cross_action = xosc.FollowTrajectoryAction(traj, xosc.FollowingMode.position, xosc.ReferenceContext.relative, 1.0, 0.0)
-                
-                target_ent = action.get("trigger_entity", "Ego")
-                cond = xosc.RelativeDistanceCondition(action.get("trigger_dist", 30), xosc.Rule.lessThan, entity=target_ent, dist_type=xosc.RelativeDistanceType.longitudinal, coordinate_system=xosc.CoordinateSystem.entity)
-                trig = xosc.EntityTrigger("CrossTrig", 0, xosc.ConditionEdge.rising, cond, triggerentity=target_ent)
-                
-                evt = xosc.Event("CrossEvent", xosc.Priority.override)
-                evt.add_trigger(trig)
-                evt.add_action("WalkAction", cross_action)
-                maneuver.add_event(evt)
-                event_added = True
-
-            # SPEED CHANGE 
-            elif action["type"] in ["brake", "speed_change", "accelerate", "decelerate", "stop"]:
-                spd = action.get("target_speed", 0) / 3.6
-                dur = action.get("duration", 5.0)
-                if action["type"] == "brake" and "target_speed" not in action:
-                    spd = 0.0
-                if action["type"] == "stop":
-                    spd = 0.0
-                spd_action = xosc.AbsoluteSpeedAction(spd, xosc.TransitionDynamics(xosc.DynamicsShapes.linear, xosc.DynamicsDimension.time, dur))
-                trig = xosc.ValueTrigger("SpeedTrig", 0, xosc.ConditionEdge.rising, xosc.SimulationTimeCondition(action.get("trigger_time", 5), xosc.Rule.greaterThan))
-                evt = xosc.Event("SpeedEvent", xosc.Priority.override)
-                evt.add_trigger(trig)
-                evt.add_action("SpeedAction", spd_action)
-                maneuver.add_event(evt)
-                event_added = True
-
-            if event_added:
-                sb.add_maneuver(maneuver, actor_name)
-
-        # 4. WRITE
-        scn = xosc.Scenario("NeuroScenario", "AI_Gen", xosc.ParameterDeclarations(), entities=entities, storyboard=sb, roadnetwork=road, catalog=xosc.Catalog())
-        full_path = os.path.join(settings.OUTPUT_DIR, output_name)
-        scn.write_xml(full_path)
-        return full_path
+            maneuver.add_event(handler.handle(action, actor_name, owner, params, timed=settings.ACTION_TIMING))
+            sb.add_maneuver(maneuver, actor_name)
+
+        # 4. ASSEMBLE
+        declarations = skeleton["parameters"]
+        if params:
+            declarations = xosc.ParameterDeclarations()
+            for name, p_type, value in params.declarations():
+                declarations.add_parameter(xosc.Parameter(name, getattr(xosc.ParameterType, p_type), str(value)))
+
+        scn = xosc.Scenario("NeuroScenario", "AI_Gen", declarations, entities=entities, storyboard=sb, roadnetwork=road_network, catalog=catalog)
+        return scn, traffic, step_time, params
+
+    # --- STREAM BACKEND ---
+    def _stream_scenario(self, blueprint: Blueprint, stream, parameters=None, seed=None):
+        scn, traffic, step_time, _ = self._build(blueprint, embed_traffic=False, parameters=parameters, seed=seed)
+        write_scenario(
+            stream,
+            scn.get_element(),
+            extra_objects=(self._traffic_object_element(car) for car in traffic),
+            extra_privates=(self._traffic_private_element(car, step_time) for car in traffic),
+        )
+
+    def _stream_template(self, key, factory):
+        template = self._stream_templates.get(key)
+        if template is None:
+            template = self._stream_templates.setdefault(key, to_lxml(factory()))
+        return template
+
+    def _traffic_object_element(self, car: dict):
+        # <ScenarioObject> stamped from a per-model template (same element the xosc backend builds)
+        if self.traffic_catalog:
+            template = self._stream_template(
+                ("catalog_ref", car["model"]),
+                lambda: xosc.ScenarioObject("_", self._traffic_catalog_reference(car["model"])).get_element(),
+            )
+            element = copy.deepcopy(template)
+            element.set("name", car["name"])
+            return element
+
+        template = self._stream_template(
+            ("object", car["model"]),
+            lambda: xosc.ScenarioObject("_", self._build_entity("_", "car", model_override=car["model"])).get_element(),
+        )
+        element = copy.deepcopy(template)
+        element.set("name", car["name"])
+        element[0].set("name", car["name"])
+        return element
+
+    def _traffic_private_element(self, car: dict, step_time):
+        def build():
+            init = xosc.Init()
+            init.add_init_action("_", xosc.TeleportAction(xosc.LanePosition(s=0, offset=0, lane_id=-1, road_id=0)))
+            init.add_init_action("_", xosc.AbsoluteSpeedAction(0, step_time))
+            return init.get_element().find("Actions/Private")
+
+        element = copy.deepcopy(self._stream_template("private", build))
+        element.set("entityRef", car["name"])
+        position = element.find("PrivateAction/TeleportAction/Position/LanePosition")
+        position.set("roadId", str(int(car["road"])))
+        position.set("laneId", str(int(car["lane"])))
+        position.set("s", str(float(car["s"])))
+        element.find(".//AbsoluteTargetSpeed").set("value", str(float(car["speed"])))
+        return element
+
+    def _resolve_context(self, blueprint: Blueprint) -> dict:
+        if blueprint.map_key in self.kg.static_maps:
+            return self.kg.static_maps[blueprint.map_key]
+        return self.kg.get_map_context(blueprint.scenario_type or "city")
+
+    @staticmethod
+    def _map_paths(context: dict) -> tuple:
+        road_path = os.path.join(settings.ESMINI_BIN_PATH, "../resources/xodr", context["file"])
+        scene_path = os.path.join(settings.ESMINI_BIN_PATH, "../resources/models", context["model_file"])
+        return road_path, scene_path
+
+    def map_paths(self, blueprint: Blueprint) -> tuple:
+        """ (road, scene) paths the blueprint's RoadNetwork points at (the full map, before ROI slicing). """
+        return self._map_paths(self._resolve_context(parse_blueprint(blueprint)))
+
+    def _get_skeleton(self, context: dict) -> dict:
+        if not self.skeleton_cache:
+            return self._build_skeleton(context)
+        skeleton = self._skeletons.get(context["file"])
+        if skeleton is None:
+            skeleton = self._skeletons.setdefault(context["file"], self._build_skeleton(context))
+        return skeleton
+
+    def _build_skeleton(self, context: dict) -> dict:
+        # Define paths
+        road_path, scene_path = self._map_paths(context)
+
+        return {
+            "road_path": road_path,
+            "scene_path": scene_path,
+            "road": xosc.RoadNetwork(roadfile=road_path, scenegraph=scene_path),
+            "step_time": xosc.TransitionDynamics(xosc.DynamicsShapes.step, xosc.DynamicsDimension.time, 0),
+            "stop_trigger": xosc.ValueTrigger("StopSim", 0, xosc.ConditionEdge.rising, xosc.SimulationTimeCondition(60, xosc.Rule.greaterThan), triggeringpoint="stop"),
+            "parameters": xosc.ParameterDeclarations(),
+            "catalog": xosc.Catalog(),
+        }
+
+    def _roi_map(self, road_path: str, ego, default_lane: int) -> str:
+        """ Sliced map around the Ego start (actors are placed on road 0, which is always kept); road_path if that fails. """
+        try:
+            model = load_road_model(road_path)
+            lane = ego.lane if ego.lane is not None else default_lane
+            x, y, _ = road_geometry.lane_to_world(model, model.road_index(0), ego.s, lane, ego.offset)
+            return load_roi_map(road_path, (x[0], y[0]), required=(0,))
+        except (OSError, ET.ParseError, etree.XMLSyntaxError, KeyError, ValueError) as e:
+            logger.debug(f"No ROI map for {road_path}, using the full map: {e}")
+            return road_path
 
     def _add_entity(self, entities, name, e_type, model_override=None):
+        if not self.skeleton_cache:
+            entities.add_scenario_object(name, self._build_entity(name, e_type, model_override))
+            return
+
+        key = (e_type, model_override)
+        prototype = self._prototypes.get(key)
+        if prototype is None:
+            prototype = self._prototypes.setdefault(key, self._build_entity("prototype", e_type, model_override))
+
+        # Shallow clone: bounding box, axles, dynamics and properties stay shared
+        obj = copy.copy(prototype)
+        obj.name = name
+        entities.add_scenario_object(name, obj)
+
+    def _build_entity(self, name, e_type, model_override=None):
         # Default models
         model = "car_white.osgb"
         cat = xosc.VehicleCategory.car
@@ -194,64 +393,109 @@ class ScenarioCompiler:
             
         obj.add_property("osgb", f"../resources/models/{model}")
         obj.add_property("model_id", "0")
-        entities.add_scenario_object(name, obj)
+        return obj
+
+    def _add_traffic(self, entities, init, traffic: list, step_time):
+        for car in traffic:
+            if self.traffic_catalog:
+                entities.add_scenario_object(car["name"], self._traffic_catalog_reference(car["model"]))
+            else:
+                self._add_entity(entities, car["name"], "car", model_override=car["model"])
+            init.add_init_action(car["name"], xosc.TeleportAction(xosc.LanePosition(s=car["s"], offset=0, lane_id=car["lane"], road_id=car["road"])))
+            init.add_init_action(car["name"], xosc.AbsoluteSpeedAction(car["speed"], step_time))
+
+    # --- TRAFFIC CATALOG ---
+    def _traffic_catalog_reference(self, model: str):
+        key = ("catalog_ref", model)
+        reference = self._prototypes.get(key)
+        if reference is None:
+            # Only read when the XML is generated, so one instance serves every car of this model
+            reference = self._prototypes.setdefault(key, xosc.CatalogReference(settings.TRAFFIC_CATALOG_NAME, model))
+        return reference
+
+    def _get_catalog_location(self, directory: str):
+        location = self._catalog_locations.get(directory)
+        if location is None:
+            location = self._catalog_locations.setdefault(directory, xosc.Catalog().add_catalog("VehicleCatalog", directory))
+        return location
+
+    def _traffic_catalog_dir(self, traffic: list) -> str:
+        """
+        VehicleCatalog directory as written into the scenario.
+        TRAFFIC_CATALOG_DIR set: a shared catalog (e.g. esmini's resources/xosc/Catalogs/Vehicles)
+        that already has an entry per model name; nothing is written.
+        Otherwise a catalog is generated under OUTPUT_DIR, content addressed by the set of models
+        (catalogs/traffic_<hash>/), so it is written once and never changes under a scenario.
+        The path is relative to OUTPUT_DIR: move scenarios together with their catalogs/ folder.
+        """
+        if settings.TRAFFIC_CATALOG_DIR:
+            return settings.TRAFFIC_CATALOG_DIR
+
+        models = sorted({car["model"] for car in traffic})
+        digest = hashlib.sha1("\n".join(models).encode()).hexdigest()[:12]
+        directory = f"catalogs/traffic_{digest}"
+        path = os.path.join(settings.OUTPUT_DIR, directory, f"{settings.TRAFFIC_CATALOG_NAME}.xosc")
+        if path not in self._written_catalogs:
+            if not os.path.exists(path):
+                self._write_traffic_catalog(path, models)
+            self._written_catalogs.add(path)
+        return directory
 
-    def _generate_dense_traffic(self, entities, init, road_path, occupied_positions):
-        print(f"[COMPILER] Attempting to generate dense traffic...")
-        print(f"           Road file: {road_path}")
+    def _write_traffic_catalog(self, path: str, models: list):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Compile threads / pool processes may race on the same catalog: write aside, then swap in
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        catalog = xosc.CatalogFile()
+        catalog.create_catalog(tmp_path, settings.TRAFFIC_CATALOG_NAME, "Background traffic vehicles", "AI_Gen")
+        for model in models:
+            catalog.add_to_catalog(self._build_entity(model, "car", model_override=model))
+        catalog.dump()
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote traffic catalog {path} ({len(models)} models)")
 
+    @staticmethod
+    def _vehicle_catalog_path():
+        """ esmini's VehicleCatalog (background car models and lengths), None if it isn't installed. """
+        path = os.path.join(settings.ESMINI_BIN_PATH, "../resources/xosc/Catalogs/Vehicles/VehicleCatalog.xosc")
+        return path if os.path.exists(path) else None
+
+    def _plan_dense_traffic(self, road_path, occupied_positions, rng=random) -> list:
+        """ Picks background vehicles (name, model, s, lane, road, speed) around the primary actors. """
         if occupied_positions:
             ego_start_pos = (occupied_positions[0][1], 0, occupied_positions[0][0], 0)
         else:
             ego_start_pos = (0, 0, -2, 0)
 
-        step_time = xosc.TransitionDynamics(xosc.DynamicsShapes.step, xosc.DynamicsDimension.time, 0)
-
         try:
-            # Call the generator
-            traffic_positions = get_vehicle_positions(
+            # Call the generator (columnar: one array row per candidate, no per-car dicts)
+            layout = get_vehicle_positions(
                 roadfile=road_path,
                 ego_pos=ego_start_pos,
-                density=2.0,  # INCREASED DENSITY (Try 2.0 or 3.0 to force more cars)
-                catalog_path=None 
+                density=settings.TRAFFIC_DENSITY,
+                catalog_path=self._vehicle_catalog_path(),
+                rng=rng,
+                columnar=True,
             )
-            
-            # DEBUG: How many did we find?
-            print(f"[COMPILER] Generator found {len(traffic_positions)} potential positions.")
-
-            added_count = 0
-            for i, data in traffic_positions.items():
-                t_pos = data["position"]
-                t_s = t_pos[0]
-                t_lane = t_pos[2]
-                
-                # DEBUG: Print checking
-                # print(f"   - Checking car at s={t_s:.1f}, lane={t_lane}")
-
-                # Collision Check
-                is_colliding = False
-                for occ_lane, occ_s in occupied_positions:
-                    if abs(t_s - occ_s) < 15 and t_lane == occ_lane:
-                        is_colliding = True
-                        break
-                
-                if is_colliding:
-                    # print("     -> SKIPPED (Collision)")
-                    continue
-
-                bg_name = f"Traffic_{i}"
-                catalog_model = data.get("catalog_name", "car_white")
-                
-                self._add_entity(entities, bg_name, "car", model_override=catalog_model)
-                init.add_init_action(bg_name, xosc.TeleportAction(xosc.LanePosition(s=t_s, offset=0, lane_id=t_lane, road_id=0)))
-                
-                bg_speed = random.uniform(70, 90) / 3.6
-                init.add_init_action(bg_name, xosc.AbsoluteSpeedAction(bg_speed, step_time))
-                added_count += 1
-                
-            print(f"[COMPILER] Successfully added {added_count} background vehicles.")
-                
+
+            # Collision Check: all candidates at once against a per-(road, lane) sorted index of the actors
+            positions = layout.positions
+            keep = LaneIndex(occupied_positions).clear_mask(positions["lane"], positions["s"], settings.TRAFFIC_MIN_GAP, roads=positions["road"])
+
+            names = layout.catalog_names
+            traffic = []
+            for k in np.flatnonzero(keep):
+                traffic.append({
+                    "name": f"Traffic_{k}",
+                    "model": names[k],
+                    "s": float(positions["s"][k]),
+                    "lane": int(positions["lane"][k]),
+                    "road": int(positions["road"][k]),
+                    "speed": rng.uniform(70, 90) / 3.6,
+                })
+
+            logger.debug(f"Dense traffic on {road_path}: {len(traffic)} of {len(layout)} candidate positions kept.")
+            return traffic
+
         except Exception as e:
-            print(f"[ERROR] Traffic generation crashed: {e}")
-            import traceback
-            traceback.print_exc()
\ No newline at end of file
+            logger.exception(f"Traffic generation failed for {road_path}: {e}")
+            return []
\ No newline at end of file
@@ -0,0 +1,91 @@
+# src/generators/scenario_parameters.py
+import re
+import json
+import logging
+from src.core.blueprint import parse_blueprint
+
+logger = logging.getLogger(__name__)
+
+# Blueprint fields that can be lifted into OpenSCENARIO ParameterDeclarations.
+# Actor fields: speed, s, offset, lane. Action fields: the rest.
+PARAMETER_FIELDS = ("speed", "s", "offset", "lane", "target_speed", "target_lane", "trigger_time", "trigger_dist", "duration")
+# What a fuzz sweep usually varies
+DEFAULT_PARAMETER_FIELDS = ("speed", "target_speed", "trigger_time", "trigger_dist", "duration")
+
+INT_FIELDS = ("lane", "target_lane")
+ACTOR_FIELDS = ("speed", "s", "offset", "lane")
+
+def parameter_name(owner: str, field: str) -> str:
+    """ ("Ego", "speed") -> "EgoSpeed", ("TargetAct0", "trigger_time") -> "TargetAct0TriggerTime" """
+    owner = re.sub(r"\W", "", owner)
+    return owner + "".join(part.capitalize() for part in field.split("_"))
+
+class ParameterBindings:
+    """
+    Collects ParameterDeclarations while a scenario is being built.
+    `bind()` returns the literal when the field isn't parameterized, otherwise
+    records the value (in compiled units, e.g. m/s) and returns the "$Name" reference.
+    """
+
+    def __init__(self, fields=None):
+        if fields is True:
+            fields = DEFAULT_PARAMETER_FIELDS
+        self.fields = set(fields or ())
+        unknown = self.fields.difference(PARAMETER_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot parameterize {sorted(unknown)} (supported: {PARAMETER_FIELDS}).")
+        self.values = {}
+
+    def __bool__(self):
+        return bool(self.fields)
+
+    def bind(self, owner: str, field: str, value):
+        if field not in self.fields:
+            return value
+        name = parameter_name(owner, field)
+        self.values[name] = int(value) if field in INT_FIELDS else float(value)
+        return f"${name}"
+
+    def declarations(self):
+        """ -> [(name, "int"|"double", value)] in the order they were bound """
+        return [(name, "int" if isinstance(value, int) else "double", value) for name, value in self.values.items()]
+
+def family_key(blueprint: dict, fields=None) -> str:
+    """
+    Everything that must be identical for two blueprints to share one compiled file:
+    the blueprint minus the parameterized fields.
+    """
+    fields = ParameterBindings(fields).fields
+    stripped = parse_blueprint(blueprint).to_dict()
+    stripped["actors"] = [{k: v for k, v in a.items() if k not in fields} for a in stripped["actors"]]
+    stripped["actions"] = [{k: v for k, v in a.items() if k not in fields} for a in stripped["actions"]]
+    return json.dumps(stripped, sort_keys=True)
+
+def variant_overrides(compiler, base_blueprint: dict, variants: list, fields=None) -> list:
+    """
+    Per-variant parameter values for a family compiled from `base_blueprint`.
+    Each variant is a blueprint with the same structure and different numbers
+    (e.g. a fuzzer mutation); nothing is compiled, built or written for it.
+    Raises ValueError if a variant differs outside the parameterized fields.
+    """
+    base_blueprint = parse_blueprint(base_blueprint)
+    variants = [parse_blueprint(v) for v in variants]
+    base_key = family_key(base_blueprint, fields)
+    base_names = set(compiler.parameter_values(base_blueprint, fields))
+
+    overrides = []
+    for index, variant in enumerate(variants):
+        if family_key(variant, fields) != base_key:
+            raise ValueError(f"Variant {index} is not part of the family (it changes non-parameterized fields).")
+        values = compiler.parameter_values(variant, fields)
+        if set(values) != base_names:
+            raise ValueError(f"Variant {index} binds different parameters than the base blueprint.")
+        overrides.append(values)
+    return overrides
+
+def esmini_args(values: dict) -> list:
+    """ {"EgoSpeed": 27.7} -> ["--param", "EgoSpeed=27.7"] for `esmini --osc family.xosc ...` """
+    args = []
+    for name, value in values.items():
+        args += ["--param", f"{name}={value}"]
+    return args
@@ -0,0 +1,50 @@
+# src/generators/xosc_stream_writer.py
+import logging
+import xml.etree.ElementTree as ET
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+XSI_NS = "http://www.w3.org/2001/XMLSchema-instance"
+
+def to_lxml(element: ET.Element):
+    """ scenariogeneration builds stdlib ElementTree nodes; xmlfile only writes lxml ones. """
+    return etree.fromstring(ET.tostring(element))
+
+def write_scenario(stream, scenario_element: ET.Element, extra_objects=(), extra_privates=()):
+    """
+    Incremental OpenSCENARIO emitter (lxml xmlfile).
+
+    `scenario_element` is the (small) document built by scenariogeneration: header,
+    road network, primary actors and storyboard. `extra_objects` / `extra_privates` are
+    iterables (ideally generators) of ready-made <ScenarioObject> and <Private> elements,
+    written into <Entities> and <Init><Actions> one at a time, so background traffic
+    never exists as a full object graph or as one big in-memory tree.
+
+    Output is compact (no pretty printing) but element-for-element the same document.
+    """
+    with etree.xmlfile(stream, encoding="utf-8") as xf:
+        xf.write_declaration()
+        schema = scenario_element.get("xsi:noNamespaceSchemaLocation", "OpenScenario.xsd")
+        with xf.element("OpenSCENARIO", {f"{{{XSI_NS}}}noNamespaceSchemaLocation": schema}, nsmap={"xsi": XSI_NS}):
+            for child in scenario_element:
+                if child.tag == "Entities":
+                    with xf.element("Entities"):
+                        for obj in child:
+                            xf.write(to_lxml(obj))
+                        for obj in extra_objects:
+                            xf.write(obj)
+
+                elif child.tag == "Storyboard":
+                    with xf.element("Storyboard"):
+                        for part in child:
+                            if part.tag != "Init":
+                                xf.write(to_lxml(part))
+                                continue
+                            with xf.element("Init"), xf.element("Actions"):
+                                for action in part.find("Actions"):
+                                    xf.write(to_lxml(action))
+                                for private in extra_privates:
+                                    xf.write(private)
+                else:
+                    xf.write(to_lxml(child))
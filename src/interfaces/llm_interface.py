@@ -20,4 +20,17 @@ class ILlmInterface(ABC):
         Returns:
             str: The raw Python code string generated by the AI.
         """
-        pass
\ No newline at end of file
+        pass
+
+class IAsyncLlmInterface(ABC):
+    """
+    Async twin of ILlmInterface.
+    Used by the API so a slow LLM round trip never blocks the event loop.
+    """
+
+    @abstractmethod
+    async def agenerate_code(self, user_prompt: str, system_prompt: str = "") -> str:
+        """
+        Same contract as ILlmInterface.generate_code, but awaitable.
+        """
+        pass
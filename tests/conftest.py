@@ -0,0 +1,48 @@
+# tests/conftest.py
+import os
+import sys
+import math
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+# Synthetic OpenDRIVE for the road tests (and the road benchmarks, which import it from here)
+GEOMETRY_XML = [
+    '<line/>',
+    '<arc curvature="{k}"/>',
+    '<spiral curvStart="0.0" curvEnd="{k}"/>',
+    '<poly3 a="0" b="0" c="{k}" d="0"/>',
+    '<paramPoly3 aU="0" bU="1" cU="0" dU="0" aV="0" bV="0" cV="{k}" dV="0" pRange="arcLength"/>',
+]
+
+WIDTH = '<width sOffset="0" a="{w}" b="0" c="0" d="0"/>'
+
+def synthetic_xodr(path: str, roads: int, geometries: int = 4, seed: int = 0):
+    """ `roads` roads along a meandering chain, every 10th a junction road; mixed geometry types, 2 lane sections of 6 lanes. """
+    rng = random.Random(seed)
+    x = y = hdg = 0.0
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<OpenDRIVE>\n<header revMajor="1" revMinor="6" name="synthetic"/>']
+    for road_id in range(roads):
+        seg = rng.uniform(20, 60)
+        length = seg * geometries
+        junction = road_id // 10 if road_id % 10 == 9 else -1
+        parts.append(f'<road name="r{road_id}" length="{length}" id="{road_id}" junction="{junction}"><planView>')
+        for g in range(geometries):
+            k = rng.uniform(-0.01, 0.01)
+            parts.append(f'<geometry s="{g * seg}" x="{x}" y="{y}" hdg="{hdg}" length="{seg}">{GEOMETRY_XML[(road_id + g) % 5].format(k=k)}</geometry>')
+            x += seg * math.cos(hdg)
+            y += seg * math.sin(hdg)
+            hdg += k * seg / 4
+        parts.append('</planView><lanes><laneOffset s="0" a="0" b="0" c="0" d="0"/>')
+        for s in (0.0, length / 2):
+            parts.append(f'<laneSection s="{s}"><left>'
+                         f'<lane id="2" type="sidewalk">{WIDTH.format(w=2.0)}</lane><lane id="1" type="driving">{WIDTH.format(w=3.5)}</lane></left>'
+                         '<center><lane id="0" type="none"/></center><right>'
+                         f'<lane id="-1" type="driving">{WIDTH.format(w=3.5)}</lane><lane id="-2" type="driving">{WIDTH.format(w=3.5)}</lane>'
+                         f'<lane id="-3" type="onRamp">{WIDTH.format(w=3.0)}</lane><lane id="-4" type="border">{WIDTH.format(w=0.5)}</lane>'
+                         '</right></laneSection>')
+        parts.append('</lanes></road>')
+    parts.append('</OpenDRIVE>\n')
+    with open(path, "w") as f:
+        f.write("\n".join(parts))
@@ -0,0 +1,36 @@
+# tests/test_atomic_behaviors.py
+import pytest
+from scenariogeneration import xosc
+
+from src.core.blueprint import parse_blueprint
+from src.generators.atomic_behaviors import ActionHandler, ACTION_HANDLERS, AtomicBehavior, get_action_handler
+from src.generators.scenario_parameters import ParameterBindings
+
+def test_handler_without_build_event_cannot_be_created():
+    class Incomplete(ActionHandler):
+        action_types = ("nothing",)
+
+    with pytest.raises(TypeError):
+        Incomplete("nothing")
+    assert not issubclass(ActionHandler, AtomicBehavior)
+
+@pytest.mark.parametrize("action", [
+    {"type": "lane_change", "target_lane": -2},
+    {"type": "lane_change", "target_lane": -2, "trigger_entity": "Ego"},
+    {"type": "brake"},
+    {"type": "speed_change", "target_speed": 50},
+    {"type": "traffic_light", "id": "1", "state": "green"},
+    {"type": "cross_street", "actor": "Ped", "trigger_entity": "Ego"},
+])
+def test_registered_handlers_build_events(action):
+    blueprint = parse_blueprint({"actors": [{"name": "Ego"}, {"name": "Ped", "type": "pedestrian"}], "actions": [action]})
+    parsed = blueprint.actions[0]
+    handler = get_action_handler(parsed.type)
+    calls = handler.calls
+    event = handler.handle(parsed, "Ego", "EgoAct0", ParameterBindings(), timed=True)
+    assert isinstance(event, xosc.Event)
+    assert handler.calls == calls + 1 and handler.stats()["seconds"] >= 0
+
+def test_every_type_has_its_own_handler():
+    assert len({id(h) for h in ACTION_HANDLERS.values()}) == len(ACTION_HANDLERS)
+    assert get_action_handler("teleport") is None
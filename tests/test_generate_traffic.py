@@ -0,0 +1,99 @@
+# tests/test_generate_traffic.py
+import random
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.core.knowledge_graph import KnowledgeGraph
+from src.generators import generate_traffic
+from src.generators.generate_traffic import DEFAULT_VEHICLES, get_vehicle_positions, get_vehicle_types, sample_vehicle_positions
+from src.generators.scenario_compiler import ScenarioCompiler
+from tests.conftest import synthetic_xodr
+
+VEHICLES = [{"name": "car_white", "length": 4.2}, {"name": "car_blue", "length": 4.5}, {"name": "car_red", "length": 5.0}]
+EGO = (50.0, 0, -1, 0)
+
+@pytest.fixture(scope="module")
+def roadfile(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("maps") / "synthetic.xodr")
+    synthetic_xodr(path, 40)
+    return path
+
+@pytest.fixture(autouse=True)
+def no_road_cache(monkeypatch):
+    monkeypatch.setattr(settings, "ROAD_CACHE_DIR", "")
+
+def test_vehicle_types_default_without_catalog():
+    vehicles = get_vehicle_types(None)
+    assert vehicles == DEFAULT_VEHICLES and vehicles is not DEFAULT_VEHICLES
+
+def test_vehicle_types_from_catalog(tmp_path):
+    catalog = tmp_path / "VehicleCatalog.xosc"
+    catalog.write_text("""<OpenSCENARIO><Catalog name="VehicleCatalog">
+        <Vehicle name="car_white" vehicleCategory="car"><BoundingBox><Dimensions width="2" length="5.04" height="1.5"/></BoundingBox></Vehicle>
+        <Vehicle name="car_blue" vehicleCategory="car"><BoundingBox><Dimensions width="2" length="$Length" height="1.5"/></BoundingBox></Vehicle>
+        <Vehicle name="car_trailer" vehicleCategory="car"><BoundingBox><Dimensions width="2" length="3" height="1.5"/></BoundingBox></Vehicle>
+        <Vehicle name="truck_yellow" vehicleCategory="truck"><BoundingBox><Dimensions width="2" length="9" height="3"/></BoundingBox></Vehicle>
+    </Catalog></OpenSCENARIO>""")
+    assert get_vehicle_types(str(catalog)) == [{"name": "car_white", "length": 5.04}, {"name": "car_blue", "length": 4.5}]
+
+def test_same_seed_same_layout(roadfile):
+    a = sample_vehicle_positions(roadfile, EGO, 2.0, seed=7, vehicles=VEHICLES)
+    b = sample_vehicle_positions(roadfile, EGO, 2.0, seed=7, vehicles=VEHICLES)
+    c = sample_vehicle_positions(roadfile, EGO, 2.0, seed=8, vehicles=VEHICLES)
+    assert len(a) > 0 and (a.positions == b.positions).all()
+    assert len(a) != len(c) or not (a.positions == c.positions).all()
+
+def test_layout_rules(roadfile):
+    layout = sample_vehicle_positions(roadfile, EGO, 4.0, seed=1, vehicles=VEHICLES)
+    pos = layout.positions
+    length = np.array([v["length"] for v in VEHICLES])[pos["model"]]
+    on_ego = (pos["road"] == EGO[3]) & (pos["lane"] == EGO[2]) & (np.abs(pos["s"] - EGO[0]) < length)
+    assert not on_ego.any()
+    assert (pos["s"] >= length).all()
+    assert set(np.unique(pos["model"])) <= set(range(len(VEHICLES)))
+
+def test_every_model_can_be_drawn(roadfile):
+    layout = sample_vehicle_positions(roadfile, EGO, 4.0, seed=1, vehicles=VEHICLES)
+    assert set(np.unique(layout.positions["model"])) == set(range(len(VEHICLES)))
+    assert set(layout.catalog_names) == {v["name"] for v in VEHICLES}
+    single = sample_vehicle_positions(roadfile, EGO, 4.0, seed=1, vehicles=VEHICLES[:1])
+    assert len(single) > 0 and (single.positions["model"] == 0).all()
+
+def test_to_dict(roadfile):
+    layout = sample_vehicle_positions(roadfile, EGO, 2.0, seed=3, vehicles=VEHICLES)
+    as_dict = layout.to_dict()
+    assert list(as_dict) == list(range(len(layout)))
+    first = as_dict[0]
+    row = layout.positions[0]
+    assert first["position"] == (row["s"], row["t"], row["lane"], row["road"])
+    assert first["catalog_name"] == VEHICLES[row["model"]]["name"]
+
+def test_get_vehicle_positions_uses_rng(roadfile):
+    a = get_vehicle_positions(roadfile, EGO, 2.0, None, rng=random.Random(5))
+    b = get_vehicle_positions(roadfile, EGO, 2.0, None, rng=random.Random(5))
+    assert a == b and {v["catalog_name"] for v in a.values()} <= {v["name"] for v in DEFAULT_VEHICLES}
+    assert isinstance(get_vehicle_positions(roadfile, EGO, 2.0, None, rng=random.Random(5), columnar=True), generate_traffic.TrafficLayout)
+
+def test_compiler_plans_traffic_without_a_catalog(roadfile, monkeypatch, capsys):
+    monkeypatch.setattr(settings, "ESMINI_BIN_PATH", "/nonexistent/esmini/bin/esmini")
+    compiler = ScenarioCompiler(kg=KnowledgeGraph())
+    assert compiler._vehicle_catalog_path() is None
+    traffic = compiler._plan_dense_traffic(roadfile, [(-1, 50.0)], random.Random(0))
+    assert traffic and {car["model"] for car in traffic} <= {v["name"] for v in DEFAULT_VEHICLES}
+    assert all(abs(car["s"] - 50.0) >= settings.TRAFFIC_MIN_GAP for car in traffic if (car["road"], car["lane"]) == (0, -1))
+    assert capsys.readouterr().out == ""
+
+def test_compiler_keeps_traffic_on_other_roads(monkeypatch):
+    # Two cars at the ego's s and lane: only the one on road 0 collides
+    positions = np.array([(50.0, 0, -1, 0, 0), (52.0, 0, -1, 7, 1), (200.0, 0, -1, 0, 2)], dtype=generate_traffic.TRAFFIC_DTYPE)
+    layout = generate_traffic.TrafficLayout(positions, VEHICLES)
+    monkeypatch.setattr("src.generators.scenario_compiler.get_vehicle_positions", lambda *a, **k: layout)
+    compiler = ScenarioCompiler(kg=KnowledgeGraph())
+    traffic = compiler._plan_dense_traffic("unused.xodr", [(-1, 50.0, 0)], random.Random(0))
+    assert [(car["road"], car["s"]) for car in traffic] == [(7, 52.0), (0, 200.0)]
+
+    blueprint = {"map_key": "highway", "traffic_density": "high", "actors": [{"name": "Ego", "lane": -1, "s": 50.0, "speed": 100}], "actions": []}
+    for backend in ("xosc", "stream"):
+        xml = compiler.compile_to_bytes(blueprint, backend=backend, seed=0).decode()
+        assert '<LanePosition roadId="7" laneId="-1" s="52.0"' in xml, backend
@@ -0,0 +1,88 @@
+# tests/test_jobs.py
+import os
+import json
+import asyncio
+import types
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from src.core.config import settings
+from src.core.jobs import Job, JobManager, JobStatus
+from src.core.knowledge_graph import KnowledgeGraph
+from src.core.scenario_store import ScenarioStore
+from src.generators.llm_pool import LlmBackendPool
+from src.generators.pipeline import ScenarioPipeline
+from src.generators.scenario_compiler import ScenarioCompiler
+
+BLUEPRINT = {"map_key": "highway", "actors": [{"name": "Ego", "lane": -2, "speed": 100}], "actions": [{"type": "brake", "actor": "Ego", "trigger_time": 3}]}
+
+class FixedBackend:
+    async def agenerate_code(self, user_prompt, system_prompt=""):
+        return json.dumps(BLUEPRINT)
+
+def test_expired_jobs_are_swept_without_new_submissions(tmp_path):
+    async def scenario():
+        manager = JobManager(lambda job: asyncio.sleep(0), workers=1, ttl_seconds=0.05, sweep_seconds=0.02)
+        job = manager.submit({})
+        result = tmp_path / "result.xosc"
+        result.write_bytes(b"<x/>")
+        job.result_path = str(result)
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            if not manager.jobs:
+                break
+        await manager.stop()
+        return job, manager
+
+    job, manager = asyncio.run(scenario())
+    assert job.status == JobStatus.DONE and manager.get(job.id) is None
+    assert not os.path.exists(job.result_path)
+
+@pytest.fixture
+def services(tmp_path, monkeypatch):
+    kg = KnowledgeGraph()
+    compiler = ScenarioCompiler(kg=kg)
+    store = ScenarioStore(str(tmp_path / "store"))
+    pipeline = ScenarioPipeline(LlmBackendPool([("groq", FixedBackend())]), compiler, kg, scenario_store=store)
+    compiles = []
+    compile_to_bytes = compiler.compile_to_bytes
+    monkeypatch.setattr(compiler, "compile_to_bytes", lambda *a, **k: compiles.append(1) or compile_to_bytes(*a, **k))
+    monkeypatch.setattr(settings, "OUTPUT_DIR", str(tmp_path / "out"))
+    fake = types.SimpleNamespace(pipeline=pipeline, scenario_store=store, compiles=compiles)
+    monkeypatch.setattr(main, "services", fake)
+    yield fake
+    store.close()
+
+def run_job(prompt="highway braking"):
+    job = Job(os.urandom(8).hex(), {"prompt": prompt, "traffic_density": "low"})
+    asyncio.run(main._run_job(job))
+    job.update(stage="done", progress=100, status=JobStatus.DONE)
+    main.job_manager.jobs[job.id] = job
+    return job
+
+def test_jobs_go_through_the_scenario_store(services):
+    first, second = run_job(), run_job()
+    assert services.compiles == [1] # The second job is served from the store
+    assert first.result_digest == second.result_digest and first.result_path is None
+    assert services.scenario_store.stats()["entries"] == 1
+    assert not os.path.exists(settings.OUTPUT_DIR) or not os.listdir(settings.OUTPUT_DIR)
+
+    client = TestClient(main.app)
+    response = client.get(f"/jobs/{first.id}/result")
+    assert response.status_code == 200 and response.headers["X-Scenario-Hash"] == first.result_digest
+    assert services.scenario_store.get(first.result_digest) == response.content
+    assert client.get(f"/jobs/{first.id}").json()["result_hash"] == first.result_digest
+
+    # Evicted from the store by retention: gone, not a 500
+    services.scenario_store.max_bytes = 0
+    services.scenario_store.enforce_retention()
+    assert client.get(f"/jobs/{first.id}/result").status_code == 410
+
+def test_jobs_without_a_store_write_loose_files(services, monkeypatch):
+    monkeypatch.setattr(services, "scenario_store", None)
+    services.pipeline.scenario_store = None
+    job = run_job()
+    assert job.result_digest is None and os.path.exists(job.result_path)
+    response = TestClient(main.app).get(f"/jobs/{job.id}/result")
+    assert response.status_code == 200 and b"OpenSCENARIO" in response.content
@@ -0,0 +1,102 @@
+# tests/test_json_utils.py
+import json
+import pytest
+
+from src.core.json_utils import repair_json, extract_json_from_text, IncrementalJsonExtractor, _last_token_index
+
+def repaired(text):
+    return json.loads(repair_json(text))
+
+def test_valid_json_is_unchanged():
+    text = '{"actors": [{"name": "Ego", "speed": 1.5e1}], "actions": []}'
+    assert repair_json(text) == text
+
+@pytest.mark.parametrize("text", [
+    '{"a": 1, // the speed\n"b": 2}',
+    '{"a": 1, # the speed\n"b": 2}',
+    '{"a": 1, /* the\nspeed */ "b": 2}',
+])
+def test_comments(text):
+    assert repaired(text) == {"a": 1, "b": 2}
+
+def test_single_quotes():
+    assert repaired("{'a': 'it\\'s \"x\"'}") == {"a": 'it\'s "x"'}
+
+def test_unquoted_keys_and_bare_words():
+    assert repaired('{name: Ego, type: car-1}') == {"name": "Ego", "type": "car-1"}
+
+def test_python_literals():
+    assert repaired('{"a": True, "b": False, "c": None}') == {"a": True, "b": False, "c": None}
+
+def test_trailing_commas():
+    assert repaired('{"a": [1, 2,], "b": {"c": 3,},}') == {"a": [1, 2], "b": {"c": 3}}
+
+def test_missing_commas():
+    assert repaired('{"a": "x" "b": 2 "c": [1 2 "y" {"d": 1} [3]] "e": true "f": {} "g": null}') == \
+        {"a": "x", "b": 2, "c": [1, 2, "y", {"d": 1}, [3]], "e": True, "f": {}, "g": None}
+
+def test_missing_commas_in_a_long_reply():
+    # Every string looks back past the previous token: must stay linear, not copy the token list each time
+    members = " ".join(f'"k{i}": "v{i}"' for i in range(5000))
+    assert repaired("{" + members + "}") == {f"k{i}": f"v{i}" for i in range(5000)}
+
+def test_last_token_index_stops_at_end():
+    out = ['{', '"a"', ' ', ':', '  ', '"b"']
+    assert _last_token_index(out) == 5 and _last_token_index(out, 5) == 3
+    assert _last_token_index(out, 3) == 1 and _last_token_index(out, 0) == -1
+
+def test_missing_comma_not_added_after_key():
+    # A string right after a key is a missing colon, not a new member
+    with pytest.raises(json.JSONDecodeError):
+        repaired('{"a" "b"}')
+
+@pytest.mark.parametrize("text, value", [
+    ('{"a": .5}', 0.5),
+    ('{"a": -.5}', -0.5),
+    ('{"a": +2}', 2),
+    ('{"a": 5.}', 5.0),
+    ('{"a": 1e}', 1),
+    ('{"a": 2E-}', 2),
+    ('{"a": -1.5e+2}', -150.0),
+])
+def test_numbers(text, value):
+    assert repaired(text) == {"a": value}
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": -}', {"a": None}),
+    ('{"a": [1, -]}', {"a": [1, None]}),
+    ('{"a": -', {"a": None}),
+])
+def test_dangling_minus(text, expected):
+    assert repaired(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "trunc', {"a": "trunc"}),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1,', {"a": 1}),
+    ('{"a": {"b": [{"c": 1', {"a": {"b": [{"c": 1}]}}),
+])
+def test_truncation(text, expected):
+    assert repaired(text) == expected
+
+def test_prose_around_the_object():
+    assert repaired('Sure! Here it is: {"a": 1} Let me know if you need more {"b": 2}') == {"a": 1}
+
+def test_mixed_up_closers():
+    assert repaired('{"a": [1, 2}}') == {"a": [1, 2]}
+
+def test_no_object():
+    assert repair_json("no json here") == "no json here"
+
+def test_extract_json_from_text():
+    assert extract_json_from_text('text {"a": "}", "b": {"c": 1}} more') == '{"a": "}", "b": {"c": 1}}'
+    assert extract_json_from_text('{"a": 1') is None
+
+def test_incremental_extractor_across_chunks():
+    extractor = IncrementalJsonExtractor()
+    assert extractor.feed('Here: {"a": "{') is None
+    assert extractor.feed('x", "b": [1') is None
+    assert extractor.partial == '{"a": "{x", "b": [1'
+    assert extractor.feed(']} trailing') == '{"a": "{x", "b": [1]}'
@@ -0,0 +1,45 @@
+# tests/test_lane_index.py
+import random
+import numpy as np
+
+from src.generators.lane_index import LaneIndex
+
+def brute_force_clear(positions, lane, s, min_gap):
+    return all(l != lane or abs(s - o) >= min_gap for l, o in positions)
+
+def test_empty_index_is_clear():
+    index = LaneIndex()
+    assert len(index) == 0 and index.is_clear(-1, 10.0, 15.0)
+    assert index.clear_mask([-1, 1], [0.0, 5.0], 15.0).all()
+
+def test_gap_is_per_lane():
+    index = LaneIndex([(-1, 50.0), (1, 100.0)])
+    assert not index.is_clear(-1, 60.0, 15.0)
+    assert index.is_clear(1, 60.0, 15.0)
+    assert index.is_clear(-1, 65.0, 15.0) and index.is_clear(-1, 35.0, 15.0) # Exactly min_gap away is clear
+    assert not index.is_clear(-1, 50.0, 15.0)
+
+def test_add_keeps_lanes_sorted():
+    index = LaneIndex()
+    for s in (80.0, 20.0, 50.0):
+        index.add(-2, s)
+    assert len(index) == 3 and index._lanes[(0, -2)] == [20.0, 50.0, 80.0]
+    assert not index.is_clear(-2, 45.0, 10.0) and index.is_clear(-2, 35.0, 10.0)
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    positions = [(rng.choice([-3, -2, -1, 1, 2]), rng.uniform(0, 500)) for _ in range(40)]
+    index = LaneIndex(positions)
+    lanes = np.array([rng.choice([-3, -2, -1, 1, 2, 3]) for _ in range(2000)])
+    s = np.array([rng.uniform(-20, 520) for _ in range(2000)])
+    expected = np.array([brute_force_clear(positions, l, v, 15.0) for l, v in zip(lanes, s)])
+    assert (index.clear_mask(lanes, s, 15.0) == expected).all()
+    assert [index.is_clear(l, v, 15.0) for l, v in zip(lanes, s)] == expected.tolist()
+
+def test_gap_is_per_road():
+    index = LaneIndex([(-1, 50.0), (-1, 300.0, 2)]) # Road defaults to 0
+    assert not index.is_clear(-1, 55.0, 15.0) and index.is_clear(-1, 55.0, 15.0, road=2)
+    assert not index.is_clear(-1, 290.0, 15.0, road=2) and index.is_clear(-1, 290.0, 15.0)
+    mask = index.clear_mask([-1, -1, -1, -1], [55.0, 55.0, 290.0, 290.0], 15.0, roads=[0, 2, 0, 2])
+    assert mask.tolist() == [False, True, True, False]
+    assert index.clear_mask([-1, -1], [55.0, 290.0], 15.0).tolist() == [False, True]
@@ -0,0 +1,63 @@
+# tests/test_llm_pool.py
+import asyncio
+import pytest
+
+from src.core.rate_limiter import ProviderRateLimitError
+from src.generators.llm_pool import LlmBackendPool
+
+GOOD = '{"actors": [{"name": "Ego"}], "actions": []}'
+MALFORMED = "{'actors': [{'name': 'Ego',},], 'actions': [],}"
+
+class FakeBackend:
+    def __init__(self, reply="", error=None, delay=0.0):
+        self.reply, self.error, self.delay = reply, error, delay
+        self.calls = 0
+
+    async def agenerate_code(self, user_prompt, system_prompt=""):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.reply
+
+def run(pool):
+    return asyncio.run(pool.agenerate_code("prompt"))
+
+def test_strict_json_wins():
+    pool = LlmBackendPool([("a", FakeBackend(GOOD))])
+    assert run(pool) == GOOD
+    assert pool.wins == {"a": 1}
+
+def test_malformed_reply_is_returned_not_failed_over():
+    backup = FakeBackend(GOOD)
+    pool = LlmBackendPool([("a", FakeBackend(MALFORMED)), ("b", backup)])
+    assert run(pool) == MALFORMED
+    assert backup.calls == 0
+    assert pool.failovers == 0 and pool.errors == {"a": 0, "b": 0}
+
+def test_single_backend_malformed_reply_reaches_caller():
+    pool = LlmBackendPool([("groq", FakeBackend(MALFORMED))])
+    assert run(pool) == MALFORMED
+
+@pytest.mark.parametrize("failure", [FakeBackend(""), FakeBackend("   "), FakeBackend(error=RuntimeError("boom"))])
+def test_empty_or_error_fails_over(failure):
+    pool = LlmBackendPool([("a", failure), ("b", FakeBackend(GOOD))])
+    assert run(pool) == GOOD
+    assert pool.failovers == 1 and pool.errors["a"] == 1
+
+def test_hedged_strict_reply_beats_malformed():
+    pool = LlmBackendPool([("slow", FakeBackend(MALFORMED, delay=0.2)), ("fast", FakeBackend(GOOD, delay=0.1))], hedge_after=0.05)
+    assert run(pool) == GOOD
+
+def test_hedged_prefers_repairable_over_garbage():
+    pool = LlmBackendPool([("a", FakeBackend("no json here", delay=0.1)), ("b", FakeBackend(MALFORMED, delay=0.15))], hedge_after=0.01)
+    assert run(pool) == MALFORMED
+
+def test_all_failed_rate_limit_is_reraised():
+    pool = LlmBackendPool([("a", FakeBackend(error=ProviderRateLimitError("429"))), ("b", FakeBackend(""))])
+    with pytest.raises(ProviderRateLimitError):
+        run(pool)
+
+def test_all_failed_returns_empty():
+    pool = LlmBackendPool([("a", FakeBackend("")), ("b", FakeBackend(error=ValueError("x")))])
+    assert run(pool) == ""
@@ -0,0 +1,61 @@
+# tests/test_pipeline_repair.py
+import asyncio
+import pytest
+
+from src.core.config import settings
+from src.core.knowledge_graph import KnowledgeGraph
+from src.generators.llm_pool import LlmBackendPool
+from src.generators.pipeline import ScenarioPipeline, BlueprintGenerationError
+
+class ScriptedBackend:
+    """ Answers with the given replies in order (the last one repeats). """
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    async def agenerate_code(self, user_prompt, system_prompt=""):
+        self.prompts.append(user_prompt)
+        return self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+
+def generate(backend, fragment_repair=True):
+    settings.LLM_FRAGMENT_REPAIR = fragment_repair
+    pool = LlmBackendPool([("groq", backend)])
+    pipeline = ScenarioPipeline(pool, compiler=None, kg=KnowledgeGraph())
+    counters = {}
+    blueprint = asyncio.run(pipeline.generate_blueprint("highway: cut in", counters=counters))
+    return blueprint, counters
+
+@pytest.fixture(autouse=True)
+def restore_settings():
+    saved = settings.LLM_FRAGMENT_REPAIR
+    yield
+    settings.LLM_FRAGMENT_REPAIR = saved
+
+def test_malformed_reply_is_repaired_locally():
+    reply = "Here you go: {'actors': [{'name': 'Ego', 'speed': 80,},], 'actions': [{'type': 'brake',},],}"
+    blueprint, counters = generate(ScriptedBackend(reply))
+    assert blueprint.actors[0].name == "Ego" and blueprint.actions[0].type == "brake"
+    assert counters["llm_calls"] == 1
+    assert counters["local_repairs"] == 1 and counters["regenerations_avoided"] == 1
+
+def test_truncated_reply_is_repaired_locally():
+    blueprint, counters = generate(ScriptedBackend('{"actors": [{"name": "Ego", "speed": 80}], "actions": [{"type": "bra'))
+    assert blueprint.actors[0].speed == 80
+    assert counters["local_repairs"] == 1
+
+def test_fragment_repair_goes_through_the_pool():
+    backend = ScriptedBackend('{"actors": [{"name": "Ego"}], "actions": :: }', '{"actors": [{"name": "Ego"}], "actions": []}')
+    blueprint, counters = generate(backend)
+    assert blueprint.actors[0].name == "Ego"
+    assert counters["llm_calls"] == 2 and counters["fragment_repairs"] == 1 and counters["local_repairs"] == 0
+    assert "malformed or truncated" in backend.prompts[1]
+
+def test_empty_fragment_reply_falls_back_to_regeneration():
+    backend = ScriptedBackend('{"actors": [{"name": "Ego"}], "actions": :: }', "", '{"actors": [{"name": "Ego"}], "actions": []}')
+    blueprint, counters = generate(backend)
+    assert blueprint.actors[0].name == "Ego"
+    assert counters["fragment_repairs"] == 0 and counters["llm_calls"] == 3
+
+def test_unrepairable_reply_is_regenerated_then_fails():
+    with pytest.raises(BlueprintGenerationError):
+        generate(ScriptedBackend("no json at all"), fragment_repair=False)
@@ -0,0 +1,24 @@
+# tests/test_prompt_builder.py
+import pytest
+
+from src.core.token_usage import estimate_tokens
+from src.generators.prompt_builder import STATIC_PREFIX, PromptAssembler
+
+def test_within_budget_is_untouched():
+    assembler = PromptAssembler(token_budget=10_000)
+    system, user = assembler.assemble("cut-in on the highway", "rules", "low")
+    assert system == STATIC_PREFIX and '"cut-in on the highway"' in user and "rules" in user
+    assert assembler.truncations == 0
+
+def test_over_budget_trims_context_before_request():
+    assembler = PromptAssembler(token_budget=estimate_tokens(STATIC_PREFIX) + 100)
+    _, user = assembler.assemble("cut-in on the highway", "x" * 4000, "low")
+    assert '"cut-in on the highway"' in user and "x" * 4000 not in user
+    assert assembler.prefix_tokens + estimate_tokens(user) <= assembler.token_budget
+    assert assembler.truncations == 1
+
+def test_prefix_over_budget_is_refused():
+    assembler = PromptAssembler(token_budget=estimate_tokens(STATIC_PREFIX) - 1)
+    with pytest.raises(ValueError, match="no room for the request"):
+        assembler.assemble("cut-in on the highway", "rules", "low")
+    assert assembler.truncations == 0
@@ -0,0 +1,127 @@
+# tests/test_road_geometry.py
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.generators import road_geometry
+from src.generators.road_helpers import parse_road
+from src.generators.road_model import (
+    load_road_model, clear_road_models, ARC, SPIRAL, POLY3, PARAM_POLY3,
+    GEOM_S, GEOM_X, GEOM_Y, GEOM_HDG, GEOM_LENGTH, GEOM_TYPE,
+)
+from tests.conftest import synthetic_xodr
+
+@pytest.fixture(scope="module")
+def roadfile(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("maps") / "synthetic.xodr")
+    synthetic_xodr(path, 20)
+    return path
+
+@pytest.fixture
+def model(roadfile, monkeypatch):
+    monkeypatch.setattr(settings, "ROAD_CACHE_DIR", "")
+    clear_road_models()
+    return load_road_model(roadfile)
+
+def test_model_matches_parse_road(model, roadfile):
+    assert model.to_road_dict() == parse_road(roadfile)[1]
+    assert model.to_road_dict(junctions=True, all_lane_types=True) == parse_road(roadfile, junctions=True, all_lane_types=True)[1]
+
+def test_batch_matches_per_point(model):
+    rng = np.random.default_rng(0)
+    for road in range(5): # Every geometry type shows up in the first five roads
+        s = rng.uniform(0, model.lengths[road], 50)
+        batch = np.column_stack(road_geometry.lane_to_world(model, road, s, -2, 0.3))
+        single = np.array([np.column_stack(road_geometry.lane_to_world(model, road, value, -2, 0.3))[0] for value in s])
+        np.testing.assert_allclose(batch, single, rtol=0, atol=1e-9)
+
+def test_s_is_clamped_to_the_road(model):
+    x, y, hdg = road_geometry.reference_line(model, 0, [-10.0, 0.0, model.lengths[0], model.lengths[0] + 10])
+    assert (x[0], y[0], hdg[0]) == (x[1], y[1], hdg[1])
+    assert (x[2], y[2], hdg[2]) == (x[3], y[3], hdg[3])
+
+def test_geometry_starts_at_its_record(model):
+    for road in range(5):
+        geom, _ = model.geometries(road)
+        x, y, hdg = road_geometry.reference_line(model, road, geom[:, GEOM_S])
+        np.testing.assert_allclose(x, geom[:, GEOM_X], atol=1e-9)
+        np.testing.assert_allclose(y, geom[:, GEOM_Y], atol=1e-9)
+        np.testing.assert_allclose(hdg, geom[:, GEOM_HDG], atol=1e-9)
+
+@pytest.mark.parametrize("g_type", [ARC, SPIRAL, POLY3])
+def test_position_is_the_integral_of_heading(model, g_type):
+    """ Arc length parameterized geometries: x(s), y(s) must follow cos / sin of the heading. """
+    checked = 0
+    for road in range(len(model)):
+        geom, _ = model.geometries(road)
+        for record in geom[geom[:, GEOM_TYPE] == g_type]:
+            s = record[GEOM_S] + np.linspace(0, record[GEOM_LENGTH] * (1 - 1e-9), 4001)
+            x, y, hdg = road_geometry.reference_line(model, road, s)
+            ds = np.diff(s)
+            x_int = record[GEOM_X] + np.concatenate([[0], np.cumsum(ds * (np.cos(hdg[1:]) + np.cos(hdg[:-1])) / 2)])
+            y_int = record[GEOM_Y] + np.concatenate([[0], np.cumsum(ds * (np.sin(hdg[1:]) + np.sin(hdg[:-1])) / 2)])
+            np.testing.assert_allclose(x, x_int, atol=2e-3)
+            np.testing.assert_allclose(y, y_int, atol=2e-3)
+            checked += 1
+    assert checked
+
+def test_spiral_curvature_is_linear(model):
+    for road in range(len(model)):
+        geom, params = model.geometries(road)
+        for record, param in zip(geom, params):
+            if record[GEOM_TYPE] != SPIRAL:
+                continue
+            u = np.linspace(0, record[GEOM_LENGTH] * (1 - 1e-9), 11) # The end itself belongs to the next record
+            _, _, hdg = road_geometry.reference_line(model, road, record[GEOM_S] + u)
+            k0, k1 = param[0], param[1]
+            expected = record[GEOM_HDG] + k0 * u + (k1 - k0) / record[GEOM_LENGTH] * u * u / 2
+            np.testing.assert_allclose(hdg, expected, atol=1e-9)
+            return
+    pytest.fail("no spiral in the synthetic map")
+
+def test_param_poly3(model):
+    for road in range(len(model)):
+        geom, params = model.geometries(road)
+        for record, param in zip(geom, params):
+            if record[GEOM_TYPE] != PARAM_POLY3:
+                continue
+            p = np.linspace(0, record[GEOM_LENGTH], 7) # pRange="arcLength": p runs over the length
+            u = param[0] + param[1] * p + param[2] * p**2 + param[3] * p**3
+            v = param[4] + param[5] * p + param[6] * p**2 + param[7] * p**3
+            h = record[GEOM_HDG]
+            x, y, _ = road_geometry.reference_line(model, road, record[GEOM_S] + p)
+            np.testing.assert_allclose(x, record[GEOM_X] + u * np.cos(h) - v * np.sin(h), atol=1e-9)
+            np.testing.assert_allclose(y, record[GEOM_Y] + u * np.sin(h) + v * np.cos(h), atol=1e-9)
+            return
+    pytest.fail("no paramPoly3 in the synthetic map")
+
+@pytest.mark.parametrize("lane_id, t", [(0, 0.0), (1, 1.75), (2, 4.5), (-1, -1.75), (-2, -5.25), (-3, -8.5), (-4, -10.25)])
+def test_lane_t(model, lane_id, t):
+    s = np.linspace(0, model.lengths[3], 9)
+    np.testing.assert_allclose(road_geometry.lane_t(model, 3, s, lane_id), t)
+    np.testing.assert_allclose(road_geometry.lane_t(model, 3, s, lane_id, offset=0.5), t + 0.5)
+
+def test_lane_to_world_is_perpendicular_to_the_reference_line(model):
+    s = np.linspace(0, model.lengths[2], 25)
+    x_ref, y_ref, hdg = road_geometry.reference_line(model, 2, s)
+    x, y, _ = road_geometry.lane_to_world(model, 2, s, -2)
+    # Right of the heading (t < 0), 5.25 m away
+    np.testing.assert_allclose(np.hypot(x - x_ref, y - y_ref), 5.25, atol=1e-9)
+    np.testing.assert_allclose((x - x_ref) * np.cos(hdg) + (y - y_ref) * np.sin(hdg), 0, atol=1e-9)
+    assert ((x - x_ref) * -np.sin(hdg) + (y - y_ref) * np.cos(hdg) < 0).all()
+
+def test_road_width(model):
+    left, right = road_geometry.road_width(model, 0, [0.0, 10.0])
+    np.testing.assert_allclose(left, 5.5)
+    np.testing.assert_allclose(right, 10.5)
+
+def test_road_bounds_contain_the_outer_lanes(model):
+    bounds = road_geometry.road_bounds(model, step=1.0)
+    for road in range(len(model)):
+        s = np.linspace(0, model.lengths[road], 200)
+        for lane_id, offset in ((2, 1.0), (-4, -0.25)): # Outer edges
+            x, y, _ = road_geometry.lane_to_world(model, road, s, lane_id, offset)
+            assert (x >= bounds[road, 0] - 0.05).all() and (x <= bounds[road, 2] + 0.05).all()
+            assert (y >= bounds[road, 1] - 0.05).all() and (y <= bounds[road, 3] + 0.05).all()
+    reference_only = road_geometry.road_bounds(model, step=1.0, include_lanes=False)
+    assert (reference_only[:, :2] >= bounds[:, :2]).all() and (reference_only[:, 2:] <= bounds[:, 2:]).all()
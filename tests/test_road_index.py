@@ -0,0 +1,103 @@
+# tests/test_road_index.py
+import os
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.generators import road_index
+from src.generators.road_helpers import parse_road, get_roads_within_bounds
+from src.generators.road_index import RoadIndex, CONDITIONS, load_road_index, _segments_hit_box
+from src.generators.road_model import load_road_model, clear_road_models
+from tests.conftest import synthetic_xodr
+
+@pytest.fixture(scope="module")
+def roadfile(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("maps") / "synthetic.xodr")
+    synthetic_xodr(path, 100)
+    return path
+
+@pytest.fixture
+def index(roadfile, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ROAD_CACHE_DIR", str(tmp_path / "cache"))
+    clear_road_models()
+    road_index.clear_road_indexes()
+    return load_road_index(roadfile)
+
+def queries(index, count, seed=0):
+    rng = np.random.default_rng(seed)
+    lo, hi = index.polyline.min(axis=0), index.polyline.max(axis=0)
+    for _ in range(count):
+        yield tuple(rng.uniform(lo - 50, hi + 50)), tuple(rng.uniform(5, 400, 2))
+
+def dense_points(index, road, samples=100):
+    """ Points along the sampled reference line of a road, segments included. """
+    points = index.polyline[index.polyline_offsets[road]:index.polyline_offsets[road + 1]]
+    if len(points) < 2:
+        return points
+    t = np.linspace(0, 1, samples)[:, None, None]
+    return (points[:-1] + t * (points[1:] - points[:-1])).reshape(-1, 2)
+
+@pytest.mark.parametrize("condition", CONDITIONS)
+def test_within_bounds_matches_the_linear_scan(index, roadfile, condition):
+    _, road_dict = parse_road(roadfile)
+    for location, boundaries in queries(index, 100):
+        assert get_roads_within_bounds(index, location, boundaries, condition) == get_roads_within_bounds(road_dict, location, boundaries, condition)
+
+def test_within_bounds_junctions(index):
+    everything = index.within_bounds((0, 0), (1e6, 1e6), "start_or_stop", junctions=True)
+    assert everything == index.road_ids.tolist()
+    assert index.within_bounds((0, 0), (1e6, 1e6), "start_or_stop") == index.road_ids[~index.junctions].tolist()
+
+def test_unknown_condition_falls_back(index):
+    assert index.within_bounds((0, 0), (300, 300), "nearby") == index.within_bounds((0, 0), (300, 300), "start_and_stop")
+
+def test_intersecting_matches_brute_force(index):
+    for location, boundaries in queries(index, 60, seed=1):
+        box = (location[0] - boundaries[0], location[1] - boundaries[1], location[0] + boundaries[0], location[1] + boundaries[1])
+        expected = []
+        for road in range(len(index)):
+            p = dense_points(index, road)
+            if ((p[:, 0] >= box[0]) & (p[:, 0] <= box[2]) & (p[:, 1] >= box[1]) & (p[:, 1] <= box[3])).any():
+                expected.append(int(index.road_ids[road]))
+        got = index.intersecting(location, boundaries, junctions=True)
+        assert set(expected) <= set(got)
+        assert got == sorted(got, key=index.road_ids.tolist().index) # File order
+        assert set(got) <= set(index.intersecting(location, boundaries, junctions=True, exact=False))
+
+def test_within_radius_matches_brute_force(index):
+    rng = np.random.default_rng(2)
+    lo, hi = index.polyline.min(axis=0), index.polyline.max(axis=0)
+    for _ in range(40):
+        location, radius = rng.uniform(lo, hi), float(rng.uniform(10, 300))
+        expected = {int(index.road_ids[road]) for road in range(len(index))
+                    if (np.hypot(*(dense_points(index, road, 400) - location).T) <= radius).any()}
+        got = set(index.within_radius(tuple(location), radius, junctions=True))
+        assert expected <= got
+        for road_id in got - expected: # Only roads within a sampling step of the radius
+            road = int(np.flatnonzero(index.road_ids == road_id)[0])
+            assert np.hypot(*(dense_points(index, road, 400) - location).T).min() <= radius + 0.1
+
+def test_far_away_queries_are_empty(index):
+    far = tuple(index.polyline.max(axis=0) + 1e5)
+    assert index.within_bounds(far, (10, 10)) == []
+    assert index.intersecting(far, (10, 10)) == []
+    assert index.within_radius(far, 10) == []
+
+def test_segments_hit_box():
+    x0, y0 = np.array([0.0, 5.0, -1.0, 1.0]), np.array([0.0, 5.0, 0.0, 1.0])
+    x1, y1 = np.array([1.0, 6.0, -1.0, 1.0]), np.array([1.0, 6.0, 3.0, 1.0])
+    # Crosses, misses, parallel outside, a zero length segment inside
+    assert _segments_hit_box(x0, y0, x1, y1, (0.5, 0.5, 2, 2)).tolist() == [True, False, False, True]
+
+def test_cached_on_disk(index, roadfile):
+    assert load_road_index(roadfile) is index
+    road_index.clear_road_indexes()
+    hits = road_index.stats["disk_hits"]
+    reloaded = load_road_index(roadfile)
+    assert road_index.stats["disk_hits"] == hits + 1
+    assert reloaded is not index and (reloaded.bounds == index.bounds).all()
+    assert any(name.endswith(f".index{road_index.ROAD_INDEX_VERSION}.pkl") for name in os.listdir(settings.ROAD_CACHE_DIR))
+
+def test_built_from_the_model(index, roadfile):
+    fresh = RoadIndex(load_road_model(roadfile))
+    assert (fresh.road_ids == index.road_ids).all() and (fresh.polyline == index.polyline).all()
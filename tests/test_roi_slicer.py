@@ -0,0 +1,101 @@
+# tests/test_roi_slicer.py
+import os
+import pytest
+from lxml import etree
+
+from src.core.config import settings
+from src.generators import roi_slicer, road_geometry
+from src.generators.road_index import clear_road_indexes
+from src.generators.road_model import load_road_model, clear_road_models
+from src.generators.roi_slicer import load_roi_map, slice_xodr, roi
+from tests.conftest import synthetic_xodr
+
+ROADS = 100
+
+@pytest.fixture(scope="module")
+def roadfile(tmp_path_factory):
+    """ Synthetic map plus road links and one junction per ten roads (road 10j + 9 connects 10j and 10j + 20). """
+    path = str(tmp_path_factory.mktemp("maps") / "linked.xodr")
+    synthetic_xodr(path, ROADS)
+    tree = etree.parse(path)
+    root = tree.getroot()
+    for road in root.iter("road"):
+        road_id = int(road.get("id"))
+        link = etree.SubElement(road, "link")
+        etree.SubElement(link, "predecessor", elementType="road", elementId=str(road_id - 1), contactPoint="end")
+        etree.SubElement(link, "successor", elementType="junction", elementId=str(road_id // 10))
+    for j in range(ROADS // 10):
+        junction = etree.SubElement(root, "junction", id=str(j), name=f"j{j}")
+        etree.SubElement(junction, "connection", id="0", incomingRoad=str(j * 10), connectingRoad=str(j * 10 + 9), contactPoint="start")
+        etree.SubElement(junction, "connection", id="1", incomingRoad=str(j * 10 + 20), connectingRoad=str(j * 10 + 9), contactPoint="start")
+    tree.write(path)
+    return path
+
+@pytest.fixture(autouse=True)
+def caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ROAD_CACHE_DIR", str(tmp_path / "roads"))
+    monkeypatch.setattr(settings, "ROI_CACHE_DIR", str(tmp_path / "roi"))
+    clear_road_models()
+    clear_road_indexes()
+    roi_slicer.clear_roi_maps()
+
+def check_consistent(path):
+    root = etree.parse(path).getroot()
+    roads = {road.get("id") for road in root.iter("road")}
+    junctions = {junction.get("id") for junction in root.iter("junction")}
+    for road in root.iter("road"):
+        assert road.get("junction") == "-1" or road.get("junction") in junctions
+        for target in road.find("link"):
+            assert target.get("elementId") in (roads if target.get("elementType") == "road" else junctions)
+    for junction in root.iter("junction"):
+        assert junction.findall("connection")
+        for connection in junction.findall("connection"):
+            assert connection.get("incomingRoad") in roads and connection.get("connectingRoad") in roads
+    return root, roads, junctions
+
+def test_slice_keeps_roads_and_fixes_links(roadfile, tmp_path):
+    keep = {0, 1, 2, 9, 10, 11, 20, 29, 40}
+    output = str(tmp_path / "slice.xodr")
+    written = slice_xodr(roadfile, keep, output)
+    root, roads, junctions = check_consistent(output)
+    assert roads == {str(road) for road in keep} and written["roads"] == len(keep)
+    # j0 (0/20 -> 9) and j2 (20/40 -> 29) keep both connections; j1 loses 10 -> 19 and 30 -> 19
+    assert junctions == {"0", "2"} and written["junctions"] == 2
+    assert len(root.find("junction[@id='0']").findall("connection")) == 2
+    assert root.find("header") is not None and root.tag == "OpenDRIVE"
+    assert root.find("road[@id='10']/link/predecessor").get("elementId") == "9" # Both kept
+    assert root.find("road[@id='40']/link/predecessor") is None                 # Road 39 dropped
+    assert root.find("road[@id='11']/link/successor") is None                   # Junction 1 dropped
+    assert root.find("road[@id='29']").get("junction") == "2"
+    assert len(load_road_model(output)) == len(keep)
+
+def test_roi_map_is_cached(roadfile):
+    model = load_road_model(roadfile)
+    x, y, _ = road_geometry.lane_to_world(model, 0, 30.0, -1)
+    path = load_roi_map(roadfile, (x[0], y[0]), 200, required=(0,))
+    assert path != roadfile and os.path.dirname(path) == settings.ROI_CACHE_DIR
+    _, roads, _ = check_consistent(path)
+    assert "0" in roads and len(roads) < ROADS
+
+    slices = roi_slicer.stats["slices"]
+    assert load_roi_map(roadfile, (x[0], y[0]), 200, required=(0,)) == path
+    roi_slicer.clear_roi_maps()
+    assert load_roi_map(roadfile, (x[0] + 1, y[0] - 1), 200, required=(0,)) == path # Snapped to the same ROI
+    assert roi_slicer.stats["slices"] == slices and roi_slicer.stats["disk_hits"] >= 1
+
+def test_required_roads_are_kept(roadfile):
+    path = load_roi_map(roadfile, (0.0, 0.0), 50, required=(0, 77))
+    _, roads, _ = check_consistent(path)
+    assert {"0", "77"} <= roads
+
+def test_roi_covering_everything_returns_the_map(roadfile):
+    assert load_roi_map(roadfile, (0.0, 0.0), 1e7) == roadfile
+    assert not os.path.isdir(settings.ROI_CACHE_DIR) or not os.listdir(settings.ROI_CACHE_DIR)
+
+def test_roi_snapping(monkeypatch):
+    monkeypatch.setattr(settings, "ROI_SNAP", 50.0)
+    x, y, radius = roi((112.0, -37.0), 300.0)
+    assert (x, y) == (100.0, -50.0) and radius > 300.0
+    assert radius >= 300.0 + ((112 - 100) ** 2 + (-37 + 50) ** 2) ** 0.5
+    monkeypatch.setattr(settings, "ROI_SNAP", 0.0)
+    assert roi((112.0, -37.0), 300.0) == (112.0, -37.0, 300.0)
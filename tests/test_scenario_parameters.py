@@ -0,0 +1,70 @@
+# tests/test_scenario_parameters.py
+import pytest
+
+from src.core.knowledge_graph import KnowledgeGraph
+from src.generators.scenario_compiler import ScenarioCompiler
+from src.generators.scenario_parameters import PARAMETER_FIELDS, esmini_args, family_key, parameter_name, variant_overrides
+
+BASE = {
+    "map_key": "highway",
+    "actors": [
+        {"name": "Ego", "speed": 90},
+        {"name": "Target", "lane": -2, "s": 60, "speed": 70},
+        {"name": "Ped", "type": "pedestrian", "s": 40},
+    ],
+    "actions": [
+        {"type": "lane_change", "actor": "Target", "target_lane": -1, "trigger_entity": "Ego", "trigger_dist": 20},
+        {"type": "lane_change", "actor": "Ego", "target_lane": -2, "trigger_time": 4},
+        {"type": "brake", "actor": "Target", "trigger_time": 6},
+        {"type": "speed_change", "actor": "Ego", "target_speed": 50, "trigger_time": 8, "duration": 2},
+        {"type": "cross_street", "actor": "Ped", "trigger_entity": "Ego", "trigger_dist": 30},
+        {"type": "traffic_light", "id": "1", "state": "green", "trigger_time": 3},
+        {"type": "teleport", "actor": "Ego"}, # No handler: skipped, binds nothing
+    ],
+}
+
+@pytest.fixture(scope="module")
+def compiler():
+    return ScenarioCompiler(kg=KnowledgeGraph())
+
+def variant(i):
+    blueprint = {**BASE, "actors": [dict(a) for a in BASE["actors"]], "actions": [dict(a) for a in BASE["actions"]]}
+    blueprint["actors"][0]["speed"] = 80 + i
+    blueprint["actions"][2]["trigger_time"] = 5 + i / 10
+    return blueprint
+
+def test_parameter_name():
+    assert parameter_name("Ego", "speed") == "EgoSpeed"
+    assert parameter_name("Target Act0", "trigger_time") == "TargetAct0TriggerTime"
+
+@pytest.mark.parametrize("fields", [True, PARAMETER_FIELDS, ("lane", "offset"), ()])
+def test_values_match_what_the_build_declares(compiler, fields):
+    built = compiler._build(BASE, embed_traffic=False, parameters=fields, plan_traffic=False)[3].values
+    values = compiler.parameter_values(BASE, fields)
+    assert values == built and list(values) == list(built)
+    if fields == PARAMETER_FIELDS:
+        assert values["EgoSpeed"] == pytest.approx(25.0) and values["PedOffset"] == -4.0 and values["EgoLane"] == -2 # Highway default lane
+        assert values["TargetAct0TriggerDist"] == 20.0 and "TargetAct0TriggerTime" not in values
+
+def test_family_does_not_build_per_variant(compiler, monkeypatch):
+    builds = []
+    build = compiler._build
+    monkeypatch.setattr(compiler, "_build", lambda *a, **k: builds.append(1) or build(*a, **k))
+
+    variants = [variant(i) for i in range(50)]
+    overrides = variant_overrides(compiler, variants[0], variants, True)
+    assert builds == []
+    assert [o["EgoSpeed"] for o in overrides] == pytest.approx([(80 + i) / 3.6 for i in range(50)])
+
+    data, overrides = compiler.compile_family(variants)
+    assert len(builds) == 1 and len(overrides) == 50 and b"$EgoSpeed" in data
+
+def test_variant_outside_the_family(compiler):
+    other = variant(0)
+    other["actions"][0]["actor"] = "Ego"
+    assert family_key(other, True) != family_key(variant(0), True)
+    with pytest.raises(ValueError):
+        variant_overrides(compiler, variant(0), [variant(1), other], True)
+
+def test_esmini_args():
+    assert esmini_args({"EgoSpeed": 25.0, "EgoLane": -1}) == ["--param", "EgoSpeed=25.0", "--param", "EgoLane=-1"]
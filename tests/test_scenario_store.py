@@ -0,0 +1,106 @@
+# tests/test_scenario_store.py
+import os
+import pytest
+
+from src.core.scenario_store import ScenarioStore, scenario_hash
+
+def xosc(name, date="2024-01-01T00:00:00"):
+    return (f'<?xml version="1.0"?>\n<OpenSCENARIO><FileHeader revMajor="1" revMinor="1" date="{date}" description="{name}"/>'
+            f'<Entities>{"<x/>" * 200}</Entities></OpenSCENARIO>').encode("utf-8")
+
+@pytest.fixture(params=["none", "gzip"])
+def store(tmp_path, request):
+    store = ScenarioStore(str(tmp_path / "store"), compression=request.param)
+    yield store
+    store.close()
+
+def age(store, digest, seconds):
+    """ Pretends `digest` was last stored / read `seconds` ago. """
+    store._conn.execute("UPDATE objects SET created_at = created_at - ?, last_access = last_access - ? WHERE digest = ?", (seconds, seconds, digest))
+    store._conn.commit()
+
+def test_hash_ignores_the_header_date():
+    assert scenario_hash(xosc("a", "2024-01-01")) == scenario_hash(xosc("a", "2025-06-30"))
+    assert scenario_hash(xosc("a")) != scenario_hash(xosc("b"))
+
+def test_put_get_roundtrip(store):
+    data = xosc("a")
+    digest = store.put(data, key="k1")
+    assert store.get(digest) == data
+    assert store.get_by_key("k1") == data
+    assert store.lookup("k1") == digest
+    assert store.get("0" * 64) is None and store.get_by_key("missing") is None
+
+def test_identical_scenarios_are_stored_once(store):
+    first = store.put(xosc("a", "2024-01-01"), key="k1")
+    second = store.put(xosc("a", "2025-01-01"), key="k2")
+    assert first == second
+    stats = store.stats()
+    assert stats["entries"] == 1 and stats["aliases"] == 2 and stats["deduplicated"] == 1
+    files = [f for _, _, names in os.walk(store.root) for f in names if ".xosc" in f]
+    assert len(files) == 1
+
+def test_deleted_file_is_written_again(store):
+    digest = store.put(xosc("a"))
+    os.remove(os.path.join(store.root, store._relative_path(digest)))
+    assert store.get(digest) is None
+    store.put(xosc("a"))
+    assert store.get(digest) == xosc("a")
+
+def test_retention_by_age(store):
+    old, new = store.put(xosc("old"), key="old"), store.put(xosc("new"))
+    age(store, old, store.max_age_seconds + 60)
+    assert store.enforce_retention() == 1
+    assert store.get(old) is None and store.lookup("old") is None
+    assert store.get(new) is not None
+
+def test_dedup_hit_keeps_an_entry_alive(store):
+    digest = store.put(xosc("a"))
+    age(store, digest, store.max_age_seconds + 60)
+    store.put(xosc("a", "2030-01-01")) # Compiled again: same content
+    assert store.enforce_retention() == 0
+    assert store.get(digest) is not None
+
+def test_read_keeps_an_entry_alive(store):
+    digest = store.put(xosc("a"))
+    age(store, digest, store.max_age_seconds + 60)
+    store.get(digest)
+    assert store.enforce_retention() == 0
+
+def test_retention_by_size_drops_least_recently_used(store):
+    digests = [store.put(xosc(name)) for name in "abcd"]
+    for i, digest in enumerate(digests):
+        age(store, digest, 100 - i) # a is the least recently used
+    store.get(digests[0]) # ... until it is read
+    size = store.stats()["bytes"] // 4
+    store.max_bytes = size * 2 + size // 2
+    assert store.enforce_retention() == 2
+    assert [store.get(d) is not None for d in digests] == [True, False, False, True]
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        ScenarioStore(str(tmp_path), compression="brotli")
+
+def test_scenario_key_tracks_compile_inputs(tmp_path, monkeypatch):
+    from src.core.blueprint import parse_blueprint
+    from src.core.config import settings
+    from src.core.knowledge_graph import KnowledgeGraph
+    from src.generators import pipeline as pipeline_module
+    from src.generators.pipeline import ScenarioPipeline
+    from src.generators.scenario_compiler import ScenarioCompiler
+
+    kg = KnowledgeGraph()
+    store = ScenarioStore(str(tmp_path / "store"))
+    pipeline = ScenarioPipeline(None, ScenarioCompiler(kg=kg), kg, scenario_store=store)
+    blueprint = parse_blueprint({"actors": [{"name": "Ego"}], "actions": [], "map_key": "highway"})
+    key = pipeline.scenario_key(blueprint)
+    assert key == pipeline.scenario_key(parse_blueprint(blueprint.to_dict()))
+    assert key != pipeline.scenario_key(parse_blueprint({**blueprint.to_dict(), "map_key": "city"}))
+    assert key != pipeline.scenario_key(blueprint, backend="stream" if settings.COMPILER_BACKEND != "stream" else "xosc")
+
+    monkeypatch.setattr(settings, "ESMINI_BIN_PATH", "/opt/esmini/bin/esmini")
+    moved = pipeline.scenario_key(blueprint)
+    assert moved != key
+    monkeypatch.setattr(pipeline_module, "COMPILER_OUTPUT_VERSION", pipeline_module.COMPILER_OUTPUT_VERSION + 1)
+    assert pipeline.scenario_key(blueprint) != moved
+    store.close()
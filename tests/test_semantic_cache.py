@@ -0,0 +1,93 @@
+# tests/test_semantic_cache.py
+import sys
+import time
+import types
+import threading
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.core.semantic_cache import SemanticBlueprintCache
+
+class FakeSentenceTransformer:
+    """ Slow to construct, like the real model; counts how often it is loaded. """
+    loads = 0
+
+    def __init__(self, name, device=None):
+        time.sleep(0.05)
+        type(self).loads += 1
+
+    def encode(self, text, normalize_embeddings=True):
+        vec = np.random.default_rng(sum(text.encode("utf-8"))).normal(size=16) # Same text, same vector
+        return vec / np.linalg.norm(vec)
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    FakeSentenceTransformer.loads = 0
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(SentenceTransformer=FakeSentenceTransformer))
+    cache = SemanticBlueprintCache(str(tmp_path / "semantic.sqlite3"), threshold=0.99)
+    yield cache
+    cache.close()
+
+def test_disabled_by_default():
+    assert type(settings).model_fields["SEMANTIC_CACHE_ENABLED"].default is False
+
+def test_concurrent_first_requests_load_the_model_once(cache):
+    threads = [threading.Thread(target=cache.embed, args=("cut in on the highway",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert FakeSentenceTransformer.loads == 1
+
+def test_load_model_up_front(cache):
+    cache.load_model()
+    cache.embed("a prompt")
+    assert FakeSentenceTransformer.loads == 1
+
+def test_lookup_is_scoped(cache, tmp_path):
+    embedding = cache.embed("cut in on the highway")
+    cache.add("cut in on the highway", embedding, "low|highway", {"actors": [{"name": "Ego"}]})
+    assert cache.lookup(embedding, "low|highway")[0] == {"actors": [{"name": "Ego"}]}
+    assert cache.lookup(embedding, "high|highway")[0] is None
+    assert cache.lookup(cache.embed("a pedestrian crosses the street"), "low|highway")[0] is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Entries survive a restart
+    reopened = SemanticBlueprintCache(cache.db_path, threshold=0.99)
+    assert reopened.lookup(embedding, "low|highway")[0] == {"actors": [{"name": "Ego"}]}
+    reopened.close()
+
+def vectors(count, seed=0):
+    vecs = np.random.default_rng(seed).normal(size=(count, 16)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+def stored_ids(cache):
+    return [row[0] for row in cache._conn.execute("SELECT id FROM semantic_blueprints ORDER BY id")]
+
+def test_add_grows_the_buffer_geometrically(cache):
+    buffers, vecs = set(), vectors(300)
+    for i in range(300):
+        cache.add(f"prompt {i}", vecs[i], "low|highway", {"i": i})
+        buffers.add(id(cache._matrix))
+    assert cache.stats()["entries"] == 300 and len(cache._matrix) < 600
+    assert len(buffers) <= 4 # 64 -> 128 -> 256 -> 512 rows, not one copy per insert
+    assert cache.lookup(vecs[123], "low|highway")[0] == {"i": 123}
+
+def test_keeps_the_newest_max_entries(tmp_path):
+    small, vecs = SemanticBlueprintCache(str(tmp_path / "small.sqlite3"), threshold=0.99, max_entries=5), vectors(13)
+    for i in range(12):
+        small.add(f"prompt {i}", vecs[i], "low|highway", {"i": i})
+    assert small.stats()["entries"] == 5 and len(small._matrix) == 5
+    assert stored_ids(small) == list(range(8, 13)) # sqlite ids start at 1
+    assert small.lookup(vecs[2], "low|highway")[0] is None
+    assert [small.lookup(vecs[i], "low|highway")[0] for i in range(7, 12)] == [{"i": i} for i in range(7, 12)]
+
+    # Reloaded in id order, and the ring keeps evicting the oldest after a restart
+    small.close()
+    reopened = SemanticBlueprintCache(small.db_path, threshold=0.99, max_entries=5)
+    reopened.add("prompt 12", vecs[12], "low|highway", {"i": 12})
+    assert stored_ids(reopened) == list(range(9, 14))
+    assert reopened.lookup(vecs[7], "low|highway")[0] is None
+    assert reopened.lookup(vecs[12], "low|highway")[0] == {"i": 12}
+    reopened.close()